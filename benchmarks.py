@@ -0,0 +1,320 @@
+"""
+Benchmarks for the market simulation hot paths
+
+Every benchmark uses fixed seeds, so runs differ only by machine speed, and reports its
+best timing over several rounds of the suite after a warm-up run, so one slow interval
+(a context switch, a cold cache, a garbage collection) does not show up as a regression.
+Results can be saved as a JSON baseline and later runs compared against it:
+
+    python benchmarks.py --save baseline.json
+    python benchmarks.py --compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+from market_model import MarketSimulator, make_order_book
+
+def best_of(measure, repeat=5, warmup=1, min_time=0.05):
+    """
+    Best (smallest) of repeated timings
+
+    Args:
+        measure: Callable doing its own setup, timing one run and returning its seconds
+        repeat: Number of timings
+        warmup: Number of untimed runs first
+        min_time: Each timing repeats the run until this many seconds are timed and
+            averages them, so short runs are not at the mercy of timer and scheduler noise
+
+    Returns:
+        The smallest per-run time in seconds
+    """
+    for _ in range(warmup):
+        measure()
+    timings = []
+    for _ in range(max(1, repeat)):
+        # Like timeit, keep the cyclic garbage collector out of the timings
+        gc.collect()
+        gc.disable()
+        try:
+            elapsed, runs = measure(), 1
+            while elapsed < min_time:
+                elapsed += measure()
+                runs += 1
+        finally:
+            gc.enable()
+        timings.append(elapsed / runs)
+    return min(timings)
+
+def build_deep_book(depth, mid_price=5000, level_quantity=1000000, backend='dict'):
+    """Create an order book with `depth` resting levels on each side of mid_price"""
+    order_book = make_order_book(backend)
+    order_book.last_traded_price = mid_price
+    for offset in range(1, depth + 1):
+        order_book.make_order(mid_price - offset, level_quantity, True)
+        order_book.make_order(mid_price + offset, level_quantity, False)
+    return order_book
+
+def bench_order_book_depth(depths=(10, 100, 1000, 10000), num_orders=20000, seed=42, backend='dict',
+                           repeat=5, warmup=1):
+    """Measure place_order throughput (orders/sec) against resting book depth"""
+    rng = np.random.RandomState(seed)
+    orders = list(zip(rng.randint(4990, 5011, num_orders).tolist(), rng.randint(1, 41, num_orders).tolist(),
+                      (rng.random_sample(num_orders) < 0.5).tolist()))
+    results = []
+    for depth in depths:
+        def measure():
+            order_book = build_deep_book(depth, backend=backend)
+            start = time.perf_counter()
+            for price, quantity, buy in orders:
+                order_book.place_order(price, quantity, buy)
+            return time.perf_counter() - start
+
+        elapsed = best_of(measure, repeat, warmup)
+
+        results.append({
+            'backend': backend,
+            'depth': depth,
+            'orders': num_orders,
+            'seconds': elapsed,
+            'orders_per_sec': num_orders / elapsed
+        })
+    return results
+
+def bench_take_order_depth(depths=(10, 100, 1000, 10000), num_orders=20000, levels_per_take=5,
+                           mid_price=5000, backend='dict', repeat=5, warmup=1):
+    """
+    Measure take_order throughput (orders/sec) against resting book depth
+
+    Every market order is a buy sweeping levels_per_take whole ask levels (sell takers
+    never fill in this order book). The book is rebuilt, outside the timing, whenever
+    the asks run low, so every take walks a book of about the given depth.
+    """
+    results = []
+    for depth in depths:
+        quantity = levels_per_take * 1000
+        limit_price = mid_price + depth + 1
+
+        def measure():
+            order_book = build_deep_book(depth, mid_price, level_quantity=1000, backend=backend)
+            elapsed = 0.0
+            for _ in range(num_orders):
+                if len(order_book.sell_book) < levels_per_take:
+                    order_book = build_deep_book(depth, mid_price, level_quantity=1000, backend=backend)
+                start = time.perf_counter()
+                order_book.take_order(limit_price, quantity, True)
+                elapsed += time.perf_counter() - start
+            return elapsed
+
+        elapsed = best_of(measure, repeat, warmup)
+
+        results.append({
+            'backend': backend,
+            'depth': depth,
+            'orders': num_orders,
+            'seconds': elapsed,
+            'orders_per_sec': num_orders / elapsed
+        })
+    return results
+
+def bench_record_trade(num_trades=200000, seed=42, backend='dict', repeat=5, warmup=1):
+    """Measure record_trade cost (microseconds per trade, and trades/sec)"""
+    prices = np.random.RandomState(seed).randint(180, 200, num_trades).tolist()
+
+    def measure():
+        order_book = make_order_book(backend)
+        start = time.perf_counter()
+        for price in prices:
+            order_book.record_trade(price)
+        return time.perf_counter() - start
+
+    elapsed = best_of(measure, repeat, warmup)
+
+    return {
+        'backend': backend,
+        'trades': num_trades,
+        'seconds': elapsed,
+        'microseconds_per_trade': elapsed / num_trades * 1e6,
+        'trades_per_sec': num_trades / elapsed
+    }
+
+def make_bench_data(num_rows, seed=42):
+    """Synthetic minute bars around 190 for the simulation benchmarks"""
+    close = 190 + np.cumsum(np.random.RandomState(seed).normal(0, 0.2, num_rows))
+    return pd.DataFrame({'open': np.round(close, 2), 'close': np.round(close, 2)})
+
+def bench_run_simulation(trader_counts=(10, 50, 200), num_bars=300, seed=42, vectorized=False, repeat=5,
+                         warmup=1):
+    """Measure run_simulation throughput (bars/sec) against the number of traders"""
+    df = make_bench_data(num_bars, seed)
+    params = {'trader_activity_rate': 1.0, 'proportion_maker': 0.5, 'price_range_percent': 0.01}
+    results = []
+    for num_traders in trader_counts:
+        def measure():
+            simulator = MarketSimulator.create(num_traders, vectorized=vectorized, seed=seed)
+            start = time.perf_counter()
+            simulator.run_simulation(df, params)
+            return time.perf_counter() - start
+
+        elapsed = best_of(measure, repeat, warmup)
+        results.append({
+            'vectorized': vectorized,
+            'traders': num_traders,
+            'bars': num_bars,
+            'seconds': elapsed,
+            'bars_per_sec': num_bars / elapsed
+        })
+    return results
+
+def bench_run_multiple_simulations(simulation_counts=(10, 50, 100), num_windows=5, window_size=30,
+                                   prediction_size=5, num_traders=50, seed=42, repeat=5, warmup=1,
+                                   **options):
+    """Measure run_multiple_simulations throughput (windows/sec) against num_simulations"""
+    df = make_bench_data(window_size + num_windows * prediction_size, seed)
+    results = []
+    for num_simulations in simulation_counts:
+        def measure():
+            simulator = MarketSimulator.create(num_traders, seed=seed)
+            start = time.perf_counter()
+            simulator.run_multiple_simulations(df, window_size, prediction_size, num_simulations, **options)
+            return time.perf_counter() - start
+
+        elapsed = best_of(measure, repeat, warmup)
+        results.append({
+            'simulations': num_simulations,
+            'windows': num_windows,
+            'seconds': elapsed,
+            'windows_per_sec': num_windows / elapsed
+        })
+    return results
+
+def run_suite(quick=False, repeat=5):
+    """
+    Run every benchmark
+
+    The suite is run repeat times in rounds and each benchmark keeps its best round, so
+    the timed runs of one benchmark are spread over the whole suite rather than back to
+    back, and a slow spell of the machine cannot hit all of them.
+
+    Args:
+        quick: Smaller sizes, for a fast smoke run
+        repeat: Number of rounds; only the first one has warm-up runs
+
+    Returns:
+        Dict of benchmark name -> {'value': throughput, 'unit': unit}; higher is better
+    """
+    metrics = {}
+    for round_index in range(max(1, repeat)):
+        for name, result in _suite_round(quick, warmup=1 if round_index == 0 else 0).items():
+            if name not in metrics or result['value'] > metrics[name]['value']:
+                metrics[name] = result
+    return metrics
+
+def _suite_round(quick, warmup):
+    """One timed run of every benchmark"""
+    depths = (10, 1000) if quick else (10, 100, 1000, 10000)
+    num_orders = 2000 if quick else 20000
+    options = {'repeat': 1, 'warmup': warmup}
+    metrics = {}
+    for backend in ('dict', 'ladder', 'orders'):
+        for row in bench_order_book_depth(depths, num_orders, backend=backend, **options):
+            metrics[f"place_order/{backend}/depth={row['depth']}"] = {
+                'value': row['orders_per_sec'], 'unit': 'orders/sec'}
+        for row in bench_take_order_depth(depths, num_orders, backend=backend, **options):
+            metrics[f"take_order/{backend}/depth={row['depth']}"] = {
+                'value': row['orders_per_sec'], 'unit': 'orders/sec'}
+        row = bench_record_trade(20000 if quick else 200000, backend=backend, **options)
+        metrics[f"record_trade/{backend}"] = {'value': row['trades_per_sec'], 'unit': 'trades/sec'}
+
+    trader_counts = (10, 50) if quick else (10, 50, 200)
+    for vectorized in (False, True):
+        kind = 'population' if vectorized else 'traders'
+        for row in bench_run_simulation(trader_counts, 100 if quick else 300, vectorized=vectorized, **options):
+            metrics[f"run_simulation/{kind}/traders={row['traders']}"] = {
+                'value': row['bars_per_sec'], 'unit': 'bars/sec'}
+
+    simulation_counts = (5, 20) if quick else (10, 50, 100)
+    for row in bench_run_multiple_simulations(simulation_counts, 2 if quick else 5, **options):
+        metrics[f"run_multiple_simulations/simulations={row['simulations']}"] = {
+            'value': row['windows_per_sec'], 'unit': 'windows/sec'}
+    return metrics
+
+def save_baseline(metrics, path):
+    """Write benchmark results and the machine they ran on to a JSON baseline file"""
+    with open(path, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'metrics': metrics
+        }, f, indent=2, sort_keys=True)
+
+def compare_to_baseline(metrics, baseline, threshold=0.1):
+    """
+    Compare benchmark results against a baseline
+
+    Args:
+        metrics: Results of run_suite
+        baseline: Parsed baseline file (or its 'metrics' dict)
+        threshold: Relative slowdown above which a benchmark counts as a regression
+
+    Returns:
+        List of dicts (name, baseline, current, change, regression), one per benchmark
+        present in both; change is the relative change in throughput
+    """
+    baseline = baseline.get('metrics', baseline)
+    rows = []
+    for name, result in metrics.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]['value']
+        change = result['value'] / reference - 1
+        rows.append({
+            'name': name,
+            'baseline': reference,
+            'current': result['value'],
+            'change': change,
+            'regression': change < -threshold
+        })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the market simulation hot paths")
+    parser.add_argument('--save', metavar='PATH', help="write the results to a JSON baseline file")
+    parser.add_argument('--compare', metavar='PATH', help="compare the results with a JSON baseline file")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative slowdown flagged as a regression (default 0.1)")
+    parser.add_argument('--quick', action='store_true', help="run smaller benchmark sizes")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="rounds of the suite, best one reported per benchmark (default 5)")
+    args = parser.parse_args(argv)
+
+    metrics = run_suite(args.quick, args.repeat)
+    for name, result in metrics.items():
+        print(f"  {name:<48} {result['value']:>14,.1f} {result['unit']}")
+
+    if args.save:
+        save_baseline(metrics, args.save)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare_to_baseline(metrics, baseline, args.threshold)
+        regressions = [row for row in rows if row['regression']]
+        print(f"Compared with {args.compare} (threshold {args.threshold:.0%}):")
+        for row in rows:
+            flag = "REGRESSION" if row['regression'] else ""
+            print(f"  {row['name']:<48} {row['change']:>+8.1%} {flag}")
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Surrogate Calibration
+
+Calibrates market parameters against historical prices with a Gaussian-process
+surrogate of the simulation RMSE. Each round fits the surrogate to every evaluation so
+far, proposes a batch of points by expected improvement and simulates the batch (in a
+process pool if asked), until the expected improvement flattens out. The surrogate's
+noise term absorbs the randomness of single simulations, so no simulations are spent
+on finite-difference gradients of a noisy objective.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import warnings
+import numpy as np
+from scipy.stats import norm, qmc
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+from market_model import MarketSimulator, column_arrays
+import scoring
+
+CALIBRATION_BOUNDS = {
+    'trader_activity_rate': (0.1, 2.0),
+    'proportion_maker': (0.1, 0.9)
+}
+
+class CalibrationObjective:
+    """RMSE of one seeded simulation over a price window, picklable for worker processes"""
+
+    def __init__(self, data, num_traders=50, backend='dict', vectorized=False, seed=None, cache=None,
+                 depth_limits=None):
+        """
+        Args:
+            data: DataFrame (or dict of arrays / Bars) with 'open' and 'close' columns
+            num_traders: Number of traders in each simulated market
+            backend: Order book backend of each simulated market
+            vectorized: Simulate the traders as a TraderPopulation
+            seed: Root seed; evaluation i always uses the same streams for the same seed
+            cache: Optional result_cache.ResultCache memoizing the evaluations (each worker
+                process counts its own hits and misses)
+            depth_limits: Optional dict of OrderBook.set_depth_limits arguments for each
+                simulated market
+        """
+        self.open_prices, self.close_prices = column_arrays(data, 'open', 'close')
+        self.num_traders = num_traders
+        self.backend = backend
+        self.vectorized = vectorized
+        self.entropy = seed if seed is not None else np.random.SeedSequence().entropy
+        self.cache = cache
+        self.depth_limits = depth_limits
+
+    def __call__(self, task):
+        """
+        Args:
+            task: (evaluation index, parameter dict) tuple
+
+        Returns:
+            RMSE of the simulated prices against the close prices
+        """
+        index, params = task
+        key = None
+        if self.cache is not None:
+            key = self.cache.key((self.open_prices, self.close_prices), params, self.num_traders,
+                                 [self.entropy, [index]], backend=self.backend, vectorized=self.vectorized,
+                                 depth_limits=self.depth_limits)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached.tolist()[0]
+
+        simulator = MarketSimulator.create(self.num_traders, self.backend, self.vectorized,
+                                           np.random.SeedSequence(self.entropy, spawn_key=(index,)),
+                                           self.depth_limits)
+        predictions = simulator.simulate(self.open_prices, params)
+        rmse = scoring.rmse(self.close_prices, predictions)
+        if key is not None:
+            self.cache.put(key, [rmse, 1.0])
+        return rmse
+
+def expected_improvement(mean, std, best, xi=0.0):
+    """Expected improvement below best of Gaussian predictions (mean, std)"""
+    std = np.maximum(std, 1e-12)
+    improvement = best - mean - xi
+    z = improvement / std
+    return improvement * norm.cdf(z) + std * norm.pdf(z)
+
+def _spread(values):
+    spread = np.std(values)
+    return spread if spread > 0 else 1.0
+
+def _standardize(values):
+    return (values - values.mean()) / _spread(values)
+
+def _fit_surrogate(points, targets, kernel=None):
+    """Gaussian process on standardized targets; the WhiteKernel term models simulation noise"""
+    if kernel is not None:
+        # Batch fantasies reuse the fitted hyperparameters
+        return GaussianProcessRegressor(kernel, optimizer=None).fit(points, targets)
+
+    kernel = (ConstantKernel(1.0, (1e-3, 1e3)) * Matern(length_scale=[0.3] * points.shape[1],
+                                                         length_scale_bounds=(1e-2, 1e2), nu=2.5)
+              + WhiteKernel(0.1, (1e-6, 1e1)))
+    with warnings.catch_warnings():
+        # Flat or noise-free stretches of the objective push hyperparameters to their bounds
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        return GaussianProcessRegressor(kernel, n_restarts_optimizer=2, random_state=0).fit(points, targets)
+
+def _latent_prediction(model, points):
+    """Surrogate mean and the standard deviation of the underlying function, without the noise"""
+    mean, std = model.predict(points, return_std=True)
+    return mean, np.sqrt(np.maximum(std ** 2 - model.kernel_.k2.noise_level, 0.0))
+
+def calibrate(objective, bounds=None, initial_points=8, batch_size=4, max_evaluations=40,
+              ei_tolerance=0.05, patience=2, workers=None, seed=None, pool_size=2048):
+    """
+    Minimize a noisy objective over a box with a Gaussian-process surrogate
+
+    Args:
+        objective: Callable objective((index, params)) -> value, picklable if workers > 1
+        bounds: Dict of parameter name -> (low, high) (default CALIBRATION_BOUNDS)
+        initial_points: Size of the initial Latin hypercube design
+        batch_size: Points proposed (and evaluated together) per round
+        max_evaluations: Evaluation budget
+        ei_tolerance: Stop once the best expected improvement of a round (of the
+            noise-free surrogate, in standard deviations of the values seen) stays below this
+        patience: Number of consecutive flat rounds before stopping
+        workers: If set above 1, evaluate each batch in a pool of this many processes
+        seed: Seed of the design and proposals
+        pool_size: Number of random points the acquisition is maximized over
+
+    Returns:
+        Dict with the best 'params' (lowest surrogate mean among the evaluated points),
+        its observed 'value' and 'predicted' surrogate mean, the number of 'evaluations'
+        and the 'log' of every evaluation
+    """
+    bounds = dict(CALIBRATION_BOUNDS if bounds is None else bounds)
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    rng = np.random.default_rng(seed)
+
+    def to_params(unit_point):
+        return {name: value for name, value in zip(names, (low + unit_point * (high - low)).tolist())}
+
+    log = []
+    points = np.empty((0, len(names)))
+    values = np.empty(0)
+
+    executor = None
+    if workers is not None and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        def evaluate(batch, round_index, improvements):
+            nonlocal points, values
+            tasks = [(len(values) + i, to_params(point)) for i, point in enumerate(batch)]
+            results = list(executor.map(objective, tasks)) if executor is not None else list(map(objective, tasks))
+            for (index, params), value, improvement in zip(tasks, results, improvements):
+                log.append({'evaluation': index, 'round': round_index, **params,
+                            'value': value, 'expected_improvement': improvement})
+            points = np.vstack([points, batch])
+            values = np.append(values, results)
+
+        design = qmc.LatinHypercube(d=len(names), seed=rng).random(min(initial_points, max_evaluations))
+        evaluate(design, 0, [np.nan] * len(design))
+
+        round_index = 0
+        flat_rounds = 0
+        while len(values) < max_evaluations and flat_rounds < patience:
+            round_index += 1
+            targets = _standardize(values)
+            surrogate = _fit_surrogate(points, targets)
+            # Noisy observations make the lowest value optimistic; improve on the surrogate's best
+            incumbent = surrogate.predict(points).min()
+            pool = rng.random((pool_size, len(names)))
+
+            # Constant liar: pretend each chosen point scored the incumbent, so the next
+            # pick in the batch goes elsewhere
+            batch, improvements = [], []
+            fantasy_points, fantasy_targets = points, targets
+            model = surrogate
+            for _ in range(min(batch_size, max_evaluations - len(values))):
+                mean, std = _latent_prediction(model, pool)
+                ei = expected_improvement(mean, std, incumbent)
+                choice = int(np.argmax(ei))
+                batch.append(pool[choice])
+                improvements.append(float(ei[choice]))
+                fantasy_points = np.vstack([fantasy_points, pool[choice]])
+                fantasy_targets = np.append(fantasy_targets, incumbent)
+                model = _fit_surrogate(fantasy_points, fantasy_targets, surrogate.kernel_)
+
+            flat_rounds = flat_rounds + 1 if improvements[0] < ei_tolerance else 0
+            evaluate(np.array(batch), round_index, improvements)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # The lowest single noisy value is optimistic; trust the surrogate's mean instead
+    targets = _standardize(values)
+    predicted = _fit_surrogate(points, targets).predict(points) * _spread(values) + values.mean()
+    best = int(np.argmin(predicted))
+    return {
+        'params': to_params(points[best]),
+        'value': values[best],
+        'predicted': predicted[best],
+        'evaluations': len(values),
+        'log': log
+    }
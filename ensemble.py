@@ -0,0 +1,193 @@
+"""
+Lockstep Ensemble Simulator
+
+Advances K independent markets, one per parameter set, bar by bar together. The
+per-market prices, moving averages, volumes and imbalance live in structure-of-arrays
+form, so order generation and the price update are single vectorized operations over
+all K markets; only order matching runs per market.
+"""
+
+import numpy as np
+from market_model import make_order_book, quote_orders
+
+MA_WINDOWS = np.array([5, 25, 50])
+
+class EnsembleSimulator:
+    """K markets with their own order books and parameters, simulated in one pass"""
+
+    def __init__(self, param_sets, num_traders=50, backend='dict', seed=None, history_size=100,
+                 common_random_numbers=False, depth_limits=None):
+        """
+        Args:
+            param_sets: List of K parameter dicts (as for MarketSimulator.run_simulation)
+            num_traders: Number of traders in each market
+            backend: Order book backend of every market
+            seed: Optional int or np.random.SeedSequence making the run reproducible
+            history_size: Length of each market's trade history ring
+            common_random_numbers: Feed every market the same trader and noise draws, so
+                differences between markets come from their parameters alone
+            depth_limits: Optional dict of OrderBook.set_depth_limits arguments, enforced
+                on every market's order book after each step as MarketSimulator.step does
+        """
+        self.param_sets = list(param_sets)
+        self.num_traders = num_traders
+        self.backend = backend
+        self.rng = np.random.default_rng(seed)
+        self.history_size = history_size
+        self.common_random_numbers = common_random_numbers
+        self.depth_limits = depth_limits
+
+        self.trader_activity_rate = np.array([p['trader_activity_rate'] for p in self.param_sets], dtype=float)
+        self.proportion_maker = np.array([p['proportion_maker'] for p in self.param_sets], dtype=float)
+        self.price_range_percent = np.array([p.get('price_range_percent', 0.01) for p in self.param_sets],
+                                            dtype=float)
+        self.reset()
+
+    def __len__(self):
+        return len(self.param_sets)
+
+    def reset(self):
+        """Start every market from a fresh order book"""
+        num_markets = len(self.param_sets)
+        self.order_books = [make_order_book(self.backend) for _ in range(num_markets)]
+        if self.depth_limits is not None:
+            for order_book in self.order_books:
+                order_book.set_depth_limits(**self.depth_limits)
+        self.price = np.zeros(num_markets)
+        self.last_traded_price = np.zeros(num_markets)
+        self.imbalance = np.zeros(num_markets)
+        self.total_buy_volume = np.zeros(num_markets)
+        self.total_sell_volume = np.zeros(num_markets)
+        self.best_bid = np.full(num_markets, -np.inf)
+        self.best_ask = np.full(num_markets, np.inf)
+        self.trade_history = np.zeros((num_markets, self.history_size))
+        self.trade_index = 0
+        self.trade_count = 0
+        self._ma_sums = np.zeros((num_markets, len(MA_WINDOWS)))
+        self.moving_averages = np.full((num_markets, len(MA_WINDOWS)), 3.0)
+
+    def load_snapshot(self, snapshot, price=None):
+        """
+        Start every market from the order book state captured in snapshot
+
+        Args:
+            snapshot: market_model.OrderBookSnapshot restored into every market's order book
+            price: Simulated price to start from (default: the snapshot's last traded price)
+        """
+        self.reset()
+        state = snapshot.state
+        for order_book in self.order_books:
+            order_book.load_snapshot(snapshot)
+        if price is None:
+            price = state['last_traded_price']
+        self.price[:] = price
+        self.last_traded_price[:] = price
+        self.imbalance[:] = state['imbalance']
+        self.best_bid[:] = state['best_bid']
+        self.best_ask[:] = state['best_ask']
+        self.total_buy_volume[:] = state['total_buy_volume']
+        self.total_sell_volume[:] = state['total_sell_volume']
+
+        self.history_size = len(snapshot.trade_history)
+        self.trade_history = np.tile(snapshot.trade_history, (len(self.param_sets), 1))
+        self.trade_index = state['trade_index']
+        self.trade_count = state['trade_count']
+        self._ma_sums[:] = [state['_sum_5'], state['_sum_25'], state['_sum_50']]
+        self.moving_averages[:] = [state['ma_5'], state['ma_25'], state['ma_50']]
+
+    def run(self, open_price, num_bars):
+        """
+        Simulate num_bars time steps in every market from fresh order books
+
+        Args:
+            open_price: Opening price shared by all markets
+            num_bars: Number of time steps
+
+        Returns:
+            (K, num_bars) array of simulated prices
+        """
+        self.reset()
+        self.price[:] = open_price
+        self.last_traded_price[:] = open_price
+        predictions = np.empty((len(self.param_sets), num_bars))
+        for t in range(num_bars):
+            self.step()
+            predictions[:, t] = self.price
+        return predictions
+
+    def step(self):
+        """Advance every market by one time step"""
+        num_markets = len(self.param_sets)
+
+        # Orders for all K x num_traders traders in one batch
+        if self.common_random_numbers:
+            # One row of draws broadcast over the markets
+            draws = self.rng.random((4, 1, self.num_traders))
+        else:
+            draws = self.rng.random((3, num_markets, self.num_traders))
+        active = draws[0] < self.trader_activity_rate[:, None]
+        is_maker = draws[1] < self.proportion_maker[:, None]
+        prices, is_buy = quote_orders(self.last_traded_price[:, None], draws[2], is_maker,
+                                      self.price_range_percent[:, None])
+        if self.common_random_numbers:
+            # Same uniform draw mapped onto each market's quantity range
+            quantities = 1 + (draws[3] * np.where(is_maker, 40, 20)).astype(np.int64)
+        else:
+            quantities = self.rng.integers(1, np.where(is_maker, 41, 21))
+
+        # Matching is the only per-market work
+        has_both_sides = np.zeros(num_markets, dtype=bool)
+        for k, order_book in enumerate(self.order_books):
+            order_book.last_traded_price = self.last_traded_price[k].item()
+            mask = active[k]
+            order_book.place_orders(prices[k, mask], quantities[k, mask], is_buy[k, mask])
+            has_both_sides[k] = len(order_book.buy_book) > 0 and len(order_book.sell_book) > 0
+            self.imbalance[k] = order_book.imbalance
+            self.best_bid[k] = order_book.best_bid
+            self.best_ask[k] = order_book.best_ask
+            self.total_buy_volume[k] = order_book.total_buy_volume
+            self.total_sell_volume[k] = order_book.total_sell_volume
+
+        # Same price update as MarketSimulator.step, for all markets at once
+        price = self.price
+        noise = self.rng.standard_normal(1 if self.common_random_numbers else num_markets)
+        target = np.where(self.imbalance > 0, self.best_bid, self.best_ask)
+        target = np.where(has_both_sides, target, price)
+        moved = price + (target - price) * 0.1 + noise * 0.01 * price
+        moved = np.minimum(np.maximum(moved, 0.95 * price), 1.05 * price)
+        self.price = np.where(has_both_sides, moved, price + noise * 0.005 * price)
+
+        traded = np.trunc(self.price)
+        self._record_trades(traded)
+        self.last_traded_price = traded
+        if self.depth_limits is not None:
+            self._enforce_depth()
+
+    def _enforce_depth(self):
+        """Apply the depth limits to every market's book around its new last traded price"""
+        for k, order_book in enumerate(self.order_books):
+            order_book.last_traded_price = self.last_traded_price[k].item()
+            order_book.enforce_depth()
+            self.imbalance[k] = order_book.imbalance
+            self.best_bid[k] = order_book.best_bid
+            self.best_ask[k] = order_book.best_ask
+            self.total_buy_volume[k] = order_book.total_buy_volume
+            self.total_sell_volume[k] = order_book.total_sell_volume
+
+    def _record_trades(self, prices):
+        """Vectorized OrderBook.record_trade over all markets"""
+        size = self.history_size
+        index = self.trade_index
+        replaced = self.trade_history[:, index].copy()
+        self.trade_history[:, index] = prices
+        self._ma_sums += self.trade_history[:, (index + MA_WINDOWS) % size] - replaced[:, None]
+
+        self.trade_index = (index + 1) % size
+        self.trade_count = min(self.trade_count + 1, size)
+        if self.trade_index == 0:
+            # Resync once per lap so float rounding cannot accumulate
+            cumulative = np.cumsum(self.trade_history, axis=1)
+            self._ma_sums = cumulative[:, MA_WINDOWS - 1]
+
+        ready = self.trade_count >= MA_WINDOWS
+        self.moving_averages[:, ready] = self._ma_sums[:, ready] / MA_WINDOWS[ready]
@@ -5,10 +5,9 @@ Market Analysis and Visualization
 """
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import mean_squared_error
+import scoring
 
 def analyze_data(df):
     """Perform initial data analysis"""
@@ -55,9 +54,8 @@ def analyze_data(df):
     return results
 
 def evaluate_predictions(actual, predicted):
-    """Evaluate prediction accuracy"""
-    rmse = np.sqrt(mean_squared_error(actual, predicted))
-    return rmse
+    """Evaluate prediction accuracy (RMSE; see scoring.score_block for more metrics)"""
+    return scoring.rmse(actual, predicted)
 
 def plot_simulation_results(actual, predicted):
     """Plot simulation results"""
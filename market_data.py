@@ -0,0 +1,174 @@
+"""
+Market Data Access
+
+Converts headerless timestamp/OHLCV minute-bar CSV files into a columnar binary cache
+(one .npy file per column) the first time they are loaded. Later loads memory-map the
+cache instead of re-parsing the CSV, so startup is near-instant and worker processes
+given the Bars share the operating system's page cache instead of each holding a
+private copy.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+CACHE_VERSION = 1
+
+class Bars:
+    """
+    Memory-mapped columnar minute bars
+
+    Columns are read-only arrays: timestamp (int64 nanoseconds since the epoch),
+    open/high/low/close (float64) and volume (int64). A Bars object pickles as its
+    cache path, so sending it to a worker process reopens the same files there.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._open()
+
+    def _open(self):
+        for column in COLUMNS:
+            setattr(self, column, np.load(os.path.join(self.cache_path, column + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.close)
+
+    def __getstate__(self):
+        return {'cache_path': self.cache_path}
+
+    def __setstate__(self, state):
+        self.cache_path = state['cache_path']
+        self._open()
+
+    def to_dataframe(self):
+        """DataFrame with the same columns and dtypes as parsing the CSV with pandas"""
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(np.asarray(self.timestamp), unit='ns'),
+            'open': np.asarray(self.open),
+            'high': np.asarray(self.high),
+            'low': np.asarray(self.low),
+            'close': np.asarray(self.close),
+            'volume': np.asarray(self.volume)
+        })
+
+def file_hash(filepath, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path_for(filepath, cache_dir=None):
+    """Cache directory of a CSV file (by default .market_cache next to the file)"""
+    source = os.path.abspath(filepath)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source), '.market_cache')
+    stem = os.path.splitext(os.path.basename(source))[0]
+    key = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{key}")
+
+def _read_meta(cache_path):
+    try:
+        with open(os.path.join(cache_path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_meta(cache_path, meta):
+    temp_path = os.path.join(cache_path, f"meta.json.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temp_path, os.path.join(cache_path, 'meta.json'))
+
+def _cache_is_valid(filepath, cache_path):
+    """
+    Check a cache against its source file
+
+    Size and mtime are compared first; the content hash is only computed when the mtime
+    changed, and a matching hash refreshes the stored mtime.
+    """
+    meta = _read_meta(cache_path)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    stat = os.stat(filepath)
+    if meta['size'] != stat.st_size:
+        return False
+    if meta['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if file_hash(filepath) != meta['sha256']:
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(cache_path, meta)
+    return True
+
+def build_cache(filepath, cache_dir=None):
+    """
+    Parse a CSV file and write its columnar cache
+
+    Returns:
+        Path of the cache directory
+    """
+    cache_path = cache_path_for(filepath, cache_dir)
+    os.makedirs(cache_path, exist_ok=True)
+    stat = os.stat(filepath)
+
+    df = pd.read_csv(filepath, header=None, names=list(COLUMNS), parse_dates=['timestamp'])
+    columns = {
+        'timestamp': df['timestamp'].values.astype('datetime64[ns]').view(np.int64),
+        'open': df['open'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'volume': df['volume'].to_numpy(dtype=np.int64)
+    }
+
+    # Drop the metadata first so a reader never pairs it with half-written columns
+    try:
+        os.remove(os.path.join(cache_path, 'meta.json'))
+    except FileNotFoundError:
+        pass
+    for column, values in columns.items():
+        temp_path = os.path.join(cache_path, f"{column}.{os.getpid()}.tmp.npy")
+        np.save(temp_path, values)
+        os.replace(temp_path, os.path.join(cache_path, column + '.npy'))
+
+    _write_meta(cache_path, {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(filepath),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_hash(filepath),
+        'rows': len(df)
+    })
+    return cache_path
+
+def load_bars(filepath, cache_dir=None):
+    """
+    Load minute bars through the columnar cache, building or rebuilding it if needed
+
+    Args:
+        filepath: Headerless timestamp,open,high,low,close,volume CSV file
+        cache_dir: Directory for cache files (default: .market_cache next to the file)
+
+    Returns:
+        Memory-mapped Bars
+    """
+    cache_path = cache_path_for(filepath, cache_dir)
+    if not _cache_is_valid(filepath, cache_path):
+        build_cache(filepath, cache_dir)
+    return Bars(cache_path)
+
+def load_data(filepath, cache_dir=None):
+    """
+    Load AAPL trading data from CSV (through the columnar cache) as a DataFrame
+
+    The DataFrame is a private in-memory copy of the columns, and a sweep given a
+    DataFrame sends its arrays to every worker process by pickling them. Only Bars from
+    load_bars are shared zero-copy: workers reopen the memory map from its cache path.
+    """
+    return load_bars(filepath, cache_dir).to_dataframe()
@@ -4,21 +4,78 @@
 Market Simulation Models
 """
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import importlib
+import time
 import numpy as np
 from scipy.optimize import minimize
+from sortedcontainers import SortedDict
+import scoring
+
+class OrderBookSnapshot:
+    """
+    Immutable copy of an order book's state, created by OrderBook.get_snapshot
+
+    Price levels and the trade history are stored as read-only NumPy arrays, so one
+    snapshot can be restored into any number of books (of either backend) without
+    being copied itself.
+    """
+
+    __slots__ = ('buy_prices', 'buy_quantities', 'sell_prices', 'sell_quantities', 'trade_history', 'state')
+
+    def __init__(self, buy_prices, buy_quantities, sell_prices, sell_quantities, trade_history, state):
+        for array in (buy_prices, buy_quantities, sell_prices, sell_quantities, trade_history):
+            array.flags.writeable = False
+        self.buy_prices = buy_prices
+        self.buy_quantities = buy_quantities
+        self.sell_prices = sell_prices
+        self.sell_quantities = sell_quantities
+        self.trade_history = trade_history
+        self.state = state
+
+    def fork(self, count, book_class=None):
+        """Create count independent order books starting from this state"""
+        book_class = book_class or OrderBook
+        return [book_class.from_snapshot(self) for _ in range(count)]
 
 class OrderBook:
     """Order book to manage buy and sell orders"""
 
+    # Name of this implementation for make_order_book
+    backend = 'dict'
+
+    # Scalar attributes captured by get_snapshot alongside the price levels and trade history
+    SNAPSHOT_FIELDS = ('last_traded_price', 'best_ask', 'best_bid', 'trade_index', 'trade_count',
+                       'total_buy_volume', 'total_sell_volume', 'ma_5', 'ma_25', 'ma_50', 'imbalance',
+                       'trader_activity_rate', 'proportion_maker', 'price_range_percent',
+                       '_sum_5', '_sum_25', '_sum_50')
+
+    # Shortest run of resting orders that place_orders adds as aggregated level updates
+    AGGREGATE_MIN_RUN = 16
+
+    # profiling.SimulationProfile counting orders and takes, attached by
+    # MarketSimulator.enable_profiling; None disables the counting
+    profile = None
+
+    # trade_tape.TradeTape recording every fill, attached by MarketSimulator.enable_trade_tape
+    tape = None
+
     def __init__(self):
-        self.buy_book = {}
-        self.sell_book = {}
+        # Price levels are kept sorted (like the SortedDictionary in the C# OrderBookReal)
+        # so the best bid/ask is always at one end instead of a min()/max() key scan
+        self.buy_book = SortedDict()
+        self.sell_book = SortedDict()
         self.last_traded_price = 0
         self.best_ask = np.inf
         self.best_bid = -np.inf
-        self.trade_history = [0] * 100  # Fixed size history like in C#
+        self.trade_history = np.zeros(100)  # Fixed size history like in C#
         self.trade_index = 0
         self.trade_count = 0
+        # Running sums of the MA windows over trade_history, kept in step with trade_index
+        self._sum_5 = 0.0
+        self._sum_25 = 0.0
+        self._sum_50 = 0.0
         self.total_buy_volume = 0
         self.total_sell_volume = 0
         self.ma_5 = 3
@@ -28,11 +85,219 @@ class OrderBook:
         self.trader_activity_rate = 1.0
         self.proportion_maker = 0.5
         self.price_range_percent = 0.01  # Default: 1% range (0.01 * 100%)
+        # Depth control, off until set_depth_limits; depth_step counts enforce_depth calls
+        self.max_levels = None
+        self.max_distance = None
+        self.order_ttl = None
+        self.depth_limited = False
+        self.depth_step = 0
+        self.eviction_stats = {'evicted_levels': 0, 'evicted_quantity': 0,
+                               'expired_levels': 0, 'expired_quantity': 0}
+        # With a TTL: (step, is_buy, price, cumulative quantity added at the price) per
+        # resting order in arrival order, and the cumulative quantity added per price
+        self._arrivals = None
+        self._added = None
+
+    def set_depth_limits(self, max_levels=None, max_distance=None, ttl=None):
+        """
+        Bound the resting depth; enforce_depth applies the limits after every step
+
+        Args:
+            max_levels: Most price levels kept per side, nearest the touch first
+            max_distance: Fraction of the last traded price beyond which levels are
+                evicted (e.g. 0.05 drops bids below 95% and asks above 105% of it)
+            ttl: Number of steps a resting order lives; fills consume the oldest
+                quantity of a level first. Orders resting when the TTL is set count
+                as placed in the current step.
+        """
+        for name, value in (('max_levels', max_levels), ('max_distance', max_distance), ('ttl', ttl)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value}")
+        self.max_levels = max_levels
+        self.max_distance = max_distance
+        self.order_ttl = ttl
+        self.depth_limited = max_levels is not None or max_distance is not None or ttl is not None
+        self._reset_arrivals()
+
+    def depth_limits(self):
+        """The set_depth_limits arguments in effect"""
+        return {'max_levels': self.max_levels, 'max_distance': self.max_distance, 'ttl': self.order_ttl}
+
+    def _reset_arrivals(self):
+        """Restart TTL tracking with every resting level as placed in the current step"""
+        if self.order_ttl is None:
+            self._arrivals = None
+            self._added = None
+            return
+        self._arrivals = deque()
+        self._added = {True: {}, False: {}}
+        for is_buy in (True, False):
+            prices, quantities = self._level_arrays(is_buy)
+            for price, quantity in zip(prices.tolist(), quantities.tolist()):
+                self._record_arrival(price, quantity, is_buy)
+
+    def _record_arrival(self, price, quantity, is_buy):
+        """Note quantity resting at price in the current step for TTL expiry"""
+        added = self._added[is_buy]
+        cumulative = added.get(price, 0) + quantity
+        added[price] = cumulative
+        self._arrivals.append((self.depth_step, is_buy, price, cumulative))
+
+    def enforce_depth(self):
+        """
+        Expire orders past their TTL, then evict levels beyond max_distance from the last
+        traded price and past max_levels per side, keeping volumes, best prices and the
+        imbalance consistent. Counts go to eviction_stats.
+
+        Returns:
+            (levels, quantity) removed in this call
+        """
+        removed = {True: 0, False: 0}
+        levels_removed = 0
+
+        if self._arrivals is not None:
+            # Orders placed in step s rest through step s + ttl - 1
+            levels, removed[True], removed[False] = self._expire_orders(self.depth_step - self.order_ttl + 1)
+            levels_removed += levels
+            self.eviction_stats['expired_levels'] += levels
+            self.eviction_stats['expired_quantity'] += removed[True] + removed[False]
+
+        if self.max_levels is not None or self.max_distance is not None:
+            reference = self.last_traded_price
+            for is_buy in (True, False):
+                bound = None
+                if self.max_distance is not None and reference > 0:
+                    bound = reference * (1 - self.max_distance if is_buy else 1 + self.max_distance)
+                levels, quantity = self._evict_levels(is_buy, self.max_levels, bound)
+                if levels:
+                    removed[is_buy] += quantity
+                    levels_removed += levels
+                    self.eviction_stats['evicted_levels'] += levels
+                    self.eviction_stats['evicted_quantity'] += quantity
+
+        self.depth_step += 1
+        if removed[True] or removed[False]:
+            self._account_removal(removed[True], removed[False])
+        return levels_removed, removed[True] + removed[False]
+
+    def _expire_orders(self, last_expiring):
+        """
+        Remove what is left of the orders placed up to step last_expiring
+
+        Returns:
+            (levels emptied, buy quantity removed, sell quantity removed)
+        """
+        removed = {True: 0, False: 0}
+        levels = 0
+        arrivals = self._arrivals
+        while arrivals and arrivals[0][0] <= last_expiring:
+            _, is_buy, price, cumulative = arrivals.popleft()
+            added = self._added[is_buy]
+            resting = (self.buy_book if is_buy else self.sell_book).get(price, 0)
+            # Fills take a level's oldest quantity first, so what is left of this
+            # arrival is whatever rests beyond the quantity that arrived after it
+            expired = resting - (added[price] - cumulative)
+            if expired > 0:
+                self._remove_quantity(price, expired, is_buy)
+                removed[is_buy] += expired
+                if expired == resting:
+                    levels += 1
+            if cumulative == added[price]:
+                del added[price]
+        return levels, removed[True], removed[False]
+
+    def _account_removal(self, buy_quantity, sell_quantity):
+        """Take resting quantity removed without trading off the volumes, best prices and imbalance"""
+        self.total_buy_volume -= buy_quantity
+        self.total_sell_volume -= sell_quantity
+        self._refresh_best_prices()
+        total_volume = self.total_buy_volume + self.total_sell_volume
+        if total_volume > 0:
+            self.imbalance = (self.total_buy_volume - self.total_sell_volume) / total_volume
+        else:
+            self.imbalance = 0
+
+    def _remove_quantity(self, price, quantity, is_buy):
+        """Take quantity off a resting level, deleting the level when it empties"""
+        book = self.buy_book if is_buy else self.sell_book
+        remaining = book[price] - quantity
+        if remaining > 0:
+            book[price] = remaining
+        else:
+            del book[price]
+
+    def _evict_levels(self, is_buy, max_levels, bound):
+        """
+        Remove one side's levels priced beyond bound or past the max_levels nearest the touch
+
+        Returns:
+            (number of levels, quantity) removed
+        """
+        book = self.buy_book if is_buy else self.sell_book
+        far_end = 0 if is_buy else -1
+        levels = 0
+        quantity = 0
+        while len(book) > 0:
+            price, level_quantity = book.peekitem(far_end)
+            beyond = bound is not None and (price < bound if is_buy else price > bound)
+            if not beyond and (max_levels is None or len(book) <= max_levels):
+                break
+            book.popitem(far_end)
+            levels += 1
+            quantity += level_quantity
+        return levels, quantity
+
+    def _refresh_best_prices(self):
+        """Recompute the best bid and ask from the books"""
+        self.best_bid = self.buy_book.peekitem(-1)[0] if len(self.buy_book) > 0 else -np.inf
+        self.best_ask = self.sell_book.peekitem(0)[0] if len(self.sell_book) > 0 else np.inf
+
+    def get_snapshot(self):
+        """Capture the books, trade history, moving averages, volumes and imbalance"""
+        buy_prices, buy_quantities = self._level_arrays(True)
+        sell_prices, sell_quantities = self._level_arrays(False)
+        return OrderBookSnapshot(buy_prices, buy_quantities, sell_prices, sell_quantities,
+                                 self.trade_history.copy(),
+                                 {field: getattr(self, field) for field in self.SNAPSHOT_FIELDS})
+
+    def load_snapshot(self, snapshot):
+        """Restore this order book in place to the state captured in snapshot"""
+        self._load_levels(snapshot.buy_prices, snapshot.buy_quantities,
+                          snapshot.sell_prices, snapshot.sell_quantities)
+        if len(self.trade_history) == len(snapshot.trade_history):
+            np.copyto(self.trade_history, snapshot.trade_history)
+        else:
+            self.trade_history = snapshot.trade_history.copy()
+        for field, value in snapshot.state.items():
+            setattr(self, field, value)
+        if self._arrivals is not None:
+            self._reset_arrivals()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create a new order book in the state captured in snapshot"""
+        order_book = cls()
+        order_book.load_snapshot(snapshot)
+        return order_book
+
+    def _level_arrays(self, is_buy):
+        """(prices, quantities) arrays of one side's levels in ascending price order"""
+        book = self.buy_book if is_buy else self.sell_book
+        return np.array(list(book.keys())), np.array(list(book.values()))
+
+    def _load_levels(self, buy_prices, buy_quantities, sell_prices, sell_quantities):
+        """Replace both sides' levels with the given (ascending) level arrays"""
+        self.buy_book.clear()
+        self.buy_book.update(zip(buy_prices.tolist(), buy_quantities.tolist()))
+        self.sell_book.clear()
+        self.sell_book.update(zip(sell_prices.tolist(), sell_quantities.tolist()))
 
     def place_order(self, price, quantity, is_buy):
         """Place an order in the order book"""
         if price <= 0 or quantity <= 0:
             return
+        if self.profile is not None:
+            self.profile.orders_placed += 1
 
         if is_buy:  # Buy order
             if len(self.sell_book) > 0 and price > self.best_ask:
@@ -46,22 +311,34 @@ class OrderBook:
                 self.make_order(price, quantity, is_buy)
 
     def take_order(self, price, quantity, is_buy):
-        """Execute a market order by taking existing orders"""
+        """
+        Execute a market order by taking existing orders
+
+        Returns:
+            (filled quantity, filled notional) of the fills against resting orders
+        """
+        profile = self.profile
+        if profile is not None:
+            started = time.perf_counter()
+        tape = self.tape
         remaining_quantity = quantity
         last_traded_price = self.last_traded_price
+        filled_notional = 0
+        levels_walked = 0
 
         while remaining_quantity > 0:
             if is_buy:  # Buy order taking from sell book
                 if len(self.sell_book) == 0:
                     self.best_ask = np.inf
                     break
-                self.best_ask = min(self.sell_book.keys())
+                self.best_ask = self.sell_book.peekitem(0)[0]
 
                 if price < self.best_ask:
                     break
 
                 ask_quantity = self.sell_book[self.best_ask]
                 if ask_quantity > 0:
+                    levels_walked += 1
                     trade_quantity = min(ask_quantity, remaining_quantity)
                     self.sell_book[self.best_ask] -= trade_quantity
                     remaining_quantity -= trade_quantity
@@ -70,30 +347,37 @@ class OrderBook:
                     self.total_sell_volume -= trade_quantity  # Sell volume decreases
 
                     last_traded_price = self.best_ask
+                    filled_notional += trade_quantity * self.best_ask
+                    if tape is not None:
+                        tape.append(self.best_ask, trade_quantity, True)
 
                     if self.sell_book[self.best_ask] <= 0:
                         del self.sell_book[self.best_ask]
-                        self.best_ask = min(self.sell_book.keys()) if len(self.sell_book) > 0 else np.inf
+                        self.best_ask = self.sell_book.peekitem(0)[0] if len(self.sell_book) > 0 else np.inf
             else:  # Sell order taking from buy book
                 if len(self.buy_book) == 0:
                     self.best_bid = -np.inf
                     break
-                self.best_bid = max(self.buy_book.keys())
+                self.best_bid = self.buy_book.peekitem(-1)[0]
 
                 if price < self.best_bid:
                     break
 
                 bid_quantity = self.buy_book[self.best_bid]
                 if bid_quantity > 0:
+                    levels_walked += 1
                     trade_quantity = min(bid_quantity, remaining_quantity)
                     self.buy_book[self.best_bid] -= trade_quantity
                     remaining_quantity -= trade_quantity
                     self.total_sell_volume -= trade_quantity  # Sell volume decreases
                     last_traded_price = self.best_bid
+                    filled_notional += trade_quantity * self.best_bid
+                    if tape is not None:
+                        tape.append(self.best_bid, trade_quantity, False)
 
                     if self.buy_book[self.best_bid] <= 0:
                         del self.buy_book[self.best_bid]
-                        self.best_bid = max(self.buy_book.keys()) if len(self.buy_book) > 0 else -np.inf
+                        self.best_bid = self.buy_book.peekitem(-1)[0] if len(self.buy_book) > 0 else -np.inf
 
         self.last_traded_price = last_traded_price
 
@@ -102,12 +386,12 @@ class OrderBook:
             if len(self.sell_book) == 0:
                 self.best_ask = np.inf
             else:
-                self.best_ask = min(self.sell_book.keys())
+                self.best_ask = self.sell_book.peekitem(0)[0]
         else:  # Sell order taking from buy book
             if len(self.buy_book) == 0:
                 self.best_bid = -np.inf
             else:
-                self.best_bid = max(self.buy_book.keys())
+                self.best_bid = self.buy_book.peekitem(-1)[0]
 
         # Calculate imbalance
         total_volume = self.total_buy_volume + self.total_sell_volume
@@ -116,8 +400,116 @@ class OrderBook:
         else:
             self.imbalance = 0
 
+        filled_quantity = quantity - remaining_quantity
         if remaining_quantity > 0:
             self.make_order(price, remaining_quantity, is_buy)
+        if profile is not None:
+            profile.record_take(levels_walked, time.perf_counter() - started)
+        return filled_quantity, filled_notional
+
+    def place_orders(self, prices, quantities, is_buy):
+        """
+        Place a batch of orders in arrival order
+
+        The result is identical to calling place_order for each order in turn. Long runs
+        of orders that only rest are added to the book as aggregated level updates; only
+        orders that cross the book go through take_order one at a time.
+
+        Args:
+            prices: Array of order prices
+            quantities: Array of order quantities
+            is_buy: Boolean array, True for buy orders
+
+        Returns:
+            Dict with the number of valid 'orders', how many 'crossed' the book, the traded
+            'volume' and 'notional', and the 'vwap' of the fills (nan without fills)
+        """
+        prices = np.asarray(prices)
+        quantities = np.asarray(quantities)
+        is_buy = np.asarray(is_buy, dtype=bool)
+        valid = (prices > 0) & (quantities > 0)
+        if not valid.all():
+            prices, quantities, is_buy = prices[valid], quantities[valid], is_buy[valid]
+
+        num_orders = len(prices)
+        price_list, quantity_list, buy_list = prices.tolist(), quantities.tolist(), is_buy.tolist()
+        make_order = self.make_order
+
+        def rest(run_start, run_stop):
+            if run_stop - run_start >= self.AGGREGATE_MIN_RUN:
+                self._rest_aggregated(prices[run_start:run_stop], quantities[run_start:run_stop],
+                                      is_buy[run_start:run_stop])
+            else:
+                for index in range(run_start, run_stop):
+                    make_order(price_list[index], quantity_list[index], buy_list[index])
+
+        crossed = 0
+        volume = 0
+        notional = 0
+        run_start = 0
+        best_bid, best_ask = self.best_bid, self.best_ask
+        has_bids, has_asks = len(self.buy_book) > 0, len(self.sell_book) > 0
+        for index in range(num_orders):
+            price = price_list[index]
+            # Track the best prices as if every order since the last take had rested
+            if buy_list[index]:
+                if not (has_asks and price > best_ask):
+                    has_bids = True
+                    if price > best_bid:
+                        best_bid = price
+                    continue
+            elif not (has_bids and price < best_bid):
+                has_asks = True
+                if price < best_ask:
+                    best_ask = price
+                continue
+
+            if index > run_start:
+                rest(run_start, index)
+            filled_quantity, filled_notional = self.take_order(price, quantity_list[index], buy_list[index])
+            crossed += 1
+            volume += filled_quantity
+            notional += filled_notional
+            run_start = index + 1
+            best_bid, best_ask = self.best_bid, self.best_ask
+            has_bids, has_asks = len(self.buy_book) > 0, len(self.sell_book) > 0
+
+        rest(run_start, num_orders)
+        if self.profile is not None:
+            self.profile.orders_placed += num_orders
+
+        return {
+            'orders': num_orders,
+            'crossed': crossed,
+            'volume': volume,
+            'notional': notional,
+            'vwap': notional / volume if volume > 0 else np.nan
+        }
+
+    def _rest_aggregated(self, prices, quantities, is_buy):
+        """Add non-crossing orders to the book as one aggregated update per price level"""
+        for side_is_buy in (True, False):
+            mask = is_buy if side_is_buy else ~is_buy
+            if not mask.any():
+                continue
+            levels, inverse = np.unique(prices[mask], return_inverse=True)
+            level_quantities = np.zeros(len(levels), dtype=quantities.dtype)
+            np.add.at(level_quantities, inverse, quantities[mask])
+
+            book = self.buy_book if side_is_buy else self.sell_book
+            book.update({price: book.get(price, 0) + quantity
+                         for price, quantity in zip(levels.tolist(), level_quantities.tolist())})
+            if self._arrivals is not None:
+                for price, quantity in zip(levels.tolist(), level_quantities.tolist()):
+                    self._record_arrival(price, quantity, side_is_buy)
+            if side_is_buy:
+                self.total_buy_volume += level_quantities.sum().item()
+                if levels[-1] > self.best_bid:
+                    self.best_bid = levels[-1].item()
+            else:
+                self.total_sell_volume += level_quantities.sum().item()
+                if levels[0] < self.best_ask:
+                    self.best_ask = levels[0].item()
 
     def make_order(self, price, quantity, is_buy):
         """Add a limit order to the order book"""
@@ -137,42 +529,59 @@ class OrderBook:
             self.total_sell_volume += quantity
             if price < self.best_ask:
                 self.best_ask = price
+        if self._arrivals is not None:
+            self._record_arrival(price, quantity, is_buy)
 
     def record_trade(self, price):
         """Record a trade in the history"""
-        self.trade_history[self.trade_index] = price
-        self.trade_index = (self.trade_index + 1) % len(self.trade_history)
-        self.trade_count = min(self.trade_count + 1, len(self.trade_history))
+        history = self.trade_history
+        size = len(history)
+        index = self.trade_index
+        replaced = history[index]
+        history[index] = price
+
+        # Each MA window starts at trade_index, so advancing it drops the replaced
+        # slot and picks up the slot just past the old window end
+        self._sum_5 += history[(index + 5) % size] - replaced
+        self._sum_25 += history[(index + 25) % size] - replaced
+        self._sum_50 += history[(index + 50) % size] - replaced
+
+        self.trade_index = (index + 1) % size
+        self.trade_count = min(self.trade_count + 1, size)
+        if self.trade_index == 0:
+            # Resync once per lap so float rounding cannot accumulate
+            self._sum_5 = history[:5].sum()
+            self._sum_25 = history[:25].sum()
+            self._sum_50 = history[:50].sum()
 
         # Update moving averages
         if self.trade_count >= 5:
-            self.ma_5 = self.compute_moving_average(5)
+            self.ma_5 = self._sum_5 / 5
         if self.trade_count >= 25:
-            self.ma_25 = self.compute_moving_average(25)
+            self.ma_25 = self._sum_25 / 25
         if self.trade_count >= 50:
-            self.ma_50 = self.compute_moving_average(50)
+            self.ma_50 = self._sum_50 / 50
 
     def compute_moving_average(self, window):
         """Compute moving average of trade history"""
         if self.trade_count < window:
             return np.mean(self.trade_history[:self.trade_count])
-        return np.mean(self.trade_history[self.trade_index:self.trade_index + window] if self.trade_index + window <= len(self.trade_history)
-                      else np.concatenate((self.trade_history[self.trade_index:], self.trade_history[:self.trade_index + window - len(self.trade_history)])))
+        end = self.trade_index + window
+        if end <= len(self.trade_history):
+            return np.mean(self.trade_history[self.trade_index:end])
+        wrapped = end - len(self.trade_history)
+        return (self.trade_history[self.trade_index:].sum() + self.trade_history[:wrapped].sum()) / window
 
     def get_chronological_trade_history(self):
-        """Get trade history in chronological order"""
-        chronological = [0] * len(self.trade_history)
-        oldest_count = len(self.trade_history) - self.trade_index
-        chronological[:oldest_count] = self.trade_history[self.trade_index:]
-        chronological[oldest_count:] = self.trade_history[:self.trade_index]
-        return chronological
+        """Get trade history in chronological order (oldest first) as a new array"""
+        return np.roll(self.trade_history, -self.trade_index)
 
 class Trader:
     """Trader that places orders based on market conditions"""
 
-    def __init__(self, order_book):
+    def __init__(self, order_book, rng=None):
         self.order_book = order_book
-        self.rng = np.random.RandomState()
+        self.rng = rng if rng is not None else np.random.RandomState()
 
     def try_place_orders(self):
         """Attempt to place orders with some probability"""
@@ -216,23 +625,292 @@ class Trader:
                 # Taker selling low (inefficient)
                 return {'price': rand_price, 'quantity': self.rng.randint(1, 21), 'is_buy': False}
 
+def quote_orders(last_price, price_draws, is_maker, price_range_percent):
+    """
+    Vectorized Trader.determine_price pricing rules
+
+    Args:
+        last_price: Last traded price (scalar, or array broadcasting against the draws)
+        price_draws: Uniform [0, 1) draws for the random price factor
+        is_maker: Boolean array, True for makers
+        price_range_percent: Width of the price range around last_price
+
+    Returns:
+        (integer prices, is_buy) arrays
+    """
+    rand_factor = 1.0 + (price_draws * price_range_percent - price_range_percent / 2)
+    prices = np.trunc(last_price * rand_factor + 0.5 * np.sign(rand_factor - 1)).astype(np.int64)
+
+    # Makers sell above the last price and buy at or below it; takers do the opposite
+    is_buy = (prices > last_price) != is_maker
+    return prices, is_buy
+
+class TraderPopulation:
+    """
+    Population of traders whose orders are generated together as arrays
+
+    Each step draws the activity mask, maker flags, price factors and quantities for
+    every trader in one batch and applies the same maker/taker pricing rules as
+    Trader.determine_price. All orders of a step are quoted off the last traded price
+    at the start of the step.
+    """
+
+    def __init__(self, order_book, num_traders, rng=None):
+        self.order_book = order_book
+        self.num_traders = num_traders
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def __len__(self):
+        return self.num_traders
+
+    def to_traders(self):
+        """Equivalent list of per-trader Trader objects on the same order book"""
+        return [Trader(self.order_book) for _ in range(self.num_traders)]
+
+    def spawn(self, order_book):
+        """
+        Create a population of the same size trading on another order book
+
+        Its generator is a child of ours, so a seeded population spawns reproducible ones.
+        """
+        child_seed = self.rng.bit_generator.seed_seq.spawn(1)[0]
+        return TraderPopulation(order_book, self.num_traders, rng=np.random.default_rng(child_seed))
+
+    def generate_orders(self):
+        """
+        Draw this step's orders for all active traders
+
+        Returns:
+            Dict of arrays 'price', 'quantity', 'is_buy' and 'is_maker', one entry per
+            active trader in trader order
+        """
+        order_book = self.order_book
+        draws = self.rng.random((3, self.num_traders))
+        active = draws[0] < order_book.trader_activity_rate
+        is_maker = draws[1, active] < order_book.proportion_maker
+        prices, is_buy = quote_orders(order_book.last_traded_price, draws[2, active], is_maker,
+                                      order_book.price_range_percent)
+        quantities = self.rng.integers(1, np.where(is_maker, 41, 21))
+
+        return {'price': prices, 'quantity': quantities, 'is_buy': is_buy, 'is_maker': is_maker}
+
+    def step(self):
+        """
+        Generate and place one time step of orders
+
+        Returns:
+            Fill statistics from OrderBook.place_orders
+        """
+        orders = self.generate_orders()
+        return self.order_book.place_orders(orders['price'], orders['quantity'], orders['is_buy'])
+
+# Module and class of each make_order_book backend
+ORDER_BOOK_BACKENDS = {
+    'dict': ('market_model', 'OrderBook'),
+    'ladder': ('price_ladder', 'PriceLadderOrderBook'),
+    'orders': ('order_queue', 'QueueOrderBook')
+}
+
+def make_order_book(backend='dict'):
+    """
+    Create an empty order book
+
+    Args:
+        backend: 'dict' for the sorted-dict OrderBook, 'ladder' for the
+            array-backed PriceLadderOrderBook or 'orders' for the order-level
+            QueueOrderBook
+
+    Returns:
+        A new order book instance
+    """
+    if backend == 'dict':
+        return OrderBook()
+    if backend not in ORDER_BOOK_BACKENDS:
+        raise ValueError(f"Unknown order book backend: {backend!r}")
+    module_name, class_name = ORDER_BOOK_BACKENDS[backend]
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def column_arrays(data, *names):
+    """
+    Plain float NumPy arrays of the named columns
+
+    Args:
+        data: DataFrame, dict of arrays, or an object with the columns as attributes
+            (such as market_data.Bars)
+        names: Column names
+
+    Returns:
+        Tuple of arrays, one per name (views where no conversion is needed)
+    """
+    if hasattr(data, 'columns'):
+        return tuple(data[name].to_numpy(dtype=np.float64) for name in names)
+    if isinstance(data, dict):
+        return tuple(np.asarray(data[name], dtype=np.float64) for name in names)
+    return tuple(np.asarray(getattr(data, name), dtype=np.float64) for name in names)
+
+def parameter_grid(num_simulations):
+    """Candidate parameter sets tested by run_multiple_simulations"""
+    activity_rates = np.linspace(0.2, 2.0, num_simulations)
+    maker_proportions = np.linspace(0.1, 0.9, num_simulations)
+    price_ranges = np.linspace(0.0001, 0.03, num_simulations)  # 0.01% to 3.00%
+    return [{
+        'trader_activity_rate': activity_rates[i],
+        'proportion_maker': maker_proportions[i],
+        'price_range_percent': price_ranges[i]
+    } for i in range(num_simulations)]
+
+class BacktestWindows:
+    """
+    Precomputed sliding optimization/prediction windows over column arrays
+
+    Window w optimizes on rows [starts[w] - window_size, starts[w]) and predicts rows
+    [starts[w], starts[w] + prediction_size). The window arrays are 2-D strided views
+    into the columns (one row per window), so no data is copied.
+    """
+
+    def __init__(self, open_prices, close_prices, window_size, prediction_size):
+        num_rows = len(close_prices)
+        self.window_size = window_size
+        self.prediction_size = prediction_size
+        self.starts = np.arange(window_size, num_rows - prediction_size + 1, prediction_size)
+        count = len(self.starts)
+        if count == 0:
+            self.optimization_open = self.optimization_close = np.empty((0, window_size))
+            self.prediction_open = self.prediction_close = np.empty((0, prediction_size))
+            return
+
+        window_view = np.lib.stride_tricks.sliding_window_view
+        self.optimization_open = window_view(open_prices, window_size)[::prediction_size][:count]
+        self.optimization_close = window_view(close_prices, window_size)[::prediction_size][:count]
+        self.prediction_open = window_view(open_prices[window_size:], prediction_size)[::prediction_size][:count]
+        self.prediction_close = window_view(close_prices[window_size:], prediction_size)[::prediction_size][:count]
+
+    def __len__(self):
+        return len(self.starts)
+
 class MarketSimulator:
     """Market simulator that runs the simulation and optimizes parameters"""
 
-    def __init__(self, order_book, traders):
+    def __init__(self, order_book, traders, rng=None):
         self.order_book = order_book
         self.traders = traders
+        # Source of the price noise; the global NumPy RNG unless a seeded one is given
+        self.rng = rng if rng is not None else np.random
         self.initial_params = {
             'trader_activity_rate': 1.0,
             'proportion_maker': 0.5
         }
+        # Simulations and simulated bars spent by the last run_multiple_simulations
+        self.sweep_stats = None
+        # Evaluations of the last optimize_parameters
+        self.calibration_log = []
+        # profiling.SimulationProfile of the steps, or None when profiling is off
+        self.profile = None
+        # Per-window profile dicts and their total from the last profiled sweep
+        self.window_profiles = []
+        self.profile_totals = None
+        # scoring.ErrorSurface of every grid candidate on every window of the last sweep
+        self.error_surface = None
+
+    @classmethod
+    def create(cls, num_traders=50, backend='dict', vectorized=False, seed=None, depth_limits=None):
+        """
+        Create a simulator with a fresh order book and num_traders traders
+
+        Args:
+            num_traders: Number of traders
+            backend: Order book backend passed to make_order_book
+            vectorized: Use a TraderPopulation instead of a list of Trader objects
+            seed: Optional int or np.random.SeedSequence making every RNG stream
+                (each trader and the price noise) reproducible
+            depth_limits: Optional dict of OrderBook.set_depth_limits arguments
+        """
+        order_book = make_order_book(backend)
+        if depth_limits is not None:
+            order_book.set_depth_limits(**depth_limits)
+        return cls._build(order_book, num_traders, vectorized, seed)
+
+    @classmethod
+    def _build(cls, order_book, num_traders, vectorized=False, seed=None):
+        """Create a simulator around order_book with new traders, seeded from seed if given"""
+        if seed is None:
+            if vectorized:
+                return cls(order_book, TraderPopulation(order_book, num_traders))
+            return cls(order_book, [Trader(order_book) for _ in range(num_traders)])
+
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        noise_seed, *trader_seeds = seed_sequence.spawn(num_traders + 1)
+        if vectorized:
+            traders = TraderPopulation(order_book, num_traders, rng=np.random.default_rng(trader_seeds[0]))
+        else:
+            traders = [Trader(order_book, rng=np.random.RandomState(np.random.MT19937(trader_seed)))
+                       for trader_seed in trader_seeds]
+        return cls(order_book, traders, rng=np.random.default_rng(noise_seed))
+
+    def _spawn_traders(self, order_book):
+        """Create traders of the same kind and number as ours, trading on order_book"""
+        if isinstance(self.traders, TraderPopulation):
+            return self.traders.spawn(order_book)
+        return [Trader(order_book) for _ in range(len(self.traders))]
+
+    def _place_trader_orders(self):
+        """Let every trader try to place orders for one time step"""
+        if isinstance(self.traders, TraderPopulation):
+            self.traders.step()
+        else:
+            for trader in self.traders:
+                trader.try_place_orders()
+
+    def optimize_parameters(self, df, method='surrogate', workers=None, seed=None, max_evaluations=40,
+                            cache=None):
+        """
+        Optimize market parameters to best explain historical data
+
+        Args:
+            df: DataFrame with historical data
+            method: 'surrogate' calibrates with a Gaussian-process surrogate of the RMSE
+                (see calibration.calibrate); 'L-BFGS-B' runs scipy's finite-difference
+                L-BFGS-B on one fresh unseeded simulation per evaluation
+            workers: Number of processes evaluating each surrogate batch
+            seed: Seed of the surrogate calibration's proposals and simulations
+            max_evaluations: Simulation budget of the surrogate calibration
+            cache: Optional result_cache.ResultCache memoizing the surrogate calibration's
+                seeded simulations
+
+        Returns:
+            Dict with the optimized trader_activity_rate and proportion_maker. Every
+            evaluation (parameters and RMSE) is left in self.calibration_log.
+        """
+        if method == 'surrogate':
+            from calibration import CalibrationObjective, calibrate
+
+            objective = CalibrationObjective(df, len(self.traders), self.order_book.backend,
+                                             isinstance(self.traders, TraderPopulation), seed, cache,
+                                             self.order_book.depth_limits() if self.order_book.depth_limited
+                                             else None)
+            result = calibrate(objective, max_evaluations=max_evaluations, workers=workers, seed=seed)
+            self.calibration_log = [{'evaluation': entry['evaluation'],
+                                     'trader_activity_rate': entry['trader_activity_rate'],
+                                     'proportion_maker': entry['proportion_maker'],
+                                     'rmse': entry['value']} for entry in result['log']]
+            return result['params']
+        if method != 'L-BFGS-B':
+            raise ValueError(f"method must be 'surrogate' or 'L-BFGS-B', got {method!r}")
 
-    def optimize_parameters(self, df):
-        """Optimize market parameters to best explain historical data"""
         initial_params = [self.initial_params['trader_activity_rate'],
                          self.initial_params['proportion_maker']]
 
-        result = minimize(self._objective_function, initial_params,
+        self.calibration_log = []
+
+        def logged_objective(params, df):
+            error = self._objective_function(params, df)
+            self.calibration_log.append({'evaluation': len(self.calibration_log),
+                                         'trader_activity_rate': params[0],
+                                         'proportion_maker': params[1],
+                                         'rmse': error})
+            return error
+
+        result = minimize(logged_objective, initial_params,
                          args=(df), bounds=[(0.1, 2.0), (0.1, 0.9)],
                          method='L-BFGS-B')
 
@@ -245,13 +923,15 @@ class MarketSimulator:
 
     def _objective_function(self, params, df):
         """Objective function for parameter optimization"""
-        # Create a temporary order book for this evaluation
-        temp_order_book = OrderBook()
+        # Create a temporary order book (same backend as ours) for this evaluation
+        temp_order_book = type(self.order_book)()
+        if self.order_book.depth_limited:
+            temp_order_book.set_depth_limits(**self.order_book.depth_limits())
         temp_order_book.trader_activity_rate = params[0]
         temp_order_book.proportion_maker = params[1]
 
         # Create temporary traders
-        temp_traders = [Trader(temp_order_book) for _ in range(len(self.traders))]
+        temp_traders = self._spawn_traders(temp_order_book)
 
         # Create temporary simulator
         temp_simulator = MarketSimulator(temp_order_book, temp_traders)
@@ -261,115 +941,813 @@ class MarketSimulator:
             'trader_activity_rate': params[0],
             'proportion_maker': params[1]
         })
-        actual = df['close'].values
-        error = np.sqrt(np.mean((actual - predictions) ** 2))
-        return error
+        return scoring.rmse(df['close'].values, predictions)
+
+    def run_simulation(self, df, params, actual=None, abort_rmse=None):
+        """Run market simulation with given parameters (see simulate for early abort)"""
+        open_prices, = column_arrays(df, 'open')
+        return self.simulate(open_prices, params, actual, abort_rmse)
+
+    def simulate(self, open_prices, params, actual=None, abort_rmse=None):
+        """
+        Run market simulation over a window given as a NumPy array (or view) of open prices
+
+        Args:
+            open_prices: Open prices of the window; only the first one and the length are used
+            params: Market parameters
+            actual: Optional close prices of the window to score the run against bar by bar
+            abort_rmse: With actual, stop as soon as the run's RMSE over the whole window can
+                no longer beat this, i.e. once the running sum of squared errors exceeds
+                abort_rmse ** 2 * len(window)
+
+        Returns:
+            Array of simulated prices, one per bar; shorter than the window if the run was aborted
+        """
+        self.apply_params(params)
+
+        predictions = np.empty(len(open_prices))
+        current_price = open_prices[0]
+        self.order_book.last_traded_price = current_price
 
-    def run_simulation(self, df, params):
-        """Run market simulation with given parameters"""
+        if actual is None or abort_rmse is None or not np.isfinite(abort_rmse):
+            for i in range(len(predictions)):
+                current_price = self.step(current_price)
+                predictions[i] = current_price
+            return predictions
+
+        # Squared errors only accumulate, so a run past the threshold is already beaten.
+        # The small margin keeps float rounding from aborting an exact tie.
+        abort_sse = abort_rmse ** 2 * len(predictions) * (1 + 1e-9)
+        actual = np.asarray(actual, dtype=np.float64).tolist()
+        sse = 0.0
+        for i in range(len(predictions)):
+            current_price = self.step(current_price)
+            predictions[i] = current_price
+            error = current_price - actual[i]
+            sse += error * error
+            if sse > abort_sse:
+                return predictions[:i + 1]
+        return predictions
+
+    def apply_params(self, params):
+        """Set the market parameters on the order book"""
         self.order_book.trader_activity_rate = params['trader_activity_rate']
         self.order_book.proportion_maker = params['proportion_maker']
         self.order_book.price_range_percent = params.get('price_range_percent', 0.01)
 
-        predictions = []
-        current_price = df['open'].iloc[0]
-        self.order_book.last_traded_price = current_price
+    def step(self, current_price, noise=None):
+        """
+        Advance the market by one time step
 
-        for i in range(len(df)):
-            # Process market for each time step
-            for trader in self.traders:
-                trader.try_place_orders()
+        Args:
+            current_price: Simulated price before the step
+            noise: Optional standard normal draw to use for the price noise instead of
+                drawing from self.rng
 
-            # Calculate simulated price based on order book dynamics
-            if len(self.order_book.buy_book) > 0 and len(self.order_book.sell_book) > 0:
-                # Use order book imbalance to determine price movement
-                if self.order_book.imbalance > 0:
-                    # More buy volume - price should increase
-                    price_change = (self.order_book.best_bid - current_price) * 0.1
-                else:
-                    # More sell volume - price should decrease
-                    price_change = (self.order_book.best_ask - current_price) * 0.1
+        Returns:
+            Simulated price after the step
+        """
+        if self.profile is not None:
+            return self._profiled_step(current_price, noise)
+
+        # Process market for each time step
+        self._place_trader_orders()
+
+        # Calculate simulated price based on order book dynamics
+        current_price = self._update_price(current_price, noise)
+
+        # Record the trade
+        self.order_book.record_trade(int(current_price))
+        self.order_book.last_traded_price = int(current_price)
+        if self.order_book.depth_limited:
+            self.order_book.enforce_depth()
+        if self.order_book.tape is not None:
+            self.order_book.tape.advance()
+        return current_price
+
+    def _profiled_step(self, current_price, noise=None):
+        """step with each phase timed into self.profile"""
+        clock = time.perf_counter
+        started = clock()
+        self._place_trader_orders()
+        placed = clock()
+        current_price = self._update_price(current_price, noise)
+        updated = clock()
+        self.order_book.record_trade(int(current_price))
+        self.order_book.last_traded_price = int(current_price)
+        if self.order_book.depth_limited:
+            self.order_book.enforce_depth()
+        if self.order_book.tape is not None:
+            self.order_book.tape.advance()
+        recorded = clock()
+        self.profile.record_step(placed - started, updated - placed, recorded - updated,
+                                 len(self.order_book.buy_book), len(self.order_book.sell_book))
+        return current_price
+
+    def _update_price(self, current_price, noise=None):
+        """Price after the traders' orders, from the book's imbalance and best prices plus noise"""
+        if len(self.order_book.buy_book) > 0 and len(self.order_book.sell_book) > 0:
+            # Use order book imbalance to determine price movement
+            if self.order_book.imbalance > 0:
+                # More buy volume - price should increase
+                price_change = (self.order_book.best_bid - current_price) * 0.1
+            else:
+                # More sell volume - price should decrease
+                price_change = (self.order_book.best_ask - current_price) * 0.1
 
-                # Add some randomness to simulate market noise
-                price_change += np.random.normal(0, 0.01 * current_price)
+            # Add some randomness to simulate market noise
+            if noise is None:
+                price_change += self.rng.normal(0, 0.01 * current_price)
+            else:
+                price_change += noise * 0.01 * current_price
 
-                # Update price while keeping it reasonable
-                new_price = current_price + price_change
-                new_price = max(new_price, 0.95 * current_price)  # Don't let it drop too fast
-                new_price = min(new_price, 1.05 * current_price)  # Don't let it rise too fast
+            # Update price while keeping it reasonable
+            new_price = current_price + price_change
+            new_price = max(new_price, 0.95 * current_price)  # Don't let it drop too fast
+            new_price = min(new_price, 1.05 * current_price)  # Don't let it rise too fast
 
-                current_price = new_price
-            else:
-                # If no orders, use a small random walk
-                current_price += np.random.normal(0, 0.005 * current_price)
+            return new_price
+
+        # If no orders, use a small random walk
+        if noise is None:
+            return current_price + self.rng.normal(0, 0.005 * current_price)
+        return current_price + noise * 0.005 * current_price
+
+    def enable_profiling(self, profile=None):
+        """
+        Start collecting per-phase timings and order counters
+
+        Args:
+            profile: profiling.SimulationProfile to add to (default: a new one)
+
+        Returns:
+            The profile being filled
+        """
+        if profile is None:
+            from profiling import SimulationProfile
+            profile = SimulationProfile()
+        self.profile = profile
+        self.order_book.profile = profile
+        return profile
+
+    def disable_profiling(self):
+        """Stop profiling; returns the profile collected so far"""
+        profile = self.profile
+        self.profile = None
+        self.order_book.profile = None
+        return profile
+
+    def enable_trade_tape(self, tape=None):
+        """
+        Start recording every fill of the order book, one tape step per simulated bar
+
+        Args:
+            tape: trade_tape.TradeTape to append to (default: a new one)
+
+        Returns:
+            The tape being filled
+        """
+        if tape is None:
+            from trade_tape import TradeTape
+            tape = TradeTape()
+        self.order_book.tape = tape
+        return tape
+
+    def disable_trade_tape(self):
+        """Stop recording fills; returns the tape"""
+        tape = self.order_book.tape
+        self.order_book.tape = None
+        return tape
+
+    def online(self, **kwargs):
+        """
+        Drive this simulator bar by bar, keeping its order book between bars
 
-            # Record the trade
-            self.order_book.record_trade(int(current_price))
-            self.order_book.last_traded_price = int(current_price)
-            predictions.append(current_price)
+        Args:
+            **kwargs: streaming.OnlineSimulator arguments (params, horizon, window_size,
+                recalibrate_every, num_simulations, executor, seed)
 
-        return np.array(predictions)
+        Returns:
+            streaming.OnlineSimulator whose update takes one OHLCV bar and returns the
+            forecast of the next bars
+        """
+        from streaming import OnlineSimulator
+        return OnlineSimulator(self, **kwargs)
 
-    def run_multiple_simulations(self, df, window_size=30, prediction_size=5, num_simulations=1000):
+    def run_multiple_simulations(self, df, window_size=30, prediction_size=5, num_simulations=1000,
+                                 workers=None, seed=None, parallel='candidates', progress=None,
+                                 ensemble=False, search='grid', search_seed=None, early_abort=True,
+                                 cache=None, common_random_numbers=False, replicates=1, profile=False):
         """
         Run multiple simulations to find best parameters and make predictions
 
         Args:
-            df: DataFrame with historical data
+            df: DataFrame with historical data (or a dict of column arrays, or market_data.Bars,
+                which worker processes share through its memory map instead of receiving copies)
             window_size: Number of minutes to use for parameter optimization
             prediction_size: Number of minutes to predict
             num_simulations: Number of parameter combinations to test
+            workers: If set, evaluate each window's parameter sets in a pool of this many
+                worker processes. Every evaluation then runs on its own fresh order book
+                and traders with a per-task seed, so results do not depend on workers.
+            seed: Root seed for the per-task seeds of the workers mode
+            parallel: What the workers mode sends to the pool: 'candidates' splits each
+                window's parameter sweep, 'windows' runs whole windows (sweep and
+                prediction) as independent jobs. Both give identical results.
+            progress: Optional callback progress(completed_windows, total_windows) for
+                the workers and ensemble modes
+            ensemble: If True, advance all parameter sets of a window together as one
+                lockstep EnsembleSimulator on fresh order books instead of one
+                run_simulation per parameter set
+            search: 'grid' tests num_simulations parameter sets along the diagonal of the
+                parameter space on every window; 'halving' draws num_simulations sets
+                spread over the whole space and races them by successive halving on
+                growing prefixes of the window; 'warm' runs the grid search on the first
+                window, then searches a neighborhood of about num_simulations / 10 sets
+                around the previous window's best and falls back to the grid when a
+                drift detector sees the fit degrade (serial only)
+            search_seed: Seed of the 'halving' candidate sample and 'warm' neighborhoods
+            early_abort: Stop each grid candidate's simulation as soon as its partial RMSE
+                shows it cannot beat the window's best so far. Except in the workers
+                'candidates' mode, where candidates run concurrently, the sweep's choice
+                is unchanged on fresh seeded simulators; on this simulator's shared order
+                book and noise stream the aborted runs shift later candidates' randomness.
+            cache: Optional result_cache.ResultCache memoizing each seeded simulation of
+                the workers mode; requires workers (workers=1 runs in-process) and a seed
+            common_random_numbers: In the seeded workers and ensemble modes, let every
+                candidate of a window see the same random draws, so their RMSEs differ by
+                the parameters rather than by luck
+            replicates: Independent simulations per candidate in the workers mode; a
+                candidate scores the mean RMSE of its replicates
+            profile: If True, profile every simulated step of the grid search (serial or
+                workers mode) and leave one profiling.SimulationProfile dict per window in
+                self.window_profiles and their sum in self.profile_totals. Cached results
+                are not simulated and so not profiled.
 
         Returns:
-            List of RMSE values for each prediction window
+            List of RMSE values for each prediction window. The number of simulations,
+            simulated bars and bars saved by early abort (and, for the 'warm' search, the
+            number of wide-search fallbacks, and with a cache its hits, misses and partial
+            hits, i.e. cached lower bounds that still had to be simulated) are left in
+            self.sweep_stats. The grid and ensemble sweeps leave the RMSE, MAE and hit
+            rate of every candidate on every window in self.error_surface (the workers
+            mode only the RMSE; runs stopped by early abort are nan).
         """
-        rmse_results = []
-        current_index = window_size  # Start with enough data for initial optimization
+        if cache is not None and workers is None:
+            raise ValueError("cache requires the workers mode, whose simulations are seeded")
+        if common_random_numbers and workers is None and not ensemble:
+            raise ValueError("common_random_numbers requires the seeded workers or ensemble mode")
+        if replicates != 1 and workers is None:
+            raise ValueError("replicates requires the workers mode")
+        if search not in ('grid', 'halving', 'warm'):
+            raise ValueError(f"search must be 'grid', 'halving' or 'warm', got {search!r}")
+        if search != 'grid' and (ensemble or workers is not None):
+            raise ValueError(f"{search} search cannot be combined with the ensemble or workers modes")
+        if profile and (search != 'grid' or ensemble):
+            raise ValueError("profile requires the grid search in the serial or workers mode")
+        # Halving and warm searches score different candidates on every window
+        self.error_surface = None
+        if search == 'halving':
+            return self._run_halving_sweep(df, window_size, prediction_size, num_simulations, search_seed)
+        if search == 'warm':
+            return self._run_warm_sweep(df, window_size, prediction_size, num_simulations, search_seed,
+                                        early_abort)
+
+        if workers is not None:
+            if ensemble:
+                raise ValueError("ensemble and workers modes cannot be combined")
+            cache_before = dict(cache.stats) if cache is not None else None
+            rmse_results, self.sweep_stats = self._run_parallel_sweep(
+                df, window_size, prediction_size, num_simulations, workers, seed, parallel, progress,
+                early_abort, cache, common_random_numbers, replicates, profile)
+            if cache is not None:
+                self.sweep_stats['cache_hits'] = (cache.stats['memory_hits'] + cache.stats['disk_hits']
+                                                  - cache_before['memory_hits'] - cache_before['disk_hits'])
+                self.sweep_stats['cache_misses'] = cache.stats['misses'] - cache_before['misses']
+                self.sweep_stats['cache_partial_hits'] = cache.stats['partial_hits'] - cache_before['partial_hits']
+            return rmse_results
+
+        if ensemble:
+            rmse_results = self._run_ensemble_sweep(df, window_size, prediction_size, num_simulations,
+                                                    seed, progress, common_random_numbers)
+            bar_steps_saved = 0
+        else:
+            rmse_results, bar_steps_saved = self._run_grid_sweep(df, window_size, prediction_size,
+                                                                 num_simulations, early_abort, profile)
+
+        # Every window simulates each candidate on the full window plus one prediction
+        num_windows = len(rmse_results) // 2
+        self.sweep_stats = {
+            'simulations': num_windows * (num_simulations + 1),
+            'bar_steps': num_windows * (num_simulations * window_size + prediction_size) - bar_steps_saved,
+            'bar_steps_saved': bar_steps_saved
+        }
+        return rmse_results
 
-        # Generate parameter grid
-        activity_rates = np.linspace(0.2, 2.0, num_simulations)
-        maker_proportions = np.linspace(0.1, 0.9, num_simulations)
-        price_ranges = np.linspace(0.0001, 0.03, num_simulations)  # 0.01% to 3.00%
+    def _run_grid_sweep(self, df, window_size, prediction_size, num_simulations, early_abort=True,
+                        profile=False):
+        """
+        Test every grid candidate on every window on this simulator
 
-        while current_index + prediction_size <= len(df):
-            # Extract current window for optimization (look back window_size minutes)
-            optimization_window = df.iloc[current_index - window_size:current_index]
+        Returns:
+            (RMSE list as for run_multiple_simulations, bar-steps saved by early abort)
+        """
+        open_prices, close_prices = column_arrays(df, 'open', 'close')
+        windows = BacktestWindows(open_prices, close_prices, window_size, prediction_size)
+        candidates = parameter_grid(num_simulations)
+
+        if profile:
+            from profiling import SimulationProfile
+            outer_profile = self.disable_profiling()
+            self.window_profiles = []
+            self.profile_totals = SimulationProfile()
+
+        self.error_surface = scoring.ErrorSurface(candidates, len(windows))
+        block = np.empty((len(candidates), window_size))
+        rmse_results = []
+        bar_steps_saved = 0
+        for w in range(len(windows)):
+            if profile:
+                self.enable_profiling()
+            # Current window for optimization (look back window_size minutes)
+            optimization_open = windows.optimization_open[w]
+            actual = windows.optimization_close[w]
 
             best_rmse = float('inf')
             best_params = None
+            completed = []
 
             # Test different parameter combinations
-            for i in range(num_simulations):
-                params = {
-                    'trader_activity_rate': activity_rates[i],
-                    'proportion_maker': maker_proportions[i],
-                    'price_range_percent': price_ranges[i]
-                }
-
+            for i, params in enumerate(candidates):
                 # Run simulation with these parameters
-                predictions = self.run_simulation(optimization_window, params)
-                actual = optimization_window['close'].values
-                rmse = np.sqrt(np.mean((actual - predictions) ** 2))
+                if early_abort:
+                    predictions = self.simulate(optimization_open, params, actual, best_rmse)
+                    if len(predictions) < window_size:
+                        bar_steps_saved += window_size - len(predictions)
+                        continue
+                else:
+                    predictions = self.simulate(optimization_open, params)
+                block[i] = predictions
+                completed.append(i)
+                rmse = scoring.rmse(actual, predictions)
 
                 if rmse < best_rmse:
                     best_rmse = rmse
                     best_params = params
 
-            # Store the best RMSE for this window
+            # Store the best RMSE for this window, and every completed run's scores
             rmse_results.append(best_rmse)
+            self.error_surface.record(w, scoring.score_block(block[completed], actual, optimization_open[0]),
+                                      completed)
+
+            # Use best parameters to predict next window and compare to actual data
+            prediction = self.simulate(windows.prediction_open[w], best_params)
+            rmse_results.append(scoring.rmse(windows.prediction_close[w], prediction))
+
+            if profile:
+                window_profile = self.disable_profiling()
+                self.window_profiles.append(window_profile.to_dict())
+                self.profile_totals.merge(window_profile)
+
+        if profile and outer_profile is not None:
+            # A profile the caller attached keeps counting, and gets this sweep's counters too
+            self.enable_profiling(outer_profile.merge(self.profile_totals))
+        return rmse_results, bar_steps_saved
+
+    def _run_halving_sweep(self, df, window_size, prediction_size, num_simulations, search_seed):
+        """Race candidates spread over the parameter space by successive halving on every window"""
+        from parameter_search import parameter_space, successive_halving
+
+        open_prices, close_prices = column_arrays(df, 'open', 'close')
+        windows = BacktestWindows(open_prices, close_prices, window_size, prediction_size)
+        candidates = parameter_space(num_simulations, search_seed)
+
+        rmse_results = []
+        self.sweep_stats = {'simulations': 0, 'bar_steps': 0, 'bar_steps_saved': 0}
+        for w in range(len(windows)):
+            optimization_open = windows.optimization_open[w]
+            actual = windows.optimization_close[w]
+
+            def evaluate(params, bars):
+                predictions = self.simulate(optimization_open[:bars], params)
+                return scoring.rmse(actual[:bars], predictions)
 
-            # Use best parameters to predict next window
-            prediction_window = df.iloc[current_index:current_index + prediction_size]
-            prediction = self.run_simulation(prediction_window, best_params)
+            best = successive_halving(evaluate, candidates, window_size)
+            rmse_results.append(best['score'])
+            self.sweep_stats['simulations'] += best['simulations'] + 1
+            self.sweep_stats['bar_steps'] += best['bar_steps'] + prediction_size
 
-            # Compare to actual data
-            actual_next_window = df.iloc[current_index:current_index + prediction_size]['close'].values
-            prediction_rmse = np.sqrt(np.mean((actual_next_window - prediction) ** 2))
-            rmse_results.append(prediction_rmse)
+            prediction = self.simulate(windows.prediction_open[w], best['params'])
+            rmse_results.append(scoring.rmse(windows.prediction_close[w], prediction))
 
-            # Move to next window (sliding window approach)
-            current_index += prediction_size
+        return rmse_results
+
+    def _run_warm_sweep(self, df, window_size, prediction_size, num_simulations, search_seed, early_abort=True):
+        """Re-calibrate each window around the previous window's best, with a wide search on drift"""
+        from parameter_search import WarmStartSearch
+
+        open_prices, close_prices = column_arrays(df, 'open', 'close')
+        windows = BacktestWindows(open_prices, close_prices, window_size, prediction_size)
+        search = WarmStartSearch(parameter_grid(num_simulations), max(2, num_simulations // 10),
+                                 seed=search_seed)
+
+        rmse_results = []
+        stats = {'simulations': 0, 'bar_steps': 0, 'bar_steps_saved': 0, 'fallbacks': 0}
+        for w in range(len(windows)):
+            optimization_open = windows.optimization_open[w]
+            actual = windows.optimization_close[w]
+
+            def evaluate(params, abort_rmse):
+                predictions = self.simulate(optimization_open, params, actual,
+                                            abort_rmse if early_abort else None)
+                stats['bar_steps'] += len(predictions)
+                if len(predictions) < window_size:
+                    stats['bar_steps_saved'] += window_size - len(predictions)
+                    return np.inf
+                return scoring.rmse(actual, predictions)
+
+            best = search.search(evaluate)
+            rmse_results.append(best['score'])
+            stats['simulations'] += best['simulations'] + 1
+            stats['bar_steps'] += prediction_size
+
+            prediction = self.simulate(windows.prediction_open[w], best['params'])
+            rmse_results.append(scoring.rmse(windows.prediction_close[w], prediction))
+
+        # The first window's wide search is not a fallback
+        stats['fallbacks'] = search.fallbacks
+        self.sweep_stats = stats
+        return rmse_results
+
+    def _run_parallel_sweep(self, df, window_size, prediction_size, num_simulations, workers, seed,
+                            parallel='candidates', progress=None, early_abort=True, cache=None,
+                            common_random_numbers=False, replicates=1, profile=False):
+        """
+        run_multiple_simulations with the parameter sweeps or whole windows spread over a process pool
+
+        Returns:
+            (RMSE list as for run_multiple_simulations, dict of the simulations, bar-steps
+            and bar-steps saved by early abort that were actually simulated)
+        """
+        if parallel not in ('candidates', 'windows'):
+            raise ValueError(f"parallel must be 'candidates' or 'windows', got {parallel!r}")
+
+        context = _SweepContext(df, len(self.traders), type(self.order_book),
+                                isinstance(self.traders, TraderPopulation), seed,
+                                parameter_grid(num_simulations), window_size, prediction_size, early_abort,
+                                cache, common_random_numbers, replicates, profile,
+                                self.order_book.depth_limits() if self.order_book.depth_limited else None)
+        window_starts = context.windows.starts.tolist()
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                           initargs=(context,))
+        try:
+            window_results = [None] * len(window_starts)
+            if parallel == 'windows' and executor is not None:
+                futures = {executor.submit(_run_window_task, window_index): window_index
+                           for window_index in range(len(window_starts))}
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    window_results[futures[future]] = future.result()
+                    # The worker's lookups went through its own copy of the cache
+                    if cache is not None:
+                        cache.merge_stats(window_results[futures[future]][2]['cache'])
+                    if progress is not None:
+                        progress(completed, len(window_starts))
+            else:
+                for window_index in range(len(window_starts)):
+                    if executor is None:
+                        window_results[window_index] = context.run_window(window_index)
+                    else:
+                        # Cached results are answered here; only the rest go to the pool
+                        tasks = context.window_tasks(window_index)
+                        if profile:
+                            from profiling import SimulationProfile
+                            context.profile = SimulationProfile()
+                        cached = [context.lookup(task) for task in tasks]
+                        missing = [task for task, hit in zip(tasks, cached) if hit is None or not hit[1]]
+                        chunksize = max(1, len(missing) // (workers * 4))
+                        computed = iter(executor.map(_evaluate_sweep_task, missing, chunksize=chunksize))
+                        counters_before = dict(context.counters)
+                        context.counters['simulations'] += len(missing)
+                        context.counters['bar_steps'] += len(missing) * window_size
+                        rmses = []
+                        for task, hit in zip(tasks, cached):
+                            if hit is None or not hit[1]:
+                                rmse = next(computed)
+                                if profile:
+                                    rmse, task_profile = rmse
+                                    context.profile.merge(task_profile)
+                                context.store(task, rmse)
+                            else:
+                                rmse = hit[0]
+                            rmses.append(rmse)
+                        rmses = np.mean(np.reshape(rmses, (-1, context.replicates)), axis=1).tolist()
+                        # Concurrent candidates have no incumbent to abort against
+                        best_rmse, prediction_rmse = context.finish_window(window_index, rmses)
+                        counters = {name: count - counters_before[name]
+                                    for name, count in context.counters.items()}
+                        if profile:
+                            counters['profile'] = context.profile.to_dict()
+                            context.profile = None
+                        counters['rmses'] = rmses
+                        window_results[window_index] = (best_rmse, prediction_rmse, counters)
+                    if progress is not None:
+                        progress(window_index + 1, len(window_starts))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # Same layout as the serial path: optimization RMSE then prediction RMSE per window
+        rmse_results = [rmse for best_rmse, prediction_rmse, _ in window_results
+                        for rmse in (best_rmse, prediction_rmse)]
+        stats = {name: sum(counters[name] for _, _, counters in window_results)
+                 for name in ('simulations', 'bar_steps', 'bar_steps_saved')}
+        # Workers only send back RMSEs, so the surface has no MAE or hit rate
+        self.error_surface = scoring.ErrorSurface(context.candidates, len(window_results))
+        for window_index, (_, _, counters) in enumerate(window_results):
+            self.error_surface.record(window_index, {'rmse': counters['rmses']})
+        if profile:
+            from profiling import SimulationProfile
+            self.window_profiles = [counters['profile'] for _, _, counters in window_results]
+            self.profile_totals = SimulationProfile()
+            for window_profile in self.window_profiles:
+                self.profile_totals.merge(window_profile)
+        return rmse_results, stats
+
+    def _run_ensemble_sweep(self, df, window_size, prediction_size, num_simulations, seed, progress=None,
+                            common_random_numbers=False):
+        """run_multiple_simulations with each window's parameter sweep run as one lockstep ensemble"""
+        from ensemble import EnsembleSimulator
+
+        open_prices, close_prices = column_arrays(df, 'open', 'close')
+        windows = BacktestWindows(open_prices, close_prices, window_size, prediction_size)
+        candidates = parameter_grid(num_simulations)
+        num_traders = len(self.traders)
+        backend = self.order_book.backend
+        depth_limits = self.order_book.depth_limits() if self.order_book.depth_limited else None
+        entropy = seed if seed is not None else np.random.SeedSequence().entropy
+
+        self.error_surface = scoring.ErrorSurface(candidates, len(windows))
+        rmse_results = []
+        for w in range(len(windows)):
+            sweep = EnsembleSimulator(candidates, num_traders, backend,
+                                      seed=np.random.SeedSequence(entropy, spawn_key=(w, 0)),
+                                      common_random_numbers=common_random_numbers, depth_limits=depth_limits)
+            predictions = sweep.run(windows.optimization_open[w, 0], window_size)
+            scores = scoring.score_block(predictions, windows.optimization_close[w],
+                                         windows.optimization_open[w, 0])
+            self.error_surface.record(w, scores)
+            rmses = scores['rmse']
+
+            best_rmse = float('inf')
+            best_params = None
+            for params, rmse in zip(candidates, rmses):
+                if rmse < best_rmse:
+                    best_rmse = rmse
+                    best_params = params
+            rmse_results.append(best_rmse)
+
+            forecast = EnsembleSimulator([best_params], num_traders, backend,
+                                         seed=np.random.SeedSequence(entropy, spawn_key=(w, 1)),
+                                         depth_limits=depth_limits)
+            prediction = forecast.run(windows.prediction_open[w, 0], prediction_size)[0]
+            rmse_results.append(scoring.rmse(windows.prediction_close[w], prediction))
+
+            if progress is not None:
+                progress(w + 1, len(windows))
 
         return rmse_results
 
+class _SweepContext:
+    """Data, candidates and simulator settings shared by every task of a parallel sweep"""
+
+    def __init__(self, data, num_traders, book_class, vectorized, seed, candidates=(),
+                 window_size=30, prediction_size=5, early_abort=False, cache=None,
+                 common_random_numbers=False, replicates=1, profiling=False, depth_limits=None):
+        # Memory-mapped Bars travel to workers as their cache path; anything else as arrays
+        self.data = data if hasattr(data, 'cache_path') else dict(zip(
+            ('open', 'close'), column_arrays(data, 'open', 'close')))
+        self.num_traders = num_traders
+        self.book_class = book_class
+        self.vectorized = vectorized
+        # Without a root seed, draw one so per-task streams are still independent
+        self.entropy = seed if seed is not None else np.random.SeedSequence().entropy
+        self.candidates = list(candidates)
+        self.window_size = window_size
+        self.prediction_size = prediction_size
+        self.early_abort = early_abort
+        self.cache = cache
+        self.common_random_numbers = common_random_numbers
+        self.replicates = replicates
+        # Work actually simulated in this process (cache hits cost nothing)
+        self.counters = {'simulations': 0, 'bar_steps': 0, 'bar_steps_saved': 0}
+        # Whether tasks are profiled, and the SimulationProfile of the current window's
+        # simulations in this process
+        self.profiling = profiling
+        self.profile = None
+        # OrderBook.set_depth_limits arguments for every fresh order book, or None
+        self.depth_limits = depth_limits
+        self._windows = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_windows'] = None
+        return state
+
+    @property
+    def windows(self):
+        """BacktestWindows over the data, built on first use in each process"""
+        if self._windows is None:
+            open_prices, close_prices = column_arrays(self.data, 'open', 'close')
+            self._windows = BacktestWindows(open_prices, close_prices, self.window_size, self.prediction_size)
+        return self._windows
+
+    def _task_arrays(self, task):
+        window_index, kind = task[:2]
+        if kind == 'optimization':
+            return self.windows.optimization_open[window_index], self.windows.optimization_close[window_index]
+        return self.windows.prediction_open[window_index], self.windows.prediction_close[window_index]
+
+    def _cache_key(self, task):
+        _, _, params, spawn_key = task
+        return self.cache.key(self._task_arrays(task), params, self.num_traders, [self.entropy, list(spawn_key)],
+                              backend=self.book_class.backend, vectorized=self.vectorized,
+                              depth_limits=self.depth_limits)
+
+    def lookup(self, task, abort_rmse=None):
+        """
+        Cached (RMSE, complete) of a task, or None; an incomplete RMSE is a lower bound
+
+        Only an entry that settles the task counts as a cache hit; one the caller still
+        has to simulate (see settles) is counted as a partial hit.
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._cache_key(task),
+                                usable=lambda value: self.settles(*value.tolist(), abort_rmse))
+        if cached is None:
+            return None
+        rmse, complete = cached.tolist()
+        return rmse, bool(complete)
+
+    @staticmethod
+    def settles(rmse, complete, abort_rmse=None):
+        """Whether a cached result decides a task: complete, or a lower bound that already loses"""
+        return bool(complete) or (abort_rmse is not None and rmse ** 2 > abort_rmse ** 2 * (1 + 1e-9))
+
+    def store(self, task, rmse, complete=True):
+        """Cache the result of a task"""
+        if self.cache is not None:
+            self.cache.put(self._cache_key(task), [rmse, float(complete)])
+
+    def simulate_task(self, task, abort_rmse=None):
+        """
+        Simulate one window on a fresh seeded simulator
+
+        Args:
+            task: (window_index, kind, params, spawn_key) tuple, where kind is
+                'optimization' or 'prediction'; spawn_key identifies the task so its
+                random streams are the same however the tasks are scheduled
+            abort_rmse: Optional RMSE at which the simulation is abandoned early
+
+        Returns:
+            (RMSE of the simulated prices against the close prices, whether the run
+            completed); for an aborted run the RMSE of the bars simulated so far is a
+            lower bound of the full run's
+        """
+        _, _, params, spawn_key = task
+        open_prices, actual = self._task_arrays(task)
+        seed = np.random.SeedSequence(self.entropy, spawn_key=spawn_key)
+        order_book = self.book_class()
+        if self.depth_limits is not None:
+            order_book.set_depth_limits(**self.depth_limits)
+        simulator = MarketSimulator._build(order_book, self.num_traders, self.vectorized, seed)
+        if self.profile is not None:
+            simulator.enable_profiling(self.profile)
+        predictions = simulator.simulate(open_prices, params, actual, abort_rmse)
+        self.counters['simulations'] += 1
+        self.counters['bar_steps'] += len(predictions)
+        if len(predictions) < len(actual):
+            self.counters['bar_steps_saved'] += len(actual) - len(predictions)
+            partial_sse = np.sum((actual[:len(predictions)] - predictions) ** 2)
+            return np.sqrt(partial_sse / len(actual)), False
+        return scoring.rmse(actual, predictions), True
+
+    def evaluate(self, task, abort_rmse=None):
+        """
+        RMSE of a task, from the result cache if possible
+
+        Returns:
+            RMSE of the simulated prices against the close prices, or inf if the run
+            could not beat abort_rmse
+        """
+        cached = self.lookup(task, abort_rmse)
+        if cached is not None:
+            rmse, complete = cached
+            if complete:
+                return rmse
+            # A stored lower bound that already loses settles the task without simulating
+            if self.settles(rmse, complete, abort_rmse):
+                return np.inf
+
+        rmse, complete = self.simulate_task(task, abort_rmse)
+        self.store(task, rmse, complete)
+        return rmse if complete else np.inf
+
+    def window_tasks(self, window_index):
+        """
+        Evaluation tasks for every candidate and replicate on one optimization window,
+        replicates of a candidate next to each other
 
+        With common random numbers, replicate r of every candidate shares one spawn key,
+        so all candidates face the same trader and noise draws.
+        """
+        tasks = []
+        for i, params in enumerate(self.candidates):
+            for replicate in range(self.replicates):
+                if self.common_random_numbers:
+                    spawn_key = (window_index, 2, replicate)
+                else:
+                    spawn_key = (window_index, 0, i) + ((replicate,) if replicate else ())
+                tasks.append((window_index, 'optimization', params, spawn_key))
+        return tasks
+
+    def finish_window(self, window_index, rmses):
+        """
+        Pick the best candidate from its sweep RMSEs (mean over replicates) and score its prediction
+
+        Returns:
+            (best optimization RMSE, prediction RMSE) for the window
+        """
+        best_rmse = float('inf')
+        best_params = None
+        for params, rmse in zip(self.candidates, rmses):
+            if rmse < best_rmse:
+                best_rmse = rmse
+                best_params = params
+
+        # Predict the next window with the best parameters on another fresh simulator
+        prediction_rmse = self.evaluate((window_index, 'prediction', best_params, (window_index, 1)))
+        return best_rmse, prediction_rmse
+
+    def run_window(self, window_index):
+        """
+        Run one window's sweep and prediction as a self-contained job
+
+        Returns:
+            (best optimization RMSE, prediction RMSE, dict of the window's simulation
+            counters, result cache statistics, profile and 'rmses' of the candidates
+            (inf for runs stopped by early abort))
+        """
+        if self.profiling:
+            from profiling import SimulationProfile
+            self.profile = SimulationProfile()
+        counters_before = dict(self.counters)
+        cache_before = dict(self.cache.stats) if self.cache is not None else None
+        tasks = self.window_tasks(window_index)
+        rmses = []
+        best_rmse = np.inf
+        for start in range(0, len(tasks), self.replicates):
+            # RMSEs are non-negative, so once the replicates so far use up the budget of
+            # the incumbent's mean, the candidate has lost
+            budget = best_rmse * self.replicates
+            total = 0.0
+            for task in tasks[start:start + self.replicates]:
+                rmse = self.evaluate(task, budget - total if self.early_abort else None)
+                total += rmse
+                if not np.isfinite(total):
+                    break
+            rmse = total / self.replicates
+            best_rmse = min(best_rmse, rmse)
+            rmses.append(rmse)
+        best_rmse, prediction_rmse = self.finish_window(window_index, rmses)
+
+        counters = {name: count - counters_before[name] for name, count in self.counters.items()}
+        if cache_before is not None:
+            counters['cache'] = {name: count - cache_before[name] for name, count in self.cache.stats.items()}
+        if self.profiling:
+            counters['profile'] = self.profile.to_dict()
+            self.profile = None
+        counters['rmses'] = rmses
+        return best_rmse, prediction_rmse, counters
+
+_worker_context = None
+
+def _init_sweep_worker(context):
+    """Process pool initializer: keep the sweep context for the worker's tasks"""
+    global _worker_context
+    _worker_context = context
+
+def _evaluate_sweep_task(task):
+    """RMSE of one task in a worker, with the profile of its simulation when profiling"""
+    if not _worker_context.profiling:
+        return _worker_context.simulate_task(task)[0]
+    from profiling import SimulationProfile
+    _worker_context.profile = SimulationProfile()
+    rmse = _worker_context.simulate_task(task)[0]
+    profile, _worker_context.profile = _worker_context.profile, None
+    return rmse, profile.to_dict()
+
+def _run_window_task(window_index):
+    return _worker_context.run_window(window_index)
@@ -8,12 +8,7 @@ import pandas as pd
 import numpy as np
 from market_model import MarketSimulator, Trader, OrderBook
 from market_analysis import analyze_data, evaluate_predictions
-
-def load_data(filepath):
-    """Load AAPL trading data from CSV"""
-    df = pd.read_csv(filepath, header=None, names=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
-                    parse_dates=['timestamp'])
-    return df
+from market_data import load_data
 
 def main():
     # Load data
@@ -0,0 +1,55 @@
+"""
+Monte Carlo Future Paths
+
+Fans out possible continuations of the market from one order book state, like
+CaptureFutureRun/futurePaths in the C# simulator.
+"""
+
+import numpy as np
+from ensemble import EnsembleSimulator
+
+def simulate_paths(state, params, horizon, n_paths, num_traders=50, batch_size=256, seed=None,
+                   quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), start_price=None, backend='dict'):
+    """
+    Simulate n_paths independent continuations of the market from one state
+
+    Each batch of paths is one lockstep EnsembleSimulator whose markets all start from
+    the snapshot, so order generation and the price update of a whole batch are single
+    vectorized operations per time step; only order matching runs per path. The draws
+    of a batch depend on its size, so the same seed reproduces the paths only with the
+    same batch_size.
+
+    Args:
+        state: OrderBookSnapshot to start every path from
+        params: Market parameters (as for MarketSimulator.run_simulation)
+        horizon: Number of time steps per path
+        n_paths: Number of paths
+        num_traders: Number of traders in the simulated market
+        batch_size: Number of paths simulated in lockstep
+        seed: Optional seed making the paths reproducible
+        quantiles: Quantile levels of the bands to compute per time step
+        start_price: Simulated price at the start; defaults to the state's last traded price
+        backend: Order book backend of the paths
+
+    Returns:
+        Dict with the (n_paths, horizon) 'paths' array, the (len(quantiles), horizon)
+        'quantiles' bands and the quantile 'levels'
+    """
+    batch_starts = range(0, n_paths, batch_size)
+    batch_seeds = np.random.SeedSequence(seed).spawn(len(batch_starts))
+
+    paths = np.empty((n_paths, horizon))
+    for batch_start, batch_seed in zip(batch_starts, batch_seeds):
+        batch_stop = min(batch_start + batch_size, n_paths)
+        batch = EnsembleSimulator([params] * (batch_stop - batch_start), num_traders, backend, seed=batch_seed)
+        batch.load_snapshot(state, start_price)
+        for t in range(horizon):
+            batch.step()
+            paths[batch_start:batch_stop, t] = batch.price
+
+    levels = np.asarray(quantiles)
+    return {
+        'paths': paths,
+        'quantiles': np.quantile(paths, levels, axis=0),
+        'levels': levels
+    }
@@ -0,0 +1,391 @@
+"""
+Order-Level Order Book
+
+Price-time priority alternative to the aggregate OrderBook. Every resting order is a
+small record in a FIFO queue at its price level, indexed by order ID, so a specific
+order can be cancelled or modified in O(1) and every fill can be reported per order.
+The aggregate view (buy_book/sell_book quantities per price, best_bid, best_ask,
+volumes and imbalance) is kept in step, so the rest of the simulator is unaffected.
+"""
+
+from collections import deque, namedtuple
+import time
+import numpy as np
+from market_model import OrderBook
+
+# One execution against a resting order; maker_remaining is what is left of it after the fill
+Fill = namedtuple('Fill', ('taker_id', 'maker_id', 'price', 'quantity', 'maker_remaining'))
+
+class Order:
+    """Resting order, linked into its price level's FIFO queue"""
+
+    __slots__ = ('order_id', 'price', 'quantity', 'is_buy', 'prev', 'next')
+
+    def __init__(self, order_id, price, quantity, is_buy):
+        self.order_id = order_id
+        self.price = price
+        self.quantity = quantity
+        self.is_buy = is_buy
+        self.prev = None
+        self.next = None
+
+    def __repr__(self):
+        side = 'buy' if self.is_buy else 'sell'
+        return f"Order({self.order_id}, {side} {self.quantity} @ {self.price})"
+
+class PriceLevel:
+    """FIFO queue of the orders resting at one price, oldest at the head"""
+
+    __slots__ = ('head', 'tail')
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+
+    def append(self, order):
+        order.prev = self.tail
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail.next = order
+        self.tail = order
+
+    def unlink(self, order):
+        if order.prev is None:
+            self.head = order.next
+        else:
+            order.prev.next = order.next
+        if order.next is None:
+            self.tail = order.prev
+        else:
+            order.next.prev = order.prev
+        order.prev = order.next = None
+
+    def __iter__(self):
+        order = self.head
+        while order is not None:
+            yield order
+            order = order.next
+
+class QueueOrderBook(OrderBook):
+    """
+    Order book keeping individual orders in price-time priority
+
+    place_order returns the order's ID; cancel_order and modify_order act on resting
+    orders by ID. With record_fills, every execution is appended to fills as a Fill
+    until drain_fills collects them.
+    """
+
+    backend = 'orders'
+
+    def __init__(self, record_fills=False):
+        super().__init__()
+        self.orders = {}  # order ID -> resting Order
+        self._queues = {True: {}, False: {}}  # side -> price -> PriceLevel
+        self._next_id = 1
+        self._incoming_id = None
+        self.record_fills = record_fills
+        self.fills = []
+
+    def _new_id(self):
+        order_id = self._next_id
+        self._next_id += 1
+        return order_id
+
+    def place_order(self, price, quantity, is_buy, order_id=None):
+        """
+        Place an order in the order book
+
+        Returns:
+            The order's ID (new unless order_id is given), or None for an invalid order
+        """
+        if price <= 0 or quantity <= 0:
+            return None
+        if order_id is None:
+            order_id = self._new_id()
+        self._incoming_id = order_id
+        try:
+            super().place_order(price, quantity, is_buy)
+        finally:
+            self._incoming_id = None
+        return order_id
+
+    def make_order(self, price, quantity, is_buy):
+        """Rest a limit order at the back of its price level's queue"""
+        order_id = self._incoming_id if self._incoming_id is not None else self._new_id()
+        order = Order(order_id, price, quantity, is_buy)
+        self.orders[order_id] = order
+        queues = self._queues[is_buy]
+        level = queues.get(price)
+        if level is None:
+            level = queues[price] = PriceLevel()
+        level.append(order)
+
+        if is_buy:
+            self.buy_book[price] = self.buy_book.get(price, 0) + quantity
+            self.total_buy_volume += quantity
+            if price > self.best_bid:
+                self.best_bid = price
+        else:
+            self.sell_book[price] = self.sell_book.get(price, 0) + quantity
+            self.total_sell_volume += quantity
+            if price < self.best_ask:
+                self.best_ask = price
+        if self._arrivals is not None:
+            self._arrivals.append((self.depth_step, order))
+
+    def _rest_aggregated(self, prices, quantities, is_buy):
+        """Every resting order needs its own record, so runs are rested one by one"""
+        for price, quantity, side_is_buy in zip(prices.tolist(), quantities.tolist(), is_buy.tolist()):
+            self.make_order(price, quantity, side_is_buy)
+
+    def _fill_level(self, level, quantity, taker_id):
+        """
+        Fill up to quantity from a level's queue, oldest order first
+
+        Returns:
+            Quantity traded
+        """
+        traded = 0
+        order = level.head
+        while order is not None and traded < quantity:
+            trade_quantity = min(order.quantity, quantity - traded)
+            order.quantity -= trade_quantity
+            traded += trade_quantity
+            if self.record_fills:
+                self.fills.append(Fill(taker_id, order.order_id, order.price, trade_quantity, order.quantity))
+            following = order.next
+            if order.quantity == 0:
+                level.unlink(order)
+                del self.orders[order.order_id]
+            order = following
+        return traded
+
+    def take_order(self, price, quantity, is_buy):
+        """
+        Execute a market order against the resting orders in price-time priority
+
+        Returns:
+            (filled quantity, filled notional) of the fills against resting orders
+        """
+        profile = self.profile
+        if profile is not None:
+            started = time.perf_counter()
+        taker_id = self._incoming_id if self._incoming_id is not None else self._new_id()
+        tape = self.tape
+        remaining_quantity = quantity
+        last_traded_price = self.last_traded_price
+        filled_notional = 0
+        levels_walked = 0
+
+        while remaining_quantity > 0:
+            if is_buy:  # Buy order taking from sell book
+                if len(self.sell_book) == 0:
+                    self.best_ask = np.inf
+                    break
+                self.best_ask = self.sell_book.peekitem(0)[0]
+
+                if price < self.best_ask:
+                    break
+
+                levels_walked += 1
+                trade_quantity = self._fill_level(self._queues[False][self.best_ask], remaining_quantity,
+                                                  taker_id)
+                remaining_quantity -= trade_quantity
+
+                self.total_buy_volume += trade_quantity  # Buy volume increases
+                self.total_sell_volume -= trade_quantity  # Sell volume decreases
+
+                last_traded_price = self.best_ask
+                filled_notional += trade_quantity * self.best_ask
+                if tape is not None:
+                    tape.append(self.best_ask, trade_quantity, True)
+
+                ask_quantity = self.sell_book[self.best_ask] - trade_quantity
+                if ask_quantity <= 0:
+                    del self.sell_book[self.best_ask]
+                    del self._queues[False][self.best_ask]
+                    self.best_ask = self.sell_book.peekitem(0)[0] if len(self.sell_book) > 0 else np.inf
+                else:
+                    self.sell_book[self.best_ask] = ask_quantity
+            else:  # Sell order taking from buy book
+                if len(self.buy_book) == 0:
+                    self.best_bid = -np.inf
+                    break
+                self.best_bid = self.buy_book.peekitem(-1)[0]
+
+                if price < self.best_bid:
+                    break
+
+                levels_walked += 1
+                trade_quantity = self._fill_level(self._queues[True][self.best_bid], remaining_quantity,
+                                                  taker_id)
+                remaining_quantity -= trade_quantity
+                self.total_sell_volume -= trade_quantity  # Sell volume decreases
+                last_traded_price = self.best_bid
+                filled_notional += trade_quantity * self.best_bid
+                if tape is not None:
+                    tape.append(self.best_bid, trade_quantity, False)
+
+                bid_quantity = self.buy_book[self.best_bid] - trade_quantity
+                if bid_quantity <= 0:
+                    del self.buy_book[self.best_bid]
+                    del self._queues[True][self.best_bid]
+                    self.best_bid = self.buy_book.peekitem(-1)[0] if len(self.buy_book) > 0 else -np.inf
+                else:
+                    self.buy_book[self.best_bid] = bid_quantity
+
+        self.last_traded_price = last_traded_price
+
+        # Update best prices after trade
+        if is_buy:
+            self.best_ask = self.sell_book.peekitem(0)[0] if len(self.sell_book) > 0 else np.inf
+        else:
+            self.best_bid = self.buy_book.peekitem(-1)[0] if len(self.buy_book) > 0 else -np.inf
+
+        # Calculate imbalance
+        total_volume = self.total_buy_volume + self.total_sell_volume
+        if total_volume > 0:
+            self.imbalance = (self.total_buy_volume - self.total_sell_volume) / total_volume
+        else:
+            self.imbalance = 0
+
+        filled_quantity = quantity - remaining_quantity
+        if remaining_quantity > 0:
+            self._incoming_id = taker_id
+            try:
+                self.make_order(price, remaining_quantity, is_buy)
+            finally:
+                self._incoming_id = None
+        if profile is not None:
+            profile.record_take(levels_walked, time.perf_counter() - started)
+        return filled_quantity, filled_notional
+
+    def _remove_order(self, order):
+        """
+        Take a resting order out of its queue, the index and the aggregate book
+
+        Returns:
+            Whether its price level emptied
+        """
+        level = self._queues[order.is_buy][order.price]
+        level.unlink(order)
+        del self.orders[order.order_id]
+        book = self.buy_book if order.is_buy else self.sell_book
+        remaining = book[order.price] - order.quantity
+        if remaining > 0:
+            book[order.price] = remaining
+            return False
+        del book[order.price]
+        del self._queues[order.is_buy][order.price]
+        return True
+
+    def cancel_order(self, order_id):
+        """
+        Cancel a resting order
+
+        Returns:
+            The quantity cancelled (0 if the order is not resting)
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return 0
+        self._remove_order(order)
+        if order.is_buy:
+            self._account_removal(order.quantity, 0)
+        else:
+            self._account_removal(0, order.quantity)
+        return order.quantity
+
+    def modify_order(self, order_id, quantity=None, price=None):
+        """
+        Change a resting order's quantity and/or price
+
+        Reducing the quantity keeps the order's place in its queue. A larger quantity or
+        a new price re-places it under the same ID at the back of the queue, where it may
+        cross the book. A quantity of zero or less cancels it.
+
+        Returns:
+            Whether the order was resting
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return False
+        quantity = order.quantity if quantity is None else quantity
+        price = order.price if price is None else price
+        if quantity <= 0:
+            self.cancel_order(order_id)
+        elif price == order.price and quantity <= order.quantity:
+            reduction = order.quantity - quantity
+            if reduction > 0:
+                order.quantity = quantity
+                book = self.buy_book if order.is_buy else self.sell_book
+                book[price] -= reduction
+                if order.is_buy:
+                    self._account_removal(reduction, 0)
+                else:
+                    self._account_removal(0, reduction)
+        else:
+            self.cancel_order(order_id)
+            self.place_order(price, quantity, order.is_buy, order_id=order_id)
+        return True
+
+    def queue(self, price, is_buy):
+        """Orders resting at price on one side, in priority order"""
+        level = self._queues[is_buy].get(price)
+        return list(level) if level is not None else []
+
+    def drain_fills(self):
+        """Return the fills recorded since the last call and forget them"""
+        fills, self.fills = self.fills, []
+        return fills
+
+    def _reset_arrivals(self):
+        """Restart TTL tracking with every resting order as placed in the current step"""
+        if self.order_ttl is None:
+            self._arrivals = None
+            return
+        self._arrivals = deque((self.depth_step, order) for order in self.orders.values())
+
+    def _expire_orders(self, last_expiring):
+        """Cancel the orders placed up to step last_expiring that still rest"""
+        removed = {True: 0, False: 0}
+        levels = 0
+        arrivals = self._arrivals
+        while arrivals and arrivals[0][0] <= last_expiring:
+            order = arrivals.popleft()[1]
+            # Filled, cancelled or re-placed orders are skipped
+            if self.orders.get(order.order_id) is order:
+                removed[order.is_buy] += order.quantity
+                levels += self._remove_order(order)
+        return levels, removed[True], removed[False]
+
+    def _evict_levels(self, is_buy, max_levels, bound):
+        """Remove far levels and every order queued at them"""
+        book = self.buy_book if is_buy else self.sell_book
+        far_end = 0 if is_buy else -1
+        levels = 0
+        quantity = 0
+        while len(book) > 0:
+            price, level_quantity = book.peekitem(far_end)
+            beyond = bound is not None and (price < bound if is_buy else price > bound)
+            if not beyond and (max_levels is None or len(book) <= max_levels):
+                break
+            book.popitem(far_end)
+            for order in self._queues[is_buy].pop(price):
+                del self.orders[order.order_id]
+            levels += 1
+            quantity += level_quantity
+        return levels, quantity
+
+    def _load_levels(self, buy_prices, buy_quantities, sell_prices, sell_quantities):
+        """Restore aggregate levels, each as a single order with a new ID"""
+        super()._load_levels(buy_prices, buy_quantities, sell_prices, sell_quantities)
+        self.orders.clear()
+        self._queues = {True: {}, False: {}}
+        for is_buy, book in ((True, self.buy_book), (False, self.sell_book)):
+            for price, quantity in book.items():
+                order = Order(self._new_id(), price, quantity, is_buy)
+                self.orders[order.order_id] = order
+                level = self._queues[is_buy][price] = PriceLevel()
+                level.append(order)
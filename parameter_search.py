@@ -0,0 +1,180 @@
+"""
+Parameter Search
+
+Searches over the full three-dimensional market parameter space. Successive halving
+first scores every candidate on a short prefix of the optimization window; only the
+best 1/eta of them are promoted to the next rung, which uses an eta times longer
+prefix, until the survivors are scored on the whole window. The warm-start search
+re-calibrates overlapping sliding windows around the previous window's best.
+"""
+
+import numpy as np
+
+PARAMETER_RANGES = {
+    'trader_activity_rate': (0.2, 2.0),
+    'proportion_maker': (0.1, 0.9),
+    'price_range_percent': (0.0001, 0.03)  # 0.01% to 3.00%
+}
+
+def parameter_space(num_candidates, seed=None):
+    """
+    Latin hypercube sample of the market parameter space
+
+    Each parameter takes every point of the same linspace grid as parameter_grid once,
+    but the three axes are shuffled independently, so the candidates spread over the
+    whole space instead of lying on its diagonal.
+
+    Args:
+        num_candidates: Number of parameter sets
+        seed: Optional seed making the sample reproducible
+
+    Returns:
+        List of parameter dicts
+    """
+    rng = np.random.default_rng(seed)
+    axes = {}
+    for name, (low, high) in PARAMETER_RANGES.items():
+        axes[name] = rng.permutation(np.linspace(low, high, num_candidates))
+    return [{name: values[i] for name, values in axes.items()} for i in range(num_candidates)]
+
+def halving_schedule(num_candidates, max_bars, min_bars=5, eta=3):
+    """
+    Rungs of a successive-halving search
+
+    Returns:
+        List of (candidates, bars) per rung: how many candidates are scored on a prefix
+        of how many bars. The last rung always uses max_bars.
+    """
+    min_bars = min(min_bars, max_bars)
+    num_rungs = 1
+    while (max_bars // eta ** num_rungs >= min_bars
+           and num_candidates // eta ** num_rungs >= 1):
+        num_rungs += 1
+
+    schedule = []
+    for rung in range(num_rungs):
+        bars = max(min_bars, max_bars // eta ** (num_rungs - 1 - rung))
+        schedule.append((max(1, num_candidates // eta ** rung), bars))
+    return schedule
+
+def successive_halving(evaluate, candidates, max_bars, min_bars=5, eta=3):
+    """
+    Find the candidate with the lowest score by successive halving
+
+    Args:
+        evaluate: Function evaluate(params, bars) scoring a candidate on the first bars
+            bars of the window (lower is better)
+        candidates: List of parameter dicts
+        max_bars: Length of the full window
+        min_bars: Prefix length of the first rung
+        eta: Promotion ratio; the best 1/eta of each rung survive
+
+    Returns:
+        Dict with the best 'params', its full-window 'score', and the 'simulations' and
+        'bar_steps' spent
+    """
+    survivors = list(candidates)
+    simulations = 0
+    bar_steps = 0
+    for keep, bars in halving_schedule(len(survivors), max_bars, min_bars, eta):
+        if len(survivors) > keep:
+            # Stable sort keeps the earlier candidate on ties, as the grid search does
+            order = sorted(range(len(survivors)), key=scores.__getitem__)
+            survivors = [survivors[i] for i in order[:keep]]
+        scores = [evaluate(params, bars) for params in survivors]
+        simulations += len(survivors)
+        bar_steps += len(survivors) * bars
+
+    best = int(np.argmin(scores))
+    return {
+        'params': survivors[best],
+        'score': scores[best],
+        'simulations': simulations,
+        'bar_steps': bar_steps
+    }
+
+def neighborhood(params, count, radius=0.1, rng=None):
+    """
+    Parameter sets around params: params itself, then count - 1 uniform perturbations of
+    up to radius times each parameter's range, clipped to PARAMETER_RANGES
+    """
+    rng = np.random.default_rng(rng)
+    candidates = [dict(params)]
+    for _ in range(count - 1):
+        candidate = {}
+        for name, (low, high) in PARAMETER_RANGES.items():
+            step = rng.uniform(-radius, radius) * (high - low)
+            candidate[name] = float(np.clip(params[name] + step, low, high))
+        candidates.append(candidate)
+    return candidates
+
+class WarmStartSearch:
+    """
+    Search that carries its best parameters from one sliding window to the next
+
+    Each window first searches a small neighborhood of the previous window's best
+    parameters. A drift detector compares that local best with a moving average of
+    the accepted best scores; if it is more than drift_ratio times worse, the regime is
+    taken to have changed and the wide candidate set is searched as well.
+    """
+
+    def __init__(self, wide_candidates, local_count, radius=0.1, drift_ratio=1.5, smoothing=0.3, seed=None):
+        """
+        Args:
+            wide_candidates: Parameter sets searched on the first window and on drift
+            local_count: Number of parameter sets in each local search
+            radius: Size of the neighborhood as a fraction of each parameter's range
+            drift_ratio: Local best score, relative to the moving average of accepted
+                scores, above which the wide search is run
+            smoothing: Weight of the newest window in the moving average of scores
+            seed: Seed of the neighborhood perturbations
+        """
+        self.wide_candidates = list(wide_candidates)
+        self.local_count = local_count
+        self.radius = radius
+        self.drift_ratio = drift_ratio
+        self.smoothing = smoothing
+        self.rng = np.random.default_rng(seed)
+        self.best_params = None
+        self.reference_score = None
+        self.windows = 0
+        self.fallbacks = 0
+
+    def search(self, evaluate):
+        """
+        Search one window
+
+        Args:
+            evaluate: Function evaluate(params, abort_score) scoring a candidate on the
+                window (lower is better); it may return inf once the score can no longer
+                beat abort_score
+
+        Returns:
+            Dict with the best 'params', its 'score', the 'simulations' run and whether
+            the wide search 'fallback' ran
+        """
+        best_params, best_score, simulations = None, np.inf, 0
+
+        def run(candidates):
+            nonlocal best_params, best_score, simulations
+            for params in candidates:
+                score = evaluate(params, best_score)
+                simulations += 1
+                if score < best_score:
+                    best_params, best_score = params, score
+
+        fallback = self.best_params is None
+        if not fallback:
+            run(neighborhood(self.best_params, self.local_count, self.radius, self.rng))
+            fallback = bool(best_score > self.drift_ratio * self.reference_score)
+            self.fallbacks += fallback
+        if fallback:
+            run(self.wide_candidates)
+
+        self.windows += 1
+        self.best_params = best_params
+        if self.reference_score is None:
+            self.reference_score = best_score
+        else:
+            self.reference_score += self.smoothing * (best_score - self.reference_score)
+        return {'params': best_params, 'score': best_score, 'simulations': simulations, 'fallback': fallback}
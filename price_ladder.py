@@ -0,0 +1,367 @@
+"""
+Array-backed Order Book
+
+Integer tick price ladder alternative to the dict-backed OrderBook. Resting quantity
+lives in two contiguous NumPy arrays indexed by tick offset from a reference price,
+so a taker sweep is a slice walk over the ladder instead of repeated dict lookups.
+"""
+
+import time
+import numpy as np
+from market_model import OrderBook
+
+class LadderSide:
+    """Read-only dict-like view (price -> quantity) of one side of a PriceLadderOrderBook"""
+
+    def __init__(self, book, is_buy):
+        self._book = book
+        self._is_buy = is_buy
+
+    def _levels(self):
+        return self._book._buy_qty if self._is_buy else self._book._sell_qty
+
+    def __len__(self):
+        return self._book._buy_levels if self._is_buy else self._book._sell_levels
+
+    def __getitem__(self, price):
+        index = int(price) - self._book._origin
+        levels = self._levels()
+        if 0 <= index < len(levels) and levels[index] > 0:
+            return int(levels[index])
+        raise KeyError(price)
+
+    def __contains__(self, price):
+        index = int(price) - self._book._origin
+        levels = self._levels()
+        return 0 <= index < len(levels) and levels[index] > 0
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, price, default=None):
+        try:
+            return self[price]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """Occupied price levels in ascending order"""
+        return (np.flatnonzero(self._levels()) + self._book._origin).tolist()
+
+    def values(self):
+        levels = self._levels()
+        return levels[levels > 0].tolist()
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+class PriceLadderOrderBook(OrderBook):
+    """Order book storing resting quantity in fixed integer-tick NumPy ladders"""
+
+    backend = 'ladder'
+
+    def __init__(self, capacity=1024, reference_price=0):
+        super().__init__()
+        self._capacity = capacity
+        self._origin = int(reference_price) - capacity // 2
+        self._buy_qty = np.zeros(capacity, dtype=np.int64)
+        self._sell_qty = np.zeros(capacity, dtype=np.int64)
+        self._buy_levels = 0
+        self._sell_levels = 0
+        self.buy_book = LadderSide(self, True)
+        self.sell_book = LadderSide(self, False)
+
+    def _level_arrays(self, is_buy):
+        """(prices, quantities) arrays of one side's occupied ticks in ascending price order"""
+        levels = self._buy_qty if is_buy else self._sell_qty
+        occupied = np.flatnonzero(levels)
+        return occupied + self._origin, levels[occupied]
+
+    def _load_levels(self, buy_prices, buy_quantities, sell_prices, sell_quantities):
+        """Replace both sides of the ladder with the given level arrays"""
+        self._buy_qty.fill(0)
+        self._sell_qty.fill(0)
+        self._buy_levels = len(buy_prices)
+        self._sell_levels = len(sell_prices)
+        if len(buy_prices) == 0 and len(sell_prices) == 0:
+            return
+
+        ticks = np.concatenate((buy_prices, sell_prices)).astype(np.int64)
+        low, high = int(ticks.min()), int(ticks.max())
+        if low < self._origin or high >= self._origin + self._capacity:
+            self._recenter(low, high)
+        self._buy_qty[ticks[:len(buy_prices)] - self._origin] = buy_quantities
+        self._sell_qty[ticks[len(buy_prices):] - self._origin] = sell_quantities
+
+    def _tick_index(self, price):
+        """Ladder index for an integer price, recentering the ladder if it falls outside"""
+        tick = int(price)
+        if tick != price:
+            raise ValueError(f"PriceLadderOrderBook only accepts integer tick prices, got {price}")
+        index = tick - self._origin
+        if index < 0 or index >= self._capacity:
+            self._recenter(tick)
+            index = tick - self._origin
+        return index
+
+    def _recenter(self, low, high=None):
+        """Move (and grow if needed) the ladder so it covers [low, high] and all resting levels"""
+        occupied = np.flatnonzero((self._buy_qty > 0) | (self._sell_qty > 0))
+        high = low if high is None else high
+        if occupied.size > 0:
+            low = min(low, self._origin + int(occupied[0]))
+            high = max(high, self._origin + int(occupied[-1]))
+
+        capacity = self._capacity
+        while high - low + 1 > capacity // 2:
+            capacity *= 2
+        origin = (low + high) // 2 - capacity // 2
+
+        buy_qty = np.zeros(capacity, dtype=np.int64)
+        sell_qty = np.zeros(capacity, dtype=np.int64)
+        if occupied.size > 0:
+            first, last = int(occupied[0]), int(occupied[-1]) + 1
+            shift = self._origin - origin
+            buy_qty[first + shift:last + shift] = self._buy_qty[first:last]
+            sell_qty[first + shift:last + shift] = self._sell_qty[first:last]
+
+        self._capacity = capacity
+        self._origin = origin
+        self._buy_qty = buy_qty
+        self._sell_qty = sell_qty
+
+    def _lowest_ask(self, start=0):
+        """Lowest occupied ask at or above ladder index start, or inf"""
+        width = 64
+        while start < self._capacity:
+            occupied = np.flatnonzero(self._sell_qty[start:start + width])
+            if occupied.size > 0:
+                return self._origin + start + int(occupied[0])
+            start += width
+            width *= 2
+        return np.inf
+
+    def _highest_bid(self, stop=None):
+        """Highest occupied bid below ladder index stop, or -inf"""
+        stop = self._capacity if stop is None else stop
+        width = 64
+        while stop > 0:
+            begin = max(stop - width, 0)
+            occupied = np.flatnonzero(self._buy_qty[begin:stop])
+            if occupied.size > 0:
+                return self._origin + begin + int(occupied[-1])
+            stop = begin
+            width *= 2
+        return -np.inf
+
+    def _remove_quantity(self, price, quantity, is_buy):
+        """Take quantity off a resting tick, freeing the level when it empties"""
+        index = int(price) - self._origin
+        levels = self._buy_qty if is_buy else self._sell_qty
+        levels[index] -= quantity
+        if levels[index] <= 0:
+            levels[index] = 0
+            if is_buy:
+                self._buy_levels -= 1
+            else:
+                self._sell_levels -= 1
+
+    def _evict_levels(self, is_buy, max_levels, bound):
+        """
+        Remove one side's ticks priced beyond bound or past the max_levels nearest the touch
+
+        Returns:
+            (number of levels, quantity) removed
+        """
+        levels = self._buy_qty if is_buy else self._sell_qty
+        occupied = np.flatnonzero(levels)
+        if is_buy:
+            occupied = occupied[::-1]  # nearest the touch first
+        far = np.zeros(len(occupied), dtype=bool)
+        if max_levels is not None:
+            far[max_levels:] = True
+        if bound is not None:
+            prices = occupied + self._origin
+            far |= prices < bound if is_buy else prices > bound
+        evicted = occupied[far]
+        if evicted.size == 0:
+            return 0, 0
+        quantity = int(levels[evicted].sum())
+        levels[evicted] = 0
+        if is_buy:
+            self._buy_levels -= evicted.size
+        else:
+            self._sell_levels -= evicted.size
+        return int(evicted.size), quantity
+
+    def _refresh_best_prices(self):
+        """Recompute the best bid and ask from the ladder"""
+        self.best_bid = self._highest_bid() if self._buy_levels > 0 else -np.inf
+        self.best_ask = self._lowest_ask() if self._sell_levels > 0 else np.inf
+
+    @staticmethod
+    def _sweep(levels, quantity):
+        """
+        Consume up to quantity from a ladder slice in walk order
+
+        Returns:
+            (traded quantity, position of the last level traded or -1, number of levels
+            emptied, sum of position * quantity traded there)
+        """
+        cumulative = np.cumsum(levels)
+        filled = int(np.searchsorted(cumulative, quantity))
+        if filled < len(levels):
+            emptied = int(np.count_nonzero(levels[:filled]))
+            partial = quantity - (int(cumulative[filled - 1]) if filled > 0 else 0)
+            weighted = int(np.dot(np.arange(filled), levels[:filled])) + filled * partial
+            levels[:filled] = 0
+            levels[filled] -= partial
+            if levels[filled] == 0:
+                emptied += 1
+            return quantity, filled, emptied, weighted
+
+        occupied = np.flatnonzero(levels)
+        if occupied.size == 0:
+            return 0, -1, 0, 0
+        weighted = int(np.dot(np.arange(len(levels)), levels))
+        levels[:] = 0
+        return int(cumulative[-1]), int(occupied[-1]), int(occupied.size), weighted
+
+    def _tape_fills(self, before, after, first_price, direction, is_buy):
+        """Record a sweep's fills on the tape, one per level in walk order"""
+        traded = before - after
+        walked = np.flatnonzero(traded)
+        self.tape.extend(first_price + direction * walked, traded[walked], np.full(len(walked), is_buy))
+
+    def take_order(self, price, quantity, is_buy):
+        """
+        Execute a market order by sweeping the opposite side of the ladder
+
+        Returns:
+            (filled quantity, filled notional) of the fills against resting orders
+        """
+        profile = self.profile
+        if profile is not None:
+            started = time.perf_counter()
+        remaining_quantity = quantity
+        last_traded_price = self.last_traded_price
+        filled_notional = 0
+        levels_walked = 0
+
+        if is_buy:  # Buy order taking from sell book
+            if self._sell_levels > 0 and price >= self.best_ask:
+                start = int(self.best_ask) - self._origin
+                stop = min(int(np.floor(price)) - self._origin + 1, self._capacity)
+                levels = self._sell_qty[start:stop]
+                resting = levels.copy() if self.tape is not None else None
+                traded, position, emptied, weighted = self._sweep(levels, remaining_quantity)
+                if resting is not None:
+                    self._tape_fills(resting, levels, self._origin + start, 1, True)
+                levels_walked = emptied + (position >= 0 and levels[position] > 0)
+                remaining_quantity -= traded
+                self._sell_levels -= emptied
+                filled_notional = (self._origin + start) * traded + weighted
+
+                self.total_buy_volume += traded  # Buy volume increases
+                self.total_sell_volume -= traded  # Sell volume decreases
+                if position >= 0:
+                    last_traded_price = self._origin + start + position
+                self.best_ask = self._lowest_ask(start)
+            elif self._sell_levels == 0:
+                self.best_ask = np.inf
+        else:  # Sell order taking from buy book
+            if self._buy_levels > 0 and price >= self.best_bid:
+                stop = int(self.best_bid) - self._origin + 1
+                levels = self._buy_qty[stop - 1::-1]
+                resting = levels.copy() if self.tape is not None else None
+                traded, position, emptied, weighted = self._sweep(levels, remaining_quantity)
+                if resting is not None:
+                    self._tape_fills(resting, levels, self._origin + stop - 1, -1, False)
+                levels_walked = emptied + (position >= 0 and levels[position] > 0)
+                remaining_quantity -= traded
+                self._buy_levels -= emptied
+                filled_notional = (self._origin + stop - 1) * traded - weighted
+
+                self.total_sell_volume -= traded  # Sell volume decreases
+                if position >= 0:
+                    last_traded_price = self._origin + stop - 1 - position
+                self.best_bid = self._highest_bid(stop)
+            elif self._buy_levels == 0:
+                self.best_bid = -np.inf
+
+        self.last_traded_price = last_traded_price
+
+        # Calculate imbalance
+        total_volume = self.total_buy_volume + self.total_sell_volume
+        if total_volume > 0:
+            self.imbalance = (self.total_buy_volume - self.total_sell_volume) / total_volume
+        else:
+            self.imbalance = 0
+
+        filled_quantity = quantity - remaining_quantity
+        if remaining_quantity > 0:
+            self.make_order(price, remaining_quantity, is_buy)
+        if profile is not None:
+            profile.record_take(int(levels_walked), time.perf_counter() - started)
+        return filled_quantity, filled_notional
+
+    def _rest_aggregated(self, prices, quantities, is_buy):
+        """Add non-crossing orders to the ladder with one scatter-add per side"""
+        ticks = prices.astype(np.int64)
+        if not np.array_equal(ticks, prices):
+            raise ValueError("PriceLadderOrderBook only accepts integer tick prices")
+        low, high = int(ticks.min()), int(ticks.max())
+        if low < self._origin or high >= self._origin + self._capacity:
+            self._recenter(low, high)
+        indices = ticks - self._origin
+
+        for side_is_buy in (True, False):
+            mask = is_buy if side_is_buy else ~is_buy
+            if not mask.any():
+                continue
+            side_indices = indices[mask]
+            side_quantities = quantities[mask]
+            levels = self._buy_qty if side_is_buy else self._sell_qty
+            touched = np.unique(side_indices)
+            new_levels = int(np.count_nonzero(levels[touched] == 0))
+            np.add.at(levels, side_indices, side_quantities)
+            if side_is_buy:
+                self._buy_levels += new_levels
+                self.total_buy_volume += side_quantities.sum().item()
+                top = self._origin + int(touched[-1])
+                if top > self.best_bid:
+                    self.best_bid = top
+            else:
+                self._sell_levels += new_levels
+                self.total_sell_volume += side_quantities.sum().item()
+                bottom = self._origin + int(touched[0])
+                if bottom < self.best_ask:
+                    self.best_ask = bottom
+            if self._arrivals is not None:
+                level_quantities = np.zeros(len(touched), dtype=np.int64)
+                np.add.at(level_quantities, np.searchsorted(touched, side_indices), side_quantities)
+                for index, quantity in zip(touched.tolist(), level_quantities.tolist()):
+                    self._record_arrival(self._origin + index, quantity, side_is_buy)
+
+    def make_order(self, price, quantity, is_buy):
+        """Add a limit order to the ladder"""
+        index = self._tick_index(price)
+        if is_buy:
+            if self._buy_qty[index] == 0:
+                self._buy_levels += 1
+            self._buy_qty[index] += quantity
+            self.total_buy_volume += quantity
+            if price > self.best_bid:
+                self.best_bid = price
+        else:
+            if self._sell_qty[index] == 0:
+                self._sell_levels += 1
+            self._sell_qty[index] += quantity
+            self.total_sell_volume += quantity
+            if price < self.best_ask:
+                self.best_ask = price
+        if self._arrivals is not None:
+            self._record_arrival(price, quantity, is_buy)
@@ -0,0 +1,100 @@
+"""
+Simulation Profiling
+
+Counters and per-phase timings collected by an instrumented MarketSimulator and its
+OrderBook. Profiling is off unless a SimulationProfile is attached with
+MarketSimulator.enable_profiling; detached, the hot paths only test for None.
+"""
+
+import pandas as pd
+
+PHASES = ('orders', 'matching', 'price_update', 'record_trade')
+
+class SimulationProfile:
+    """
+    Cumulative counters of profiled simulation steps
+
+    Phases: 'orders' is trader order generation and placement (including matching),
+    'matching' is the time inside take_order, 'price_update' the price model and
+    'record_trade' the trade history update (and any order book depth enforcement).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_calls = dict.fromkeys(PHASES, 0)
+        self.steps = 0
+        self.orders_placed = 0
+        self.orders_crossed = 0
+        self.levels_walked = 0
+        self.max_levels_walked = 0
+        self.max_buy_depth = 0
+        self.max_sell_depth = 0
+
+    def record_take(self, levels, seconds):
+        """Count one take_order that walked `levels` price levels"""
+        self.orders_crossed += 1
+        self.levels_walked += levels
+        if levels > self.max_levels_walked:
+            self.max_levels_walked = levels
+        self.phase_seconds['matching'] += seconds
+        self.phase_calls['matching'] += 1
+
+    def record_step(self, order_seconds, price_seconds, record_seconds, buy_depth, sell_depth):
+        """Count one simulation step and the book depth after it"""
+        self.steps += 1
+        for phase, seconds in (('orders', order_seconds), ('price_update', price_seconds),
+                               ('record_trade', record_seconds)):
+            self.phase_seconds[phase] += seconds
+            self.phase_calls[phase] += 1
+        if buy_depth > self.max_buy_depth:
+            self.max_buy_depth = buy_depth
+        if sell_depth > self.max_sell_depth:
+            self.max_sell_depth = sell_depth
+
+    def to_dict(self):
+        """Flat dict of the counters (phase timings as <phase>_seconds and <phase>_calls)"""
+        result = {
+            'steps': self.steps,
+            'orders_placed': self.orders_placed,
+            'orders_crossed': self.orders_crossed,
+            'levels_walked': self.levels_walked,
+            'levels_per_take': self.levels_walked / self.orders_crossed if self.orders_crossed else 0.0,
+            'max_levels_walked': self.max_levels_walked,
+            'max_buy_depth': self.max_buy_depth,
+            'max_sell_depth': self.max_sell_depth
+        }
+        for phase in PHASES:
+            result[f"{phase}_seconds"] = self.phase_seconds[phase]
+            result[f"{phase}_calls"] = self.phase_calls[phase]
+        return result
+
+    @classmethod
+    def from_dict(cls, counters):
+        """Rebuild a profile from to_dict output (e.g. sent back by a worker process)"""
+        profile = cls()
+        profile.merge(counters)
+        return profile
+
+    def merge(self, other):
+        """Add another profile (or its to_dict output) into this one"""
+        counters = other.to_dict() if isinstance(other, SimulationProfile) else other
+        for phase in PHASES:
+            self.phase_seconds[phase] += counters[f"{phase}_seconds"]
+            self.phase_calls[phase] += counters[f"{phase}_calls"]
+        self.steps += counters['steps']
+        self.orders_placed += counters['orders_placed']
+        self.orders_crossed += counters['orders_crossed']
+        self.levels_walked += counters['levels_walked']
+        self.max_levels_walked = max(self.max_levels_walked, counters['max_levels_walked'])
+        self.max_buy_depth = max(self.max_buy_depth, counters['max_buy_depth'])
+        self.max_sell_depth = max(self.max_sell_depth, counters['max_sell_depth'])
+        return self
+
+def profiles_to_dataframe(profiles):
+    """DataFrame with one row per profile (SimulationProfile or to_dict output), e.g. per window"""
+    return pd.DataFrame([profile.to_dict() if isinstance(profile, SimulationProfile) else profile
+                         for profile in profiles])
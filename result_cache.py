@@ -0,0 +1,240 @@
+"""
+Simulation Result Cache
+
+Memoizes the results of seeded simulations, keyed by a hash of the window's price
+arrays, the parameters, the trader count, the seed and the version of the simulation
+code. Results live in an in-memory LRU tier backed by a size-bounded on-disk tier, so
+rerunning an unchanged experiment reads its results instead of simulating again.
+Only simulations that are a pure function of the key (fresh simulators built from a
+seed) can be cached.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import numpy as np
+
+_model_version = None
+
+def _model_sources():
+    """Source files the cached results depend on: market_model, every order book backend and scoring"""
+    from market_model import ORDER_BOOK_BACKENDS
+    # Cached RMSEs come from scoring.rmse, so the scoring code is part of the version too
+    modules = ['market_model', 'scoring'] + [module for module, _ in ORDER_BOOK_BACKENDS.values()]
+    return [module + '.py' for module in dict.fromkeys(modules)]
+
+def model_version():
+    """Hash of the simulation source code; any change to it invalidates cached results"""
+    global _model_version
+    if _model_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in _model_sources():
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+        _model_version = digest.hexdigest()[:16]
+    return _model_version
+
+class ResultCache:
+    """
+    Two-tier memoization cache of simulation results
+
+    Values are NumPy arrays (or scalars). A ResultCache pickles as its settings, so a
+    worker process gets its own memory tier on the same disk tier.
+    """
+
+    def __init__(self, cache_dir='.result_cache', memory_items=4096, disk_bytes=256 << 20, version=None):
+        """
+        Args:
+            cache_dir: Directory of the disk tier, or None for a memory-only cache
+            memory_items: Number of results kept in memory
+            disk_bytes: Size the disk tier is trimmed to, least recently used first
+            version: Code version the results belong to (default model_version())
+        """
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.version = version if version is not None else model_version()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'partial_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._memory = OrderedDict()
+        self._disk_size = None
+        if cache_dir is not None:
+            self._open_disk()
+
+    def __getstate__(self):
+        return {'cache_dir': self.cache_dir, 'memory_items': self.memory_items,
+                'disk_bytes': self.disk_bytes, 'version': self.version}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _open_disk(self):
+        """Create the disk tier, emptying it if it holds results of another code version"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        version_path = os.path.join(self.cache_dir, 'VERSION')
+        try:
+            with open(version_path) as f:
+                stored = f.read().strip()
+        except OSError:
+            stored = None
+        if stored != self.version:
+            for path, _, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            temp_path = f"{version_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                f.write(self.version)
+            os.replace(temp_path, version_path)
+
+    def _disk_entries(self):
+        """(path, size, last use) of every result file on disk"""
+        entries = []
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npy') and '.tmp' not in name:
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    def key(self, arrays, params, num_traders, seed, **settings):
+        """
+        Cache key of one simulation
+
+        Args:
+            arrays: Price arrays of the window the simulation runs on and is scored against
+            params: Parameter dict
+            num_traders: Number of traders
+            seed: JSON-serializable description of the seed (e.g. entropy and spawn key)
+            settings: Any other setting the result depends on (backend, ...)
+
+        Returns:
+            Hex digest identifying the simulation under the current code version
+        """
+        digest = hashlib.sha256(self.version.encode())
+        for array in arrays:
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+        description = {
+            'params': {name: float(value) for name, value in params.items()},
+            'num_traders': int(num_traders),
+            'seed': seed,
+            'settings': settings
+        }
+        digest.update(json.dumps(description, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key, usable=None):
+        """
+        Cached value of key, or None
+
+        Args:
+            key: Cache key
+            usable: Optional predicate on the value; a value it rejects (e.g. a lower
+                bound the caller still has to simulate past) is returned but counted as
+                a partial hit rather than a hit
+        """
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self._count_hit('memory_hits', value, usable)
+            return value
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            try:
+                value = np.load(path)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                try:
+                    os.utime(path)  # mark as recently used for the disk tier's LRU
+                except OSError:
+                    pass
+                self._count_hit('disk_hits', value, usable)
+                self._remember(key, value)
+                return value
+
+        self.stats['misses'] += 1
+        return None
+
+    def _count_hit(self, tier, value, usable):
+        self.stats[tier if usable is None or usable(value) else 'partial_hits'] += 1
+
+    def put(self, key, value):
+        """Store value under key in both tiers"""
+        value = np.asarray(value)
+        self._remember(key, value)
+        self.stats['stores'] += 1
+        if self.cache_dir is None:
+            return
+
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, value)
+        try:
+            replaced_size = os.path.getsize(path)  # an overwritten entry no longer counts
+        except OSError:
+            replaced_size = 0
+        os.replace(temp_path, path)
+        if self._disk_size is None:
+            self._disk_size = sum(size for _, size, _ in self._disk_entries())
+        else:
+            self._disk_size += os.path.getsize(path) - replaced_size
+        if self._disk_size > self.disk_bytes:
+            self._trim_disk()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        """Delete least recently used result files until the disk tier is 90% of its budget"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = self.disk_bytes * 0.9
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            self.stats['evictions'] += 1
+        self._disk_size = size
+
+    def merge_stats(self, stats):
+        """Add hit/miss counts gathered elsewhere (e.g. by a worker process's copy)"""
+        for name, count in stats.items():
+            self.stats[name] += count
+
+    def hit_rate(self):
+        """Fraction of lookups answered from either tier (partial hits are not answers)"""
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        lookups = hits + self.stats['partial_hits'] + self.stats['misses']
+        return hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Drop every cached result"""
+        self._memory.clear()
+        if self.cache_dir is not None:
+            for path, _, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._disk_size = 0
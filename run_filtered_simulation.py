@@ -4,17 +4,18 @@
 Filtered Market Simulation - Runs simulation during regular trading hours only
 """
 
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import plotly.express as px
 from market_model import MarketSimulator, Trader, OrderBook
 from market_analysis import analyze_data, evaluate_predictions
+from market_data import load_data
 
 def load_and_filter_data(filepath):
     """Load AAPL trading data from CSV and filter for regular trading hours"""
-    df = pd.read_csv(filepath, header=None, names=['timestamp', 'open', 'high', 'low', 'close', 'volume'],
-                    parse_dates=['timestamp'])
+    df = load_data(filepath)
 
     # Filter for regular trading hours (10:01 AM to 3:55 PM)
     df = df[df['timestamp'].dt.time >= pd.Timestamp('10:01').time()]
@@ -47,8 +48,10 @@ def main():
     window_size = 30  # 30 minutes for parameter optimization
     prediction_size = 5  # 5 minutes for prediction
     num_simulations = 50  # Test 50 parameter combinations (reduced for performance)
+    workers = os.cpu_count()  # Spread each window's parameter sweep over all cores
 
-    rmse_results = simulator.run_multiple_simulations(df, window_size, prediction_size, num_simulations)
+    rmse_results = simulator.run_multiple_simulations(df, window_size, prediction_size, num_simulations,
+                                                      workers=workers, seed=42)
 
     # Evaluate results
     print("\nEvaluating simulation results...")
@@ -0,0 +1,143 @@
+"""
+Prediction Scoring
+
+Vectorized error metrics of simulated prices against actual prices. A block of
+predictions (one row per parameter set, one column per bar) is scored against a
+window's actual prices in one pass, and the scores of every parameter set on every
+window are kept in an ErrorSurface for later analysis instead of only the best one.
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = ('rmse', 'mae', 'hit_rate')
+
+def rmse(actual, predicted):
+    """Root mean squared error over the last axis (a scalar for 1-D inputs)"""
+    return np.sqrt(np.mean((np.asarray(actual) - np.asarray(predicted)) ** 2, axis=-1))
+
+def score_block(predictions, actual, reference=None):
+    """
+    RMSE, MAE and directional hit rate of every row of a prediction block
+
+    Args:
+        predictions: (candidates, T) array of simulated prices (or one (T,) run)
+        actual: (T,) actual prices of the window
+        reference: Actual price just before the window (e.g. its first open). The
+            direction of bar t is its move from the actual price of bar t - 1, so
+            without a reference the first bar has no direction and is not counted.
+
+    Returns:
+        Dict of 'rmse', 'mae' and 'hit_rate' arrays with one entry per row (scalars
+        for a 1-D predictions array); the hit rate is the fraction of bars whose
+        predicted move from the previous actual price has the sign of the actual move
+    """
+    predictions = np.asarray(predictions, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    errors = predictions - actual
+    scores = {
+        'rmse': np.sqrt(np.mean(errors ** 2, axis=-1)),
+        'mae': np.mean(np.abs(errors), axis=-1)
+    }
+
+    if reference is None:
+        previous = actual[:-1]
+        predictions, actual = predictions[..., 1:], actual[1:]
+    else:
+        previous = np.concatenate(([reference], actual[:-1]))
+    if actual.shape[-1] == 0:
+        scores['hit_rate'] = np.full(predictions.shape[:-1], np.nan) if predictions.ndim > 1 else np.nan
+    else:
+        hits = np.sign(predictions - previous) == np.sign(actual - previous)
+        scores['hit_rate'] = np.mean(hits, axis=-1)
+    return scores
+
+class ErrorSurface:
+    """
+    Scores of every parameter set on every window, as (n_params, n_windows) arrays
+
+    Entries a sweep did not score in full (e.g. runs stopped by early abort) are nan.
+    """
+
+    def __init__(self, candidates, num_windows):
+        """
+        Args:
+            candidates: List of parameter dicts, one per row
+            num_windows: Number of columns
+        """
+        self.candidates = list(candidates)
+        self.scores = {metric: np.full((len(self.candidates), num_windows), np.nan) for metric in METRICS}
+
+    @property
+    def rmse(self):
+        return self.scores['rmse']
+
+    @property
+    def mae(self):
+        return self.scores['mae']
+
+    @property
+    def hit_rate(self):
+        return self.scores['hit_rate']
+
+    @property
+    def shape(self):
+        return self.scores['rmse'].shape
+
+    def record(self, window, scores, rows=None):
+        """
+        Store a window's scores
+
+        Args:
+            window: Column index
+            scores: Dict of metric -> per-row values (as from score_block); missing
+                metrics stay nan and infinite values (runs that lost) are stored as nan
+            rows: Row indices the values belong to (default: every row)
+        """
+        rows = slice(None) if rows is None else rows
+        for metric, values in scores.items():
+            values = np.asarray(values, dtype=np.float64)
+            self.scores[metric][rows, window] = np.where(np.isfinite(values), values, np.nan)
+
+    def best(self, metric='rmse'):
+        """
+        Row index of the best parameter set of every window (highest hit rate,
+        lowest error otherwise); -1 for windows with no scores
+        """
+        values = self.scores[metric]
+        if metric == 'hit_rate':
+            values = -values
+        scored = ~np.all(np.isnan(values), axis=0)
+        best = np.full(values.shape[1], -1)
+        best[scored] = np.nanargmin(values[:, scored], axis=0)
+        return best
+
+    def to_dataframe(self):
+        """Long DataFrame with one row per (parameter set, window), its parameters and scores"""
+        num_params, num_windows = self.shape
+        frame = pd.DataFrame(self.candidates).loc[np.repeat(np.arange(num_params), num_windows)]
+        frame = frame.reset_index(drop=True)
+        frame.insert(0, 'window', np.tile(np.arange(num_windows), num_params))
+        frame.insert(0, 'candidate', np.repeat(np.arange(num_params), num_windows))
+        for metric in METRICS:
+            frame[metric] = self.scores[metric].ravel()
+        return frame
+
+    def save(self, path):
+        """Write the surface to an .npz file"""
+        names = sorted(self.candidates[0]) if self.candidates else []
+        np.savez(path, parameter_names=np.array(names),
+                 parameters=np.array([[params[name] for name in names] for params in self.candidates],
+                                     dtype=np.float64).reshape(len(self.candidates), len(names)),
+                 **self.scores)
+
+    @classmethod
+    def load(cls, path):
+        """Read a surface written by save"""
+        with np.load(path) as data:
+            names = data['parameter_names'].tolist()
+            candidates = [dict(zip(names, row.tolist())) for row in data['parameters']]
+            surface = cls(candidates, data['rmse'].shape[1])
+            for metric in METRICS:
+                surface.scores[metric] = data[metric].copy()
+        return surface
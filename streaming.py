@@ -0,0 +1,331 @@
+"""
+Streaming Simulation
+
+Online mode of the market simulator: OHLCV bars are fed in one at a time (for example
+from an async replay of the minute-bar CSV), the live order book and parameters carry
+over from bar to bar, and every bar returns a forecast of the next bars' closes.
+Recalibration of the parameters over the recent bars runs on a thread or process pool
+and is only picked up once it has finished, so it never holds up a bar.
+"""
+
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import CancelledError, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import sys
+import time
+import numpy as np
+from market_data import load_bars
+from market_model import MarketSimulator, TraderPopulation, make_order_book, parameter_grid
+import scoring
+
+BAR_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+async def replay_bars(source, speed=None, start=0, stop=None, max_delay=1.0):
+    """
+    Replay minute bars as an async iterator
+
+    Args:
+        source: Path of a minute-bar CSV file (loaded through the columnar cache) or Bars
+        speed: Replay speed as a multiple of real time (e.g. 600 plays a minute bar every
+            0.1s); None replays as fast as the consumer takes the bars
+        start, stop: Range of bars to replay
+        max_delay: Longest wait between two bars in seconds, so overnight and weekend
+            gaps do not stall an accelerated replay
+
+    Yields:
+        One dict per bar with the timestamp (int nanoseconds), open, high, low, close
+        and volume
+    """
+    bars = load_bars(source) if isinstance(source, str) else source
+    stop = len(bars) if stop is None else min(stop, len(bars))
+    columns = [np.asarray(getattr(bars, field)[start:stop]).tolist() for field in BAR_FIELDS]
+
+    loop = asyncio.get_running_loop()
+    scheduled = loop.time()
+    previous = None
+    for values in zip(*columns):
+        bar = dict(zip(BAR_FIELDS, values))
+        if speed is None:
+            await asyncio.sleep(0)
+        else:
+            if previous is not None:
+                # Bars go out on a schedule, so time spent by the consumer is not added on top
+                scheduled += min((bar['timestamp'] - previous) / 1e9 / speed, max_delay)
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+            previous = bar['timestamp']
+        yield bar
+
+def _recalibrate(open_prices, close_prices, candidates, num_traders, backend, seed, depth_limits=None):
+    """
+    Pick the candidate parameters that best explain one window of bars
+
+    Every candidate is simulated over the window in one lockstep ensemble, as in the
+    ensemble sweep of run_multiple_simulations, with the live book's depth_limits (if
+    any) on every market. Module level so a process pool can run it.
+
+    Returns:
+        Dict with the best 'params', their 'rmse' and the window's 'scores'
+
+    Raises:
+        ValueError: If the window has NaN or infinite prices
+    """
+    from ensemble import EnsembleSimulator
+
+    if not (np.all(np.isfinite(open_prices)) and np.all(np.isfinite(close_prices))):
+        raise ValueError("Cannot recalibrate on a window with non-finite prices")
+    sweep = EnsembleSimulator(candidates, num_traders, backend, seed=seed, depth_limits=depth_limits)
+    predictions = sweep.run(open_prices[0], len(open_prices))
+    scores = scoring.score_block(predictions, close_prices, open_prices[0])
+    best = int(np.argmin(scores['rmse']))
+    return {'params': dict(candidates[best]), 'rmse': float(scores['rmse'][best]), 'scores': scores}
+
+class OnlineSimulator:
+    """
+    Bar-by-bar market simulation with forecasts and background recalibration
+
+    Each update advances the live market one step from the bar's open. The forecast
+    runs on a scratch simulator restored from a snapshot of the live order book, so it
+    leaves the live state untouched. Every recalibrate_every bars the last window_size
+    bars are sent to the executor; the parameters it returns are adopted by the first
+    update after it finishes. A recalibration that fails is recorded in
+    recalibration_errors and the current parameters are kept.
+
+    With the thread executor the recalibration shares the interpreter lock with the bar
+    path, which can add a few milliseconds to some bars; the process executor avoids
+    that at the cost of sending each window to another process.
+    """
+
+    def __init__(self, simulator=None, params=None, horizon=5, window_size=30, recalibrate_every=30,
+                 num_simulations=10, executor='thread', num_traders=50, backend='dict', vectorized=True,
+                 seed=None, depth_limits=None):
+        """
+        Args:
+            simulator: Live MarketSimulator to drive (default: a new one created from
+                num_traders, backend, vectorized, seed and depth_limits)
+            params: Starting market parameters (default: the simulator's initial_params)
+            horizon: Number of bars forecast after every bar
+            window_size: Number of recent bars each recalibration fits
+            recalibrate_every: Bars between recalibrations; 0 or None turns them off
+            num_simulations: Number of parameter_grid candidates tried per recalibration
+            executor: 'thread', 'process' or a concurrent.futures.Executor to run the
+                recalibrations on; pools created here are shut down by close
+            num_traders, backend, vectorized, depth_limits: Settings of a new simulator
+            seed: Optional seed making the forecasts and recalibrations reproducible
+        """
+        entropy = seed if seed is not None else np.random.SeedSequence().entropy
+        if simulator is None:
+            simulator = MarketSimulator.create(num_traders, backend, vectorized,
+                                               seed=np.random.SeedSequence(entropy, spawn_key=(0,)),
+                                               depth_limits=depth_limits)
+        self.simulator = simulator
+        self.params = dict(params if params is not None else simulator.initial_params)
+        self.horizon = horizon
+        self.window_size = window_size
+        self.recalibrate_every = recalibrate_every
+        self.candidates = parameter_grid(num_simulations)
+        self._entropy = entropy
+
+        # Scratch simulator of the same kind as the live one, restored in place for every forecast
+        live_book = simulator.order_book
+        forecast_book = make_order_book(live_book.backend)
+        self._depth_limits = live_book.depth_limits() if live_book.depth_limited else None
+        if self._depth_limits is not None:
+            forecast_book.set_depth_limits(**self._depth_limits)
+        self._forecaster = MarketSimulator._build(forecast_book, len(simulator.traders),
+                                                  isinstance(simulator.traders, TraderPopulation),
+                                                  seed=np.random.SeedSequence(entropy, spawn_key=(1,)))
+
+        if executor == 'thread':
+            self.executor, self._owns_executor = ThreadPoolExecutor(max_workers=1), True
+        elif executor == 'process':
+            self.executor, self._owns_executor = ProcessPoolExecutor(max_workers=1), True
+        elif isinstance(executor, Executor):
+            self.executor, self._owns_executor = executor, False
+        else:
+            raise ValueError(f"Unknown executor: {executor!r}")
+
+        self.bars_seen = 0
+        self._opens = deque(maxlen=max(window_size, horizon))
+        self._closes = deque(maxlen=max(window_size, horizon))
+        # (bar index, predictions) of forecasts whose horizon has not yet passed
+        self._pending = deque()
+        self._future = None
+        # Seconds spent in each update, the RMSE of each forecast once its bars are in,
+        # the results of the recalibrations adopted so far and the exceptions of failed ones
+        self.latencies = []
+        self.forecast_rmses = []
+        self.recalibrations = []
+        self.recalibration_errors = []
+        self.recalibrations_started = 0
+
+    def update(self, bar):
+        """
+        Process one bar and forecast the next ones
+
+        Args:
+            bar: Mapping with at least 'open' and 'close' (and optionally 'timestamp')
+
+        Returns:
+            Dict with the bar 'index', 'timestamp', 'close', the live market's simulated
+            'price' for the bar, the forecast 'predictions' of the next horizon closes,
+            the 'params' used and the update's 'latency' in seconds
+        """
+        start = time.perf_counter()
+        self._adopt_recalibration()
+
+        index = self.bars_seen
+        open_price = float(bar['open'])
+        close_price = float(bar['close'])
+        self._opens.append(open_price)
+        self._closes.append(close_price)
+
+        # Score the forecast whose horizon this bar completes
+        if self._pending and self._pending[0][0] + self.horizon == index:
+            _, predicted = self._pending.popleft()
+            actual = np.fromiter(self._closes, dtype=np.float64)[-self.horizon:]
+            self.forecast_rmses.append(float(scoring.rmse(actual, predicted)))
+
+        # Advance the live market one step from the actual open
+        simulator = self.simulator
+        simulator.apply_params(self.params)
+        simulator.order_book.last_traded_price = open_price
+        price = simulator.step(open_price)
+
+        predictions = self._forecast(close_price)
+        self._pending.append((index, predictions))
+        self.bars_seen += 1
+        self._start_recalibration()
+
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        return {
+            'index': index,
+            'timestamp': bar.get('timestamp'),
+            'close': close_price,
+            'price': price,
+            'predictions': predictions,
+            'params': self.params,
+            'latency': latency
+        }
+
+    async def stream(self, bars):
+        """
+        Async generator of update results for an async (or plain) iterable of bars
+
+        Yields control to the event loop after every bar of a plain iterable.
+        """
+        if hasattr(bars, '__aiter__'):
+            async for bar in bars:
+                yield self.update(bar)
+        else:
+            for bar in bars:
+                yield self.update(bar)
+                await asyncio.sleep(0)
+
+    def _forecast(self, close_price):
+        """Simulate the next horizon bars from the close on a copy of the live order book"""
+        forecaster = self._forecaster
+        forecaster.order_book.load_snapshot(self.simulator.order_book.get_snapshot())
+        forecaster.apply_params(self.params)
+        forecaster.order_book.last_traded_price = close_price
+
+        predictions = np.empty(self.horizon)
+        current_price = close_price
+        for t in range(self.horizon):
+            current_price = forecaster.step(current_price)
+            predictions[t] = current_price
+        return predictions
+
+    def _start_recalibration(self):
+        """Submit a recalibration over the recent bars if one is due and none is running"""
+        if not self.recalibrate_every or self._future is not None:
+            return
+        if self.bars_seen < self.window_size or self.bars_seen % self.recalibrate_every:
+            return
+        open_prices = np.fromiter(self._opens, dtype=np.float64)[-self.window_size:]
+        close_prices = np.fromiter(self._closes, dtype=np.float64)[-self.window_size:]
+        seed = np.random.SeedSequence(self._entropy, spawn_key=(2, self.recalibrations_started))
+        self.recalibrations_started += 1
+        try:
+            self._future = self.executor.submit(_recalibrate, open_prices, close_prices, self.candidates,
+                                                len(self.simulator.traders), self.simulator.order_book.backend,
+                                                seed, self._depth_limits)
+        except Exception as error:
+            # e.g. a broken process pool; the bars go on with the current parameters
+            self.recalibration_errors.append(error)
+
+    def _adopt_recalibration(self):
+        """Switch to the parameters of a finished recalibration, without waiting for a running one"""
+        if self._future is None or not self._future.done():
+            return False
+        future, self._future = self._future, None
+        error = CancelledError() if future.cancelled() else future.exception()
+        if error is not None:
+            # A failed fit keeps the current parameters rather than breaking the bar path
+            self.recalibration_errors.append(error)
+            return False
+        result = future.result()
+        self.params = result['params']
+        self.recalibrations.append(result)
+        return True
+
+    def wait_for_recalibration(self, timeout=None):
+        """
+        Block until the running recalibration (if any) finishes and adopt its parameters
+
+        Returns:
+            True if new parameters were adopted
+        """
+        if self._future is not None:
+            wait([self._future], timeout)
+        return self._adopt_recalibration()
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        """Per-bar update latency percentiles in seconds, as {'p50': ..., ...} (nan before any bar)"""
+        if not self.latencies:
+            return {f"p{p:g}": np.nan for p in percentiles}
+        values = np.percentile(self.latencies, percentiles)
+        return {f"p{p:g}": float(value) for p, value in zip(percentiles, values)}
+
+    def close(self):
+        """Shut down an executor created by this simulator"""
+        if self._owns_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+async def run_replay(online, source, speed=None, start=0, stop=None):
+    """Feed a replay of source through online and return the update results"""
+    return [result async for result in online.stream(replay_bars(source, speed, start, stop))]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay minute bars through the online simulator")
+    parser.add_argument('--data', default='AAPL_2024.csv', help="minute-bar CSV file to replay")
+    parser.add_argument('--bars', type=int, default=600, help="number of bars to replay (default 600)")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="replay speed as a multiple of real time (default: as fast as possible)")
+    parser.add_argument('--horizon', type=int, default=5, help="bars forecast after every bar")
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread',
+                        help="where recalibrations run (default thread)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with OnlineSimulator(horizon=args.horizon, executor=args.executor, seed=args.seed) as online:
+        results = asyncio.run(run_replay(online, args.data, args.speed, stop=args.bars))
+        online.wait_for_recalibration()
+
+    print(f"Replayed {len(results)} bars, {online.recalibrations_started} recalibrations started, "
+          f"{len(online.recalibrations)} adopted, {len(online.recalibration_errors)} failed")
+    for name, seconds in online.latency_percentiles().items():
+        print(f"  {name} latency: {seconds * 1e3:.3f} ms")
+    if online.forecast_rmses:
+        print(f"  mean forecast RMSE: {np.mean(online.forecast_rmses):.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
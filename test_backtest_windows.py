@@ -0,0 +1,47 @@
+"""
+Test the zero-copy backtest window index
+"""
+
+import numpy as np
+from market_model import BacktestWindows, MarketSimulator, column_arrays
+from test_parallel_sweep import make_test_data
+
+def test_windows_are_views_matching_iloc():
+    """Window rows are views into the columns with the same rows as df.iloc slicing"""
+    print("Testing backtest window views...")
+
+    df = make_test_data(47)
+    open_prices, close_prices = column_arrays(df, 'open', 'close')
+    windows = BacktestWindows(open_prices, close_prices, 30, 5)
+
+    assert windows.starts.tolist() == [30, 35, 40]
+    assert len(windows) == 3
+    for w, start in enumerate(windows.starts):
+        assert np.array_equal(windows.optimization_open[w], df['open'].iloc[start - 30:start].values)
+        assert np.array_equal(windows.optimization_close[w], df['close'].iloc[start - 30:start].values)
+        assert np.array_equal(windows.prediction_close[w], df['close'].iloc[start:start + 5].values)
+    assert np.shares_memory(windows.optimization_close, close_prices)
+    assert np.shares_memory(windows.prediction_open, open_prices)
+
+    empty = BacktestWindows(open_prices[:20], close_prices[:20], 30, 5)
+    assert len(empty) == 0 and empty.optimization_open.shape == (0, 30)
+
+    print("Backtest window views test passed!")
+
+def test_backtest_accepts_column_dict():
+    """A dict of column arrays backtests the same as the DataFrame it came from"""
+    print("Testing backtest on plain arrays...")
+
+    df = make_test_data()
+    columns = {'open': df['open'].to_numpy(), 'close': df['close'].to_numpy()}
+    simulator = MarketSimulator.create(num_traders=5)
+    from_frame = simulator.run_multiple_simulations(df, 30, 5, 3, workers=1, seed=5)
+    from_arrays = simulator.run_multiple_simulations(columns, 30, 5, 3, workers=1, seed=5)
+
+    assert np.array_equal(from_frame, from_arrays)
+
+    print("Backtest on plain arrays test passed!")
+
+if __name__ == "__main__":
+    test_windows_are_views_matching_iloc()
+    test_backtest_accepts_column_dict()
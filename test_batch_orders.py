@@ -0,0 +1,54 @@
+"""
+Test batch order submission through OrderBook.place_orders
+"""
+
+import numpy as np
+from market_model import OrderBook
+from price_ladder import PriceLadderOrderBook
+from test_price_ladder import book_state
+
+def test_place_orders_matches_loop():
+    """A batch leaves the book exactly as placing the orders one at a time does"""
+    print("Testing place_orders against a place_order loop...")
+
+    for book_class in (OrderBook, PriceLadderOrderBook):
+        batch_book = book_class()
+        loop_book = book_class()
+        rng = np.random.RandomState(5)
+        for _ in range(200):
+            size = rng.randint(1, 80)
+            prices = rng.randint(-2, 121, size)  # includes invalid non-positive prices
+            quantities = rng.randint(0, 41, size)
+            is_buy = rng.random_sample(size) < 0.5
+
+            batch_book.place_orders(prices, quantities, is_buy)
+            for price, quantity, buy in zip(prices.tolist(), quantities.tolist(), is_buy.tolist()):
+                loop_book.place_order(price, quantity, buy)
+            assert book_state(batch_book) == book_state(loop_book)
+
+    print("place_orders matches place_order loop!")
+
+def test_place_orders_fill_statistics():
+    """Fill volume and VWAP are reported for the orders that crossed"""
+    print("Testing place_orders fill statistics...")
+
+    for book_class in (OrderBook, PriceLadderOrderBook):
+        order_book = book_class()
+        stats = order_book.place_orders([99, 100, 95], [10, 5, 7], [False, False, True])
+        assert stats['orders'] == 3
+        assert stats['crossed'] == 0
+        assert stats['volume'] == 0
+        assert np.isnan(stats['vwap'])
+
+        stats = order_book.place_orders([101, 90], [12, 3], [True, True])
+        assert stats['crossed'] == 1
+        assert stats['volume'] == 12
+        assert stats['vwap'] == (10 * 99 + 2 * 100) / 12
+        assert order_book.sell_book[100] == 3
+        assert order_book.last_traded_price == 100
+
+    print("place_orders fill statistics test passed!")
+
+if __name__ == "__main__":
+    test_place_orders_matches_loop()
+    test_place_orders_fill_statistics()
@@ -0,0 +1,64 @@
+"""
+Test the benchmark suite's measurements and baseline comparison
+"""
+
+import json
+import os
+import tempfile
+from benchmarks import (best_of, bench_record_trade, bench_run_multiple_simulations, bench_run_simulation,
+                        bench_take_order_depth, compare_to_baseline, save_baseline)
+
+def test_benchmarks_report_throughput():
+    """Each benchmark reports a positive throughput for every size measured"""
+    print("Testing benchmarks...")
+
+    for backend in ('dict', 'ladder'):
+        rows = bench_take_order_depth((10, 100), num_orders=50, backend=backend)
+        assert [row['depth'] for row in rows] == [10, 100]
+        assert all(row['orders_per_sec'] > 0 for row in rows)
+        assert bench_record_trade(1000, backend=backend)['trades_per_sec'] > 0
+
+    rows = bench_run_simulation((5, 10), num_bars=20)
+    assert [row['traders'] for row in rows] == [5, 10] and rows[0]['bars_per_sec'] > 0
+    rows = bench_run_multiple_simulations((2,), num_windows=1, num_traders=5)
+    assert rows[0]['windows'] == 1 and rows[0]['windows_per_sec'] > 0
+
+    print("Benchmarks test passed!")
+
+def test_compare_flags_regressions():
+    """A slowdown beyond the threshold is flagged against a saved baseline"""
+    print("Testing baseline comparison...")
+
+    baseline = {'a': {'value': 100.0, 'unit': 'ops/sec'}, 'b': {'value': 100.0, 'unit': 'ops/sec'},
+                'gone': {'value': 1.0, 'unit': 'ops/sec'}}
+    current = {'a': {'value': 95.0, 'unit': 'ops/sec'}, 'b': {'value': 80.0, 'unit': 'ops/sec'},
+               'new': {'value': 1.0, 'unit': 'ops/sec'}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'baseline.json')
+        save_baseline(baseline, path)
+        with open(path) as f:
+            saved = json.load(f)
+
+    rows = {row['name']: row for row in compare_to_baseline(current, saved, threshold=0.1)}
+    assert set(rows) == {'a', 'b'}
+    assert not rows['a']['regression']
+    assert rows['b']['regression'] and abs(rows['b']['change'] + 0.2) < 1e-12
+
+    print("Baseline comparison test passed!")
+
+def test_best_of_repeated_timings():
+    """A measurement is the fastest of its timings, each averaged over runs of min_time"""
+    print("Testing best_of...")
+
+    timings = iter([0.5, 0.3, 0.2, 0.4])
+    assert best_of(lambda: next(timings), repeat=3, warmup=1, min_time=0) == 0.2
+    timings = iter([0.02, 0.02, 0.02, 1.0])
+    assert best_of(lambda: next(timings), repeat=1, warmup=0, min_time=0.05) == 0.02
+
+    print("best_of test passed!")
+
+if __name__ == "__main__":
+    test_benchmarks_report_throughput()
+    test_compare_flags_regressions()
+    test_best_of_repeated_timings()
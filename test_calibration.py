@@ -0,0 +1,59 @@
+"""
+Test the surrogate-model calibration
+"""
+
+import numpy as np
+from calibration import calibrate
+from market_model import MarketSimulator
+from test_parallel_sweep import make_test_data
+
+def noisy_bowl(task):
+    """Quadratic bowl around (1.4, 0.3) with small seeded noise"""
+    index, params = task
+    noise = np.random.default_rng(index).normal(0, 0.01)
+    return (params['trader_activity_rate'] - 1.4) ** 2 + (params['proportion_maker'] - 0.3) ** 2 + noise
+
+def test_calibrate_finds_minimum():
+    """The surrogate search lands near the minimum and logs every evaluation"""
+    print("Testing surrogate calibration...")
+
+    result = calibrate(noisy_bowl, max_evaluations=32, seed=0)
+    assert abs(result['params']['trader_activity_rate'] - 1.4) < 0.25
+    assert abs(result['params']['proportion_maker'] - 0.3) < 0.15
+    assert result['evaluations'] == len(result['log']) <= 32
+    assert [entry['evaluation'] for entry in result['log']] == list(range(result['evaluations']))
+    assert all(np.isnan(entry['expected_improvement']) for entry in result['log'][:8])
+
+    parallel = calibrate(noisy_bowl, max_evaluations=16, seed=0, workers=2)
+    assert parallel['log'] == calibrate(noisy_bowl, max_evaluations=16, seed=0)['log']
+
+    print("Surrogate calibration test passed!")
+
+def test_calibrate_stops_when_flat():
+    """A flat objective stops once expected improvement stays negligible"""
+    print("Testing surrogate calibration stopping rule...")
+
+    result = calibrate(lambda task: 1.0, max_evaluations=100, seed=1)
+    assert result['evaluations'] == 8 + 2 * 4
+
+    print("Surrogate calibration stopping rule test passed!")
+
+def test_optimize_parameters_contract():
+    """optimize_parameters still returns the two parameters, and logs its evaluations"""
+    print("Testing optimize_parameters...")
+
+    df = make_test_data(20)
+    simulator = MarketSimulator.create(num_traders=5)
+    params = simulator.optimize_parameters(df, seed=2, max_evaluations=12)
+    assert set(params) == {'trader_activity_rate', 'proportion_maker'}
+    assert 0.1 <= params['trader_activity_rate'] <= 2.0
+    assert 0.1 <= params['proportion_maker'] <= 0.9
+    assert len(simulator.calibration_log) == 12
+    assert params == simulator.optimize_parameters(df, seed=2, max_evaluations=12)
+
+    print("optimize_parameters test passed!")
+
+if __name__ == "__main__":
+    test_calibrate_finds_minimum()
+    test_calibrate_stops_when_flat()
+    test_optimize_parameters_contract()
@@ -0,0 +1,127 @@
+"""
+Test bounded order book depth: level eviction and order expiry
+"""
+
+import numpy as np
+from calibration import CalibrationObjective
+from ensemble import EnsembleSimulator
+from market_model import MarketSimulator, OrderBook
+from price_ladder import PriceLadderOrderBook
+from test_parallel_sweep import make_test_data
+from test_price_ladder import book_state
+
+def test_far_levels_are_evicted():
+    """Levels beyond max_distance or past max_levels go, with volumes and best prices updated"""
+    print("Testing depth eviction...")
+
+    states = []
+    for order_book in (OrderBook(), PriceLadderOrderBook(reference_price=100)):
+        order_book.last_traded_price = 100
+        for price in range(90, 100):
+            order_book.place_order(price, 10, True)
+        for price in range(101, 111):
+            order_book.place_order(price, 20, False)
+        buy_volume, sell_volume = order_book.total_buy_volume, order_book.total_sell_volume
+
+        order_book.set_depth_limits(max_levels=3, max_distance=0.05)
+        assert order_book.enforce_depth() == (14, 7 * 10 + 7 * 20)
+        assert list(order_book.buy_book.keys()) == [97, 98, 99]
+        assert list(order_book.sell_book.keys()) == [101, 102, 103]
+        assert order_book.total_buy_volume == buy_volume - 70
+        assert order_book.total_sell_volume == sell_volume - 140
+        assert order_book.imbalance == (30 - 60) / 90
+        assert order_book.eviction_stats['evicted_levels'] == 14
+
+        # A price move pulls the distance bound past the best bid
+        order_book.last_traded_price = 106
+        assert order_book.enforce_depth() == (3, 30)
+        assert order_book.best_bid == -float('inf') and order_book.best_ask == 101
+        assert order_book.total_buy_volume == 0 and order_book.imbalance == -1
+        states.append(book_state(order_book))
+
+    assert states[0] == states[1]
+
+    print("Depth eviction test passed!")
+
+def test_orders_expire_oldest_first():
+    """TTL expiry removes what is left of each order, fills having taken the oldest first"""
+    print("Testing order expiry...")
+
+    states = []
+    for order_book in (OrderBook(), PriceLadderOrderBook(reference_price=100)):
+        order_book.last_traded_price = 100
+        order_book.set_depth_limits(ttl=2)
+        order_book.place_order(101, 10, False)  # step 0
+        assert order_book.enforce_depth() == (0, 0)
+        order_book.place_order(101, 5, False)  # step 1
+        order_book.place_order(102, 12, True)  # takes all 10 of step 0 and 2 of step 1
+        assert order_book.sell_book[101] == 3
+        assert order_book.enforce_depth() == (0, 0)  # step 0's order has nothing left
+
+        sell_volume = order_book.total_sell_volume
+        assert order_book.enforce_depth() == (1, 3)  # step 1's remaining 3 expire
+        assert len(order_book.sell_book) == 0 and order_book.best_ask == float('inf')
+        assert order_book.total_sell_volume == sell_volume - 3
+        assert order_book.eviction_stats['expired_quantity'] == 3
+        states.append(book_state(order_book))
+
+    assert states[0] == states[1]
+
+    print("Order expiry test passed!")
+
+def test_bounded_sweep():
+    """A long sweep on a depth-limited book keeps the book bounded, serially and with workers"""
+    print("Testing bounded sweep...")
+
+    df = make_test_data(60)
+    limits = {'max_levels': 10, 'max_distance': 0.03, 'ttl': 20}
+    simulator = MarketSimulator.create(num_traders=20, depth_limits=limits)
+    simulator.run_multiple_simulations(df, 30, 5, 4)
+    assert len(simulator.order_book.buy_book) <= 10 and len(simulator.order_book.sell_book) <= 10
+    assert simulator.order_book.eviction_stats['evicted_levels'] > 0
+
+    serial = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=3)
+    parallel = simulator.run_multiple_simulations(df, 30, 5, 4, workers=2, seed=3, parallel='windows')
+    assert serial == parallel
+    assert serial != MarketSimulator.create(num_traders=20).run_multiple_simulations(df, 30, 5, 4, workers=1,
+                                                                                      seed=3)
+
+    try:
+        OrderBook().set_depth_limits(max_levels=0)
+        assert False, "max_levels must be positive"
+    except ValueError:
+        pass
+
+    print("Bounded sweep test passed!")
+
+def test_limits_reach_ensembles_and_calibration():
+    """The ensemble sweep, calibration objective and recalibration all honour the book's limits"""
+    print("Testing depth limits outside the serial sweep...")
+
+    limits = {'max_levels': 5, 'max_distance': 0.02, 'ttl': 10}
+    param_sets = [{'trader_activity_rate': rate, 'proportion_maker': 0.9, 'price_range_percent': 0.05}
+                  for rate in (1.0, 2.0)]
+    ensemble = EnsembleSimulator(param_sets, num_traders=20, seed=5, depth_limits=limits)
+    predictions = ensemble.run(190.0, 80)
+    assert not np.array_equal(predictions, EnsembleSimulator(param_sets, num_traders=20, seed=5).run(190.0, 80))
+    for k, order_book in enumerate(ensemble.order_books):
+        assert len(order_book.buy_book) <= 5 and len(order_book.sell_book) <= 5
+        assert ensemble.total_buy_volume[k] == order_book.total_buy_volume
+        assert ensemble.imbalance[k] == order_book.imbalance
+
+    df = make_test_data(60)
+    limited = MarketSimulator.create(num_traders=20, depth_limits=limits)
+    unlimited = MarketSimulator.create(num_traders=20)
+    assert (limited.run_multiple_simulations(df, 30, 5, 4, seed=3, ensemble=True)
+            != unlimited.run_multiple_simulations(df, 30, 5, 4, seed=3, ensemble=True))
+
+    task = (0, param_sets[1])
+    assert CalibrationObjective(df, 20, seed=3, depth_limits=limits)(task) != CalibrationObjective(df, 20, seed=3)(task)
+
+    print("Depth limits outside the serial sweep test passed!")
+
+if __name__ == "__main__":
+    test_far_levels_are_evicted()
+    test_orders_expire_oldest_first()
+    test_bounded_sweep()
+    test_limits_reach_ensembles_and_calibration()
@@ -0,0 +1,52 @@
+"""
+Test early abort of simulations that can no longer beat the incumbent RMSE
+"""
+
+import numpy as np
+from market_model import MarketSimulator
+from test_parallel_sweep import make_test_data
+
+def test_simulate_aborts_on_partial_rmse():
+    """An aborted run is a prefix of the full run, cut where its squared errors pass the threshold"""
+    print("Testing simulate early abort...")
+
+    df = make_test_data(30)
+    open_prices = df['open'].to_numpy()
+    actual = df['close'].to_numpy()
+    params = {'trader_activity_rate': 1.0, 'proportion_maker': 0.5, 'price_range_percent': 0.01}
+
+    full = MarketSimulator.create(num_traders=5, seed=8).simulate(open_prices, params)
+    unbeatable = MarketSimulator.create(num_traders=5, seed=8).simulate(open_prices, params, actual, np.inf)
+    assert np.array_equal(full, unbeatable)
+
+    abort_rmse = np.sqrt(np.mean((actual - full) ** 2)) / 2
+    aborted = MarketSimulator.create(num_traders=5, seed=8).simulate(open_prices, params, actual, abort_rmse)
+    stop = len(aborted)
+    assert 0 < stop < len(full)
+    assert np.array_equal(aborted, full[:stop])
+    assert np.sum((actual[:stop] - full[:stop]) ** 2) > abort_rmse ** 2 * len(full)
+    assert np.sum((actual[:stop - 1] - full[:stop - 1]) ** 2) <= abort_rmse ** 2 * len(full)
+
+    print("Simulate early abort test passed!")
+
+def test_sweep_results_unchanged_by_abort():
+    """On fresh seeded simulators early abort saves bar-steps without changing any result"""
+    print("Testing sweep with early abort...")
+
+    df = make_test_data(60)
+    simulator = MarketSimulator.create(num_traders=5)
+    full = simulator.run_multiple_simulations(df, 30, 5, 8, workers=1, seed=4, early_abort=False)
+    full_stats = simulator.sweep_stats
+    aborted = simulator.run_multiple_simulations(df, 30, 5, 8, workers=1, seed=4)
+
+    assert np.array_equal(full, aborted)
+    assert full_stats['bar_steps_saved'] == 0
+    assert simulator.sweep_stats['bar_steps_saved'] > 0
+    assert (simulator.sweep_stats['bar_steps'] + simulator.sweep_stats['bar_steps_saved']
+            == full_stats['bar_steps'])
+
+    print("Sweep with early abort test passed!")
+
+if __name__ == "__main__":
+    test_simulate_aborts_on_partial_rmse()
+    test_sweep_results_unchanged_by_abort()
@@ -0,0 +1,51 @@
+"""
+Test the lockstep ensemble simulator
+"""
+
+import numpy as np
+import pandas as pd
+from market_model import OrderBook, MarketSimulator
+from ensemble import EnsembleSimulator
+
+def test_ensemble_run():
+    """K markets produce a (K, T) matrix and keep per-market state in arrays"""
+    print("Testing EnsembleSimulator...")
+
+    param_sets = [{'trader_activity_rate': rate, 'proportion_maker': maker, 'price_range_percent': 0.01}
+                  for rate, maker in [(0.2, 0.1), (1.0, 0.5), (2.0, 0.9)]]
+    ensemble = EnsembleSimulator(param_sets, num_traders=20, seed=5)
+    predictions = ensemble.run(190.0, 120)
+
+    assert predictions.shape == (3, 120)
+    assert np.all(np.isfinite(predictions))
+    assert np.array_equal(predictions, EnsembleSimulator(param_sets, num_traders=20, seed=5).run(190.0, 120))
+
+    # The array MAs follow the same rules as OrderBook.record_trade
+    for k in range(3):
+        order_book = OrderBook()
+        for price in np.trunc(predictions[k]):
+            order_book.record_trade(price)
+        assert np.allclose(ensemble.moving_averages[k], [order_book.ma_5, order_book.ma_25, order_book.ma_50])
+        assert ensemble.total_buy_volume[k] == ensemble.order_books[k].total_buy_volume
+        assert ensemble.imbalance[k] == ensemble.order_books[k].imbalance
+
+    print("EnsembleSimulator test passed!")
+
+def test_ensemble_sweep():
+    """run_multiple_simulations can sweep all candidates of a window as one ensemble"""
+    print("Testing ensemble parameter sweep...")
+
+    rng = np.random.RandomState(0)
+    close = np.round(190 + np.cumsum(rng.normal(0, 0.2, 45)), 2)
+    df = pd.DataFrame({'open': close, 'close': close})
+    simulator = MarketSimulator.create(num_traders=5)
+
+    results = simulator.run_multiple_simulations(df, 30, 5, 8, seed=2, ensemble=True)
+    assert len(results) == 2 * 3
+    assert results == simulator.run_multiple_simulations(df, 30, 5, 8, seed=2, ensemble=True)
+
+    print("Ensemble parameter sweep test passed!")
+
+if __name__ == "__main__":
+    test_ensemble_run()
+    test_ensemble_sweep()
@@ -0,0 +1,55 @@
+"""
+Test the columnar minute-bar cache
+"""
+
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+import market_data
+
+CSV_ROWS = """2024-05-31 04:00:00,191.0000,191.0800,190.6600,190.7100,2682
+2024-05-31 04:01:00,190.8600,190.8600,190.8600,190.8600,100
+2024-05-31 04:03:00,191.0000,191.0000,191.0000,191.0000,125
+"""
+
+def test_cache_round_trip_and_invalidation():
+    """The cache reproduces the CSV and is rebuilt only when the file content changes"""
+    print("Testing market data cache...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'bars.csv')
+        with open(csv_path, 'w') as f:
+            f.write(CSV_ROWS)
+
+        bars = market_data.load_bars(csv_path)
+        assert isinstance(bars.close, np.memmap)
+        assert len(bars) == 3
+        assert bars.volume.tolist() == [2682, 100, 125]
+        df = market_data.load_data(csv_path)
+        assert df['timestamp'].iloc[2] == pd.Timestamp('2024-05-31 04:03:00')
+        assert df['close'].tolist() == [190.71, 190.86, 191.0]
+
+        # Touching the file without changing it keeps the cache
+        cache_path = market_data.cache_path_for(csv_path)
+        built = os.stat(os.path.join(cache_path, 'close.npy')).st_mtime_ns
+        os.utime(csv_path, ns=(1, 1))
+        market_data.load_bars(csv_path)
+        assert os.stat(os.path.join(cache_path, 'close.npy')).st_mtime_ns == built
+
+        # Same size, different content: the hash check rebuilds it
+        with open(csv_path, 'w') as f:
+            f.write(CSV_ROWS.replace('191.0000,191.0000,191.0000,191.0000', '192.0000,192.0000,192.0000,192.0000'))
+        os.utime(csv_path, ns=(2, 2))
+        assert market_data.load_bars(csv_path).close.tolist() == [190.71, 190.86, 192.0]
+
+        # Pickling sends the cache path, and the worker side memory-maps it again
+        restored = pickle.loads(pickle.dumps(bars))
+        assert isinstance(restored.close, np.memmap)
+        assert restored.close.tolist() == [190.71, 190.86, 192.0]
+
+    print("Market data cache test passed!")
+
+if __name__ == "__main__":
+    test_cache_round_trip_and_invalidation()
@@ -0,0 +1,67 @@
+"""
+Test the Monte Carlo future path engine
+"""
+
+import numpy as np
+import pandas as pd
+from ensemble import EnsembleSimulator
+from market_model import MarketSimulator, OrderBook
+from monte_carlo import simulate_paths
+
+def test_simulate_paths():
+    """Paths fan out from one state into a reproducible (n_paths, horizon) matrix"""
+    print("Testing simulate_paths...")
+
+    simulator = MarketSimulator.create(num_traders=20, seed=1)
+    df = pd.DataFrame({'open': np.full(30, 190.0), 'close': np.full(30, 190.0)})
+    params = {'trader_activity_rate': 1.0, 'proportion_maker': 0.5, 'price_range_percent': 0.01}
+    simulator.run_simulation(df, params)
+    state = simulator.order_book.get_snapshot()
+
+    result = simulate_paths(state, params, horizon=15, n_paths=40, num_traders=20, batch_size=16, seed=3)
+    paths = result['paths']
+    assert paths.shape == (40, 15)
+    assert np.all(np.isfinite(paths))
+    assert len(np.unique(paths[:, -1])) > 1  # paths actually diverge
+
+    bands = result['quantiles']
+    assert bands.shape == (5, 15)
+    assert np.all(np.diff(bands, axis=0) >= 0)
+
+    again = simulate_paths(state, params, horizon=15, n_paths=40, num_traders=20, batch_size=16, seed=3)
+    assert np.array_equal(paths, again['paths'])
+
+    print("simulate_paths test passed!")
+
+def test_ensemble_continues_from_snapshot():
+    """Lockstep paths pick up the snapshot's book, trade history and moving averages"""
+    print("Testing ensemble snapshot start...")
+
+    simulator = MarketSimulator.create(num_traders=20, seed=4)
+    df = pd.DataFrame({'open': np.full(60, 190.0), 'close': np.full(60, 190.0)})
+    params = {'trader_activity_rate': 1.0, 'proportion_maker': 0.5, 'price_range_percent': 0.01}
+    simulator.run_simulation(df, params)
+    state = simulator.order_book.get_snapshot()
+
+    ensemble = EnsembleSimulator([params] * 3, num_traders=20, seed=6)
+    ensemble.load_snapshot(state)
+    assert np.all(ensemble.price == state.state['last_traded_price'])
+    assert np.allclose(ensemble.moving_averages, [state.state['ma_5'], state.state['ma_25'], state.state['ma_50']])
+    assert all(len(book.buy_book) == len(state.buy_prices) for book in ensemble.order_books)
+
+    prices = []
+    for _ in range(10):
+        ensemble.step()
+        prices.append(ensemble.price.copy())
+    # The array MAs continue the snapshot's history as OrderBook.record_trade would
+    for k in range(3):
+        order_book = OrderBook.from_snapshot(state)
+        for price in np.trunc(prices):
+            order_book.record_trade(price[k])
+        assert np.allclose(ensemble.moving_averages[k], [order_book.ma_5, order_book.ma_25, order_book.ma_50])
+
+    print("Ensemble snapshot start test passed!")
+
+if __name__ == "__main__":
+    test_simulate_paths()
+    test_ensemble_continues_from_snapshot()
@@ -0,0 +1,28 @@
+"""
+Test the incremental moving averages kept by OrderBook.record_trade
+"""
+
+import numpy as np
+from market_model import OrderBook
+
+def test_incremental_moving_averages():
+    """Running-sum MAs agree with a direct recomputation across several ring laps"""
+    print("Testing incremental moving averages...")
+
+    order_book = OrderBook()
+    rng = np.random.RandomState(3)
+    for _ in range(350):
+        order_book.record_trade(float(rng.uniform(150, 200)))
+        if order_book.trade_count >= 50:
+            assert np.isclose(order_book.ma_5, order_book.compute_moving_average(5))
+            assert np.isclose(order_book.ma_25, order_book.compute_moving_average(25))
+            assert np.isclose(order_book.ma_50, order_book.compute_moving_average(50))
+
+    chronological = order_book.get_chronological_trade_history()
+    assert len(chronological) == len(order_book.trade_history)
+    assert chronological[-1] == order_book.trade_history[order_book.trade_index - 1]
+
+    print("Incremental moving average test passed!")
+
+if __name__ == "__main__":
+    test_incremental_moving_averages()
@@ -0,0 +1,102 @@
+"""
+Test the order-level book: price-time priority, per-order fills, cancel and modify
+"""
+
+import numpy as np
+from market_model import MarketSimulator, OrderBook
+from order_queue import Fill, QueueOrderBook
+from test_parallel_sweep import make_test_data
+from test_price_ladder import book_state
+
+def test_price_time_priority_fills():
+    """Takers fill the best price first and, within a level, the oldest order first"""
+    print("Testing price-time priority...")
+
+    order_book = QueueOrderBook(record_fills=True)
+    order_book.last_traded_price = 100
+    first = order_book.place_order(101, 10, False)
+    second = order_book.place_order(101, 5, False)
+    third = order_book.place_order(102, 8, False)
+    assert order_book.sell_book[101] == 15 and order_book.best_ask == 101
+
+    taker = order_book.place_order(103, 20, True)
+    assert order_book.drain_fills() == [Fill(taker, first, 101, 10, 0), Fill(taker, second, 101, 5, 0),
+                                        Fill(taker, third, 102, 5, 3)]
+    assert order_book.fills == []
+    assert set(order_book.orders) == {third} and order_book.orders[third].quantity == 3
+    assert order_book.best_ask == 102 and order_book.last_traded_price == 102
+
+    # Same aggregate state as the dict book after the same orders
+    reference = OrderBook()
+    reference.last_traded_price = 100
+    for price, quantity, is_buy in ((101, 10, False), (101, 5, False), (102, 8, False), (103, 20, True)):
+        reference.place_order(price, quantity, is_buy)
+    assert book_state(order_book) == book_state(reference)
+
+    print("Price-time priority test passed!")
+
+def test_cancel_and_modify():
+    """Cancels and modifications keep the queues, the aggregate levels and the volumes in step"""
+    print("Testing cancel and modify...")
+
+    order_book = QueueOrderBook(record_fills=True)
+    order_book.last_traded_price = 100
+    a = order_book.place_order(99, 10, True)
+    b = order_book.place_order(99, 20, True)
+    c = order_book.place_order(98, 30, True)
+    assert order_book.total_buy_volume == 60
+
+    assert order_book.cancel_order(a) == 10
+    assert order_book.cancel_order(a) == 0
+    assert [order.order_id for order in order_book.queue(99, True)] == [b]
+    assert order_book.buy_book[99] == 20 and order_book.total_buy_volume == 50
+
+    # A reduction keeps the queue position, an increase goes to the back
+    d = order_book.place_order(99, 5, True)
+    assert order_book.modify_order(b, quantity=15)
+    assert [order.order_id for order in order_book.queue(99, True)] == [b, d]
+    assert order_book.modify_order(b, quantity=25)
+    assert [order.order_id for order in order_book.queue(99, True)] == [d, b]
+    assert order_book.buy_book[99] == 30 and order_book.total_buy_volume == 60
+
+    # Cancelling the best level moves the best bid; repricing can cross the book
+    assert order_book.modify_order(c, price=97)
+    order_book.cancel_order(d)
+    order_book.cancel_order(b)
+    assert order_book.best_bid == 97 and list(order_book.buy_book.items()) == [(97, 30)]
+    e = order_book.place_order(101, 10, False)
+    assert order_book.modify_order(c, price=102)
+    assert order_book.drain_fills() == [Fill(c, e, 101, 10, 0)]
+    assert order_book.best_bid == 102 and order_book.buy_book[102] == 20
+    assert not order_book.modify_order(e, quantity=1)
+    assert sum(order.quantity for order in order_book.orders.values()) == 20
+
+    print("Cancel and modify test passed!")
+
+def test_simulation_matches_aggregate_book():
+    """Simulations on the order-level book give the dict book's prices and state"""
+    print("Testing order-level simulation...")
+
+    df = make_test_data(60)
+    params = {'trader_activity_rate': 1.2, 'proportion_maker': 0.6, 'price_range_percent': 0.02}
+    for vectorized in (False, True):
+        for limits in (None, {'max_levels': 20, 'ttl': 8}):
+            simulators = [MarketSimulator.create(num_traders=30, backend=backend, vectorized=vectorized, seed=4,
+                                                 depth_limits=limits) for backend in ('dict', 'orders')]
+            prices = [simulator.run_simulation(df, params) for simulator in simulators]
+            assert np.array_equal(prices[0], prices[1])
+            assert book_state(simulators[0].order_book) == book_state(simulators[1].order_book)
+            order_book = simulators[1].order_book
+            assert (sum(order.quantity for order in order_book.orders.values())
+                    == sum(order_book.buy_book.values()) + sum(order_book.sell_book.values()))
+
+    restored = QueueOrderBook.from_snapshot(order_book.get_snapshot())
+    assert book_state(restored) == book_state(order_book)
+    assert len(restored.orders) == len(order_book.buy_book) + len(order_book.sell_book)
+
+    print("Order-level simulation test passed!")
+
+if __name__ == "__main__":
+    test_price_time_priority_fills()
+    test_cancel_and_modify()
+    test_simulation_matches_aggregate_book()
@@ -0,0 +1,48 @@
+"""
+Test the process-pool parameter sweep in run_multiple_simulations
+"""
+
+import numpy as np
+import pandas as pd
+from market_model import MarketSimulator
+
+def make_test_data(num_rows=45):
+    """Small synthetic minute-bar DataFrame around 190"""
+    rng = np.random.RandomState(0)
+    close = 190 + np.cumsum(rng.normal(0, 0.2, num_rows))
+    return pd.DataFrame({'open': np.round(close, 2), 'close': np.round(close, 2)})
+
+def test_parallel_sweep_is_deterministic():
+    """Same seed gives the same results in-process and across worker processes"""
+    print("Testing parallel parameter sweep...")
+
+    df = make_test_data()
+    simulator = MarketSimulator.create(num_traders=5)
+    serial = simulator.run_multiple_simulations(df, 30, 5, 3, workers=1, seed=123)
+    parallel = simulator.run_multiple_simulations(df, 30, 5, 3, workers=2, seed=123)
+
+    assert len(serial) == 2 * 3  # (optimization, prediction) RMSE per window
+    assert np.array_equal(serial, parallel)
+    assert serial != simulator.run_multiple_simulations(df, 30, 5, 3, workers=1, seed=124)
+
+    print("Parallel parameter sweep test passed!")
+
+def test_window_parallel_backtest():
+    """Windows run as independent jobs come back in order and match the sweep mode"""
+    print("Testing window-parallel backtest...")
+
+    df = make_test_data(60)
+    simulator = MarketSimulator.create(num_traders=5)
+    calls = []
+    by_window = simulator.run_multiple_simulations(df, 30, 5, 3, workers=2, seed=9, parallel='windows',
+                                                   progress=lambda done, total: calls.append((done, total)))
+    by_candidate = simulator.run_multiple_simulations(df, 30, 5, 3, workers=1, seed=9)
+
+    assert np.array_equal(by_window, by_candidate)
+    assert calls == [(done, 6) for done in range(1, 7)]
+
+    print("Window-parallel backtest test passed!")
+
+if __name__ == "__main__":
+    test_parallel_sweep_is_deterministic()
+    test_window_parallel_backtest()
@@ -0,0 +1,115 @@
+"""
+Test the successive-halving parameter search
+"""
+
+from market_model import MarketSimulator, parameter_grid
+from parameter_search import (PARAMETER_RANGES, WarmStartSearch, halving_schedule, neighborhood,
+                              parameter_space, successive_halving)
+from test_parallel_sweep import make_test_data
+
+def test_parameter_space_covers_grid_axes():
+    """Each axis of the sample is a shuffle of the grid's linspace values"""
+    print("Testing parameter space sample...")
+
+    candidates = parameter_space(20, seed=1)
+    grid = parameter_grid(20)
+    for name in grid[0]:
+        assert sorted(c[name] for c in candidates) == [g[name] for g in grid]
+    assert candidates == parameter_space(20, seed=1)
+    assert candidates != grid
+
+    print("Parameter space sample test passed!")
+
+def test_successive_halving_finds_minimum():
+    """The search keeps the best candidate while spending far fewer bars than a full sweep"""
+    print("Testing successive halving...")
+
+    assert halving_schedule(100, 30) == [(100, 10), (33, 30)]
+    assert halving_schedule(81, 270, min_bars=10) == [(81, 10), (27, 30), (9, 90), (3, 270)]
+    assert halving_schedule(1, 30) == [(1, 30)]
+
+    candidates = parameter_space(81, seed=2)
+    target = candidates[17]
+
+    def evaluate(params, bars):
+        # Longer prefixes shrink a deterministic distortion of the true distance
+        distance = sum((params[name] - target[name]) ** 2 for name in params)
+        return distance + 0.01 * ((hash(params['proportion_maker']) % 7) / bars)
+
+    best = successive_halving(evaluate, candidates, 270, min_bars=10)
+    assert best['params'] is target
+    assert best['simulations'] == 81 + 27 + 9 + 3
+    assert best['bar_steps'] == 81 * 10 + 27 * 30 + 9 * 90 + 3 * 270
+    assert best['bar_steps'] < 81 * 270 / 6
+
+    print("Successive halving test passed!")
+
+def test_halving_backtest_reports_budget():
+    """The halving search mode backtests and reports the simulations it spent"""
+    print("Testing halving backtest...")
+
+    df = make_test_data(45)
+    simulator = MarketSimulator.create(num_traders=5, seed=3)
+    results = simulator.run_multiple_simulations(df, 30, 5, 9, search='halving', search_seed=0)
+    assert len(results) == 2 * 3
+    # Per window: 9 candidates on 10 bars, 3 on 30 bars, then one 5-bar prediction
+    assert simulator.sweep_stats == {'simulations': 3 * 13, 'bar_steps': 3 * (90 + 90 + 5),
+                                     'bar_steps_saved': 0}
+
+    simulator.run_multiple_simulations(df, 30, 5, 9, early_abort=False)
+    assert simulator.sweep_stats == {'simulations': 3 * 10, 'bar_steps': 3 * (270 + 5),
+                                     'bar_steps_saved': 0}
+
+    print("Halving backtest test passed!")
+
+def test_warm_start_tracks_drifting_optimum():
+    """Local searches follow a slowly moving optimum; a jump triggers the wide fallback"""
+    print("Testing warm-start search...")
+
+    nearby = neighborhood({'trader_activity_rate': 2.0, 'proportion_maker': 0.5,
+                           'price_range_percent': 0.01}, 10, radius=0.1, rng=0)
+    assert len(nearby) == 10 and nearby[0]['trader_activity_rate'] == 2.0
+    for params in nearby:
+        for name, (low, high) in PARAMETER_RANGES.items():
+            assert low <= params[name] <= high
+        assert abs(params['proportion_maker'] - 0.5) <= 0.1 * 0.8
+
+    wide = parameter_grid(50)
+    search = WarmStartSearch(wide, local_count=5, seed=1)
+    targets = [0.5, 0.52, 0.54, 0.56, 1.8, 1.8]
+    results = []
+    for target in targets:
+        def evaluate(params, abort_score):
+            return 0.1 + abs(params['trader_activity_rate'] - target)
+        results.append(search.search(evaluate))
+
+    assert [result['fallback'] for result in results] == [True, False, False, False, True, False]
+    assert [result['simulations'] for result in results] == [50, 5, 5, 5, 55, 5]
+    assert search.fallbacks == 1
+    for result, target in zip(results, targets):
+        assert abs(result['params']['trader_activity_rate'] - target) < 0.05
+
+    print("Warm-start search test passed!")
+
+def test_warm_backtest_reports_fallbacks():
+    """The warm search mode spends far fewer simulations than the grid and counts fallbacks"""
+    print("Testing warm-start backtest...")
+
+    df = make_test_data(80)
+    simulator = MarketSimulator.create(num_traders=5, seed=4)
+    results = simulator.run_multiple_simulations(df, 30, 5, 20, search='warm', search_seed=0)
+    stats = simulator.sweep_stats
+    assert len(results) == 2 * 10
+    # One prediction per window, the grid on the first window and on every fallback,
+    # two-point neighborhoods on the other nine
+    assert stats['simulations'] == 10 + 20 * (1 + stats['fallbacks']) + 2 * 9
+    assert stats['fallbacks'] < 9
+
+    print("Warm-start backtest test passed!")
+
+if __name__ == "__main__":
+    test_parameter_space_covers_grid_axes()
+    test_successive_halving_finds_minimum()
+    test_halving_backtest_reports_budget()
+    test_warm_start_tracks_drifting_optimum()
+    test_warm_backtest_reports_fallbacks()
@@ -0,0 +1,92 @@
+"""
+Test the array-backed price ladder order book against the dict order book
+"""
+
+import numpy as np
+import pandas as pd
+from market_model import OrderBook, MarketSimulator
+from price_ladder import PriceLadderOrderBook
+
+def book_state(order_book):
+    """Comparable snapshot of the public order book state"""
+    return (order_book.best_bid, order_book.best_ask, order_book.last_traded_price,
+            order_book.total_buy_volume, order_book.total_sell_volume, order_book.imbalance,
+            list(order_book.buy_book.items()), list(order_book.sell_book.items()))
+
+def test_ladder_volume_accounting():
+    """Same scenario as test_volume.py, on the ladder backend"""
+    print("Testing ladder volume accounting...")
+
+    order_book = PriceLadderOrderBook()
+    order_book.last_traded_price = 100
+
+    order_book.place_order(101, 10, True)
+    order_book.place_order(99, 15, False)
+    assert order_book.best_bid == 101
+    assert order_book.best_ask == 99
+    assert order_book.total_buy_volume == 10
+    assert order_book.total_sell_volume == 15
+
+    order_book.place_order(100, 5, True)  # Buy at 100 > 99
+    assert order_book.total_sell_volume == 10
+    assert order_book.sell_book[99] == 10
+    assert order_book.best_ask == 99
+    assert order_book.last_traded_price == 99
+
+    print("Ladder volume accounting test passed!")
+
+def test_ladder_recenters_on_drift():
+    """Orders far outside the initial ladder move and grow it without losing levels"""
+    print("Testing ladder recentering...")
+
+    order_book = PriceLadderOrderBook(capacity=16, reference_price=100)
+    order_book.place_order(95, 10, True)
+    order_book.place_order(5000, 7, False)
+    order_book.place_order(20, 3, True)
+
+    assert order_book.buy_book.items() == [(20, 3), (95, 10)]
+    assert order_book.sell_book.items() == [(5000, 7)]
+    assert order_book.best_bid == 95
+    assert order_book.best_ask == 5000
+
+    print("Ladder recentering test passed!")
+
+def test_ladder_matches_dict_book():
+    """Random order flow produces identical state on both backends"""
+    print("Testing ladder against dict book...")
+
+    dict_book = OrderBook()
+    ladder_book = PriceLadderOrderBook(capacity=32)
+    rng = np.random.RandomState(7)
+    for step in range(5000):
+        price = int(rng.randint(80, 121))
+        quantity = int(rng.randint(1, 41))
+        is_buy = bool(rng.random_sample() < 0.5)
+        dict_book.place_order(price, quantity, is_buy)
+        ladder_book.place_order(price, quantity, is_buy)
+        if step % 5 == 0:
+            dict_book.record_trade(price)
+            ladder_book.record_trade(price)
+        assert book_state(dict_book) == book_state(ladder_book)
+
+    print("Ladder matches dict book!")
+
+def test_ladder_simulation():
+    """The ladder backend can be selected from MarketSimulator"""
+    print("Testing simulation on the ladder backend...")
+
+    df = pd.DataFrame({'open': [100, 101, 102, 103, 104], 'close': [100, 101, 102, 103, 104]})
+    simulator = MarketSimulator.create(num_traders=10, backend='ladder')
+    assert isinstance(simulator.order_book, PriceLadderOrderBook)
+
+    predictions = simulator.run_simulation(df, {'trader_activity_rate': 1.0, 'proportion_maker': 0.5})
+    assert len(predictions) == len(df)
+    assert simulator.order_book.trade_count == len(df)
+
+    print("Ladder simulation test passed!")
+
+if __name__ == "__main__":
+    test_ladder_volume_accounting()
+    test_ladder_recenters_on_drift()
+    test_ladder_matches_dict_book()
+    test_ladder_simulation()
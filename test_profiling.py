@@ -0,0 +1,77 @@
+"""
+Test the per-phase profiling of simulations and sweeps
+"""
+
+import numpy as np
+from market_model import MarketSimulator
+from profiling import PHASES, SimulationProfile, profiles_to_dataframe
+from test_parallel_sweep import make_test_data
+
+def test_profiling_leaves_results_unchanged():
+    """A profiled run gives bit-identical prices and consistent counters on both backends"""
+    print("Testing profiled simulation...")
+
+    df = make_test_data(40)
+    params = {'trader_activity_rate': 1.2, 'proportion_maker': 0.4, 'price_range_percent': 0.01}
+    counters = {}
+    for backend in ('dict', 'ladder'):
+        plain = MarketSimulator.create(num_traders=20, backend=backend, seed=3).run_simulation(df, params)
+        simulator = MarketSimulator.create(num_traders=20, backend=backend, seed=3)
+        profile = simulator.enable_profiling()
+        profiled = simulator.run_simulation(df, params)
+        assert np.array_equal(plain, profiled)
+        assert simulator.disable_profiling() is profile and simulator.order_book.profile is None
+
+        counters[backend] = profile.to_dict()
+        assert counters[backend]['steps'] == len(df)
+        assert all(counters[backend][f"{phase}_seconds"] >= 0 for phase in PHASES)
+        assert counters[backend]['matching_calls'] == counters[backend]['orders_crossed'] > 0
+        assert 0 < counters[backend]['orders_crossed'] <= counters[backend]['orders_placed']
+        assert counters[backend]['max_buy_depth'] > 0
+
+    # Both order books walk the same levels
+    timings = [f"{phase}_seconds" for phase in PHASES]
+    assert ({name: value for name, value in counters['dict'].items() if name not in timings}
+            == {name: value for name, value in counters['ladder'].items() if name not in timings})
+
+    print("Profiled simulation test passed!")
+
+def test_sweep_profiles():
+    """Sweeps leave per-window profiles whose totals match across worker counts"""
+    print("Testing profiled sweeps...")
+
+    df = make_test_data(45)
+    simulator = MarketSimulator.create(num_traders=5)
+    serial = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=2, profile=True)
+    serial_totals = simulator.profile_totals.to_dict()
+    assert len(simulator.window_profiles) == len(serial) // 2
+    assert serial_totals['steps'] == simulator.sweep_stats['bar_steps']
+    assert sum(window['steps'] for window in simulator.window_profiles) == serial_totals['steps']
+
+    parallel = simulator.run_multiple_simulations(df, 30, 5, 4, workers=2, seed=2, profile=True,
+                                                  parallel='windows')
+    assert parallel == serial
+    parallel_totals = simulator.profile_totals.to_dict()
+    for name in ('steps', 'orders_placed', 'orders_crossed', 'levels_walked', 'max_buy_depth'):
+        assert parallel_totals[name] == serial_totals[name]
+
+    simulator.run_multiple_simulations(df, 30, 5, 4, profile=True)
+    assert simulator.profile_totals.steps == simulator.sweep_stats['bar_steps']
+    assert simulator.profile is None
+    frame = profiles_to_dataframe(simulator.window_profiles)
+    assert len(frame) == len(simulator.window_profiles) and 'matching_seconds' in frame
+
+    merged = SimulationProfile.from_dict(simulator.window_profiles[0]).merge(simulator.window_profiles[1])
+    assert merged.steps == frame['steps'][:2].sum()
+
+    try:
+        simulator.run_multiple_simulations(df, 30, 5, 4, ensemble=True, profile=True)
+        assert False, "the ensemble mode is not profiled"
+    except ValueError:
+        pass
+
+    print("Profiled sweeps test passed!")
+
+if __name__ == "__main__":
+    test_profiling_leaves_results_unchanged()
+    test_sweep_profiles()
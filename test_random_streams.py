@@ -0,0 +1,92 @@
+"""
+Test seeded random streams, replicates and common random numbers
+"""
+
+import numpy as np
+from ensemble import EnsembleSimulator
+from market_model import MarketSimulator, make_order_book
+from test_parallel_sweep import make_test_data
+
+def test_seeded_simulator_is_reproducible():
+    """A root seed reproduces a run bit for bit, for both trader implementations"""
+    print("Testing seeded simulator...")
+
+    df = make_test_data(30)
+    params = {'trader_activity_rate': 1.2, 'proportion_maker': 0.4, 'price_range_percent': 0.01}
+    for vectorized in (False, True):
+        first = MarketSimulator.create(num_traders=10, vectorized=vectorized, seed=21).run_simulation(df, params)
+        second = MarketSimulator.create(num_traders=10, vectorized=vectorized, seed=21).run_simulation(df, params)
+        other = MarketSimulator.create(num_traders=10, vectorized=vectorized, seed=22).run_simulation(df, params)
+        assert np.array_equal(first, second)
+        assert not np.array_equal(first, other)
+
+    print("Seeded simulator test passed!")
+
+def test_common_random_numbers():
+    """Under common random numbers identical parameter sets see identical draws"""
+    print("Testing common random numbers...")
+
+    params = {'trader_activity_rate': 1.0, 'proportion_maker': 0.5, 'price_range_percent': 0.01}
+    shared = EnsembleSimulator([params, params], num_traders=10, seed=3, common_random_numbers=True).run(190, 30)
+    independent = EnsembleSimulator([params, params], num_traders=10, seed=3).run(190, 30)
+    assert np.array_equal(shared[0], shared[1])
+    assert not np.array_equal(independent[0], independent[1])
+
+    df = make_test_data(45)
+    simulator = MarketSimulator.create(num_traders=5)
+    serial = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=8, common_random_numbers=True)
+    parallel = simulator.run_multiple_simulations(df, 30, 5, 4, workers=2, seed=8, common_random_numbers=True,
+                                                  parallel='windows')
+    assert serial == parallel
+    assert serial != simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=8)
+
+    try:
+        simulator.run_multiple_simulations(df, 30, 5, 4, common_random_numbers=True)
+        assert False, "common random numbers need seeded simulations"
+    except ValueError:
+        pass
+
+    print("Common random numbers test passed!")
+
+def test_replicates_are_reproducible():
+    """Replicated sweeps match across worker counts and with or without early abort"""
+    print("Testing replicated sweep...")
+
+    df = make_test_data(45)
+    simulator = MarketSimulator.create(num_traders=5)
+    serial = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=5, replicates=3)
+    assert simulator.sweep_stats['bar_steps_saved'] > 0
+    full = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=5, replicates=3, early_abort=False)
+    assert simulator.sweep_stats['simulations'] == 3 * (4 * 3 + 1)
+    parallel = simulator.run_multiple_simulations(df, 30, 5, 4, workers=2, seed=5, replicates=3)
+
+    assert serial == full == parallel
+    assert serial != simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=5)
+
+    print("Replicated sweep test passed!")
+
+def test_spawned_population_is_reproducible():
+    """Populations spawned from a seeded population draw reproducible, distinct streams"""
+    print("Testing spawned population...")
+
+    def spawned_orders(seed):
+        population = MarketSimulator.create(num_traders=10, vectorized=True, seed=seed).traders
+        draws = []
+        for _ in range(2):
+            order_book = make_order_book()
+            order_book.last_traded_price = 190
+            draws.append(population.spawn(order_book).generate_orders()['price'])
+        return draws
+
+    first, second = spawned_orders(4)
+    again_first, again_second = spawned_orders(4)
+    assert np.array_equal(first, again_first) and np.array_equal(second, again_second)
+    assert not np.array_equal(first, second)
+
+    print("Spawned population test passed!")
+
+if __name__ == "__main__":
+    test_seeded_simulator_is_reproducible()
+    test_common_random_numbers()
+    test_replicates_are_reproducible()
+    test_spawned_population_is_reproducible()
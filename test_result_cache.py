@@ -0,0 +1,111 @@
+"""
+Test the simulation result cache
+"""
+
+import os
+import pickle
+import tempfile
+import numpy as np
+from market_model import ORDER_BOOK_BACKENDS, MarketSimulator, make_order_book
+from result_cache import ResultCache, _model_sources
+from test_parallel_sweep import make_test_data
+
+def test_cache_tiers_and_eviction():
+    """Memory LRU, disk fallback, size-bounded disk eviction and version invalidation"""
+    print("Testing result cache tiers...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(cache_dir, memory_items=2, version='a')
+        window = np.arange(30.0)
+        keys = [cache.key((window,), {'trader_activity_rate': rate}, 50, [7, [i]])
+                for i, rate in enumerate((0.5, 1.0, 1.5))]
+        assert len(set(keys)) == 3
+        assert keys[0] == cache.key((window.copy(),), {'trader_activity_rate': 0.5}, 50, [7, [0]])
+        assert keys[0] != cache.key((window + 1,), {'trader_activity_rate': 0.5}, 50, [7, [0]])
+
+        assert cache.get(keys[0]) is None
+        for i, key in enumerate(keys):
+            cache.put(key, [float(i), 1.0])
+        assert cache.get(keys[2]).tolist() == [2.0, 1.0]  # memory
+        assert cache.get(keys[0]).tolist() == [0.0, 1.0]  # evicted from memory, read from disk
+        assert cache.stats['memory_hits'] == 1 and cache.stats['disk_hits'] == 1 and cache.stats['misses'] == 1
+        assert cache.hit_rate() == 2 / 3
+        assert cache.get(keys[2], usable=lambda value: value[0] < 1.0).tolist() == [2.0, 1.0]
+        assert cache.stats['partial_hits'] == 1 and cache.hit_rate() == 2 / 4
+
+        # A worker's copy shares the disk tier but not the memory tier
+        copy = pickle.loads(pickle.dumps(cache))
+        assert copy.get(keys[1]).tolist() == [1.0, 1.0] and copy.stats['disk_hits'] == 1
+
+        # Opening the cache under another code version empties the disk tier
+        ResultCache(cache_dir, version='b')
+        assert not os.path.exists(os.path.join(cache_dir, keys[0][:2], keys[0] + '.npy'))
+        assert ResultCache(cache_dir, version='a').get(keys[0]) is None
+
+        # The disk tier is trimmed to its budget, oldest first
+        small = ResultCache(cache_dir, memory_items=1, disk_bytes=1000, version='c')
+        for i in range(20):
+            small.put(small.key((window,), {'trader_activity_rate': i}, 50, None), [float(i), 1.0])
+        total = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(cache_dir)
+                    for f in files if f.endswith('.npy'))
+        assert total <= 1000 and small.stats['evictions'] > 0
+        assert small.get(small.key((window,), {'trader_activity_rate': 19}, 50, None)) is not None
+
+        # Overwriting a stored key does not inflate the disk size or evict other entries
+        steady = ResultCache(cache_dir, memory_items=1, disk_bytes=1000, version='d')
+        kept = steady.key((window,), {'trader_activity_rate': 0.0}, 50, None)
+        steady.put(kept, [0.0, 1.0])
+        key = steady.key((window,), {'trader_activity_rate': 1.0}, 50, None)
+        for i in range(50):
+            steady.put(key, [float(i), 1.0])
+        assert steady.stats['evictions'] == 0 and steady.get(kept) is not None
+        assert steady._disk_size == sum(size for _, size, _ in steady._disk_entries())
+
+    print("Result cache tiers test passed!")
+
+def test_cached_sweep_rerun():
+    """Rerunning a seeded sweep with a cache gives the same results without simulating"""
+    print("Testing cached sweep rerun...")
+
+    df = make_test_data(45)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        simulator = MarketSimulator.create(num_traders=5)
+        uncached = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=6)
+
+        cache = ResultCache(cache_dir)
+        first = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=6, cache=cache)
+        assert first == uncached
+        assert simulator.sweep_stats['cache_hits'] == 0
+
+        rerun_cache = ResultCache(cache_dir)  # fresh process: disk tier only
+        for mode in ('candidates', 'windows'):
+            rerun = simulator.run_multiple_simulations(df, 30, 5, 4, workers=2, seed=6, parallel=mode,
+                                                       cache=rerun_cache)
+            assert rerun == uncached
+            assert simulator.sweep_stats['cache_misses'] == 0
+            assert simulator.sweep_stats['cache_hits'] > 0
+            # Aborted runs' lower bounds that have to be simulated again are not hits
+            assert simulator.sweep_stats['cache_partial_hits'] == simulator.sweep_stats['simulations']
+
+        other_seed = simulator.run_multiple_simulations(df, 30, 5, 4, workers=1, seed=7, cache=rerun_cache)
+        assert simulator.sweep_stats['cache_hits'] == 0 and other_seed != uncached
+
+    print("Cached sweep rerun test passed!")
+
+def test_model_version_covers_every_backend():
+    """Every order book backend's source and the scoring code are part of the code version"""
+    print("Testing model version sources...")
+
+    sources = _model_sources()
+    for backend, (module, _) in ORDER_BOOK_BACKENDS.items():
+        assert module + '.py' in sources, backend
+        assert make_order_book(backend).backend == backend
+    assert 'scoring.py' in sources
+    assert len(sources) == len(set(sources))
+
+    print("Model version sources test passed!")
+
+if __name__ == "__main__":
+    test_cache_tiers_and_eviction()
+    test_cached_sweep_rerun()
+    test_model_version_covers_every_backend()
@@ -0,0 +1,75 @@
+"""
+Test the vectorized scoring and the params x windows error surface
+"""
+
+import os
+import tempfile
+import numpy as np
+from market_model import MarketSimulator
+from scoring import ErrorSurface, rmse, score_block
+from test_parallel_sweep import make_test_data
+
+def test_score_block():
+    """A block's scores match per-row formulas, and the hit rate counts matching directions"""
+    print("Testing score block...")
+
+    rng = np.random.default_rng(1)
+    actual = 100 + np.cumsum(rng.normal(size=30))
+    predictions = actual + rng.normal(size=(8, 30))
+    scores = score_block(predictions, actual, reference=100.0)
+    for row, prediction in enumerate(predictions):
+        assert scores['rmse'][row] == np.sqrt(np.mean((actual - prediction) ** 2)) == rmse(actual, prediction)
+        assert np.isclose(scores['mae'][row], np.mean(np.abs(actual - prediction)))
+    single = score_block(predictions[3], actual, reference=100.0)
+    assert np.ndim(single['rmse']) == 0 and single['hit_rate'] == scores['hit_rate'][3]
+
+    # Moves are taken from the previous actual price: up, down, up
+    actual = np.array([101.0, 100.0, 102.0])
+    assert score_block([102.0, 99.0, 99.0], actual, reference=100.0)['hit_rate'] == 2 / 3
+    assert score_block([102.0, 99.0, 99.0], actual)['hit_rate'] == 0.5
+    assert np.array_equal(rmse(actual, np.tile(actual, (2, 1))), [0.0, 0.0])
+
+    print("Score block test passed!")
+
+def test_sweep_error_surface():
+    """Grid, ensemble and workers sweeps keep the scores of every candidate on every window"""
+    print("Testing error surface...")
+
+    df = make_test_data(60)
+    simulator = MarketSimulator.create(num_traders=10, seed=3)
+    results = simulator.run_multiple_simulations(df, 30, 5, 6, early_abort=False)
+    surface = simulator.error_surface
+    assert surface.shape == (6, len(results) // 2)
+    assert not np.isnan(surface.rmse).any() and not np.isnan(surface.hit_rate).any()
+    best = surface.best()
+    assert np.array_equal(surface.rmse[best, np.arange(surface.shape[1])], results[::2])
+    assert np.all((surface.hit_rate >= 0) & (surface.hit_rate <= 1))
+
+    # Early abort leaves the runs it stopped unscored but keeps each window's best
+    aborted = simulator.run_multiple_simulations(df, 30, 5, 6)
+    assert np.isnan(simulator.error_surface.rmse).any()
+    assert np.array_equal(np.nanmin(simulator.error_surface.rmse, axis=0), aborted[::2])
+
+    for options in ({'ensemble': True, 'seed': 2}, {'workers': 1, 'seed': 2, 'early_abort': False}):
+        results = simulator.run_multiple_simulations(df, 30, 5, 6, **options)
+        assert np.array_equal(np.nanmin(simulator.error_surface.rmse, axis=0), results[::2])
+    assert np.isnan(simulator.error_surface.mae).all()
+
+    simulator.run_multiple_simulations(df, 30, 5, 6, search='halving', search_seed=1)
+    assert simulator.error_surface is None
+
+    frame = surface.to_dataframe()
+    assert len(frame) == surface.rmse.size and 'trader_activity_rate' in frame
+    assert frame['rmse'].iloc[1] == surface.rmse[0, 1]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'surface.npz')
+        surface.save(path)
+        loaded = ErrorSurface.load(path)
+    assert loaded.candidates == surface.candidates
+    assert np.array_equal(loaded.hit_rate, surface.hit_rate)
+
+    print("Error surface test passed!")
+
+if __name__ == "__main__":
+    test_score_block()
+    test_sweep_error_surface()
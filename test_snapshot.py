@@ -0,0 +1,68 @@
+"""
+Test OrderBook snapshot, restore and fork
+"""
+
+import numpy as np
+from market_model import OrderBook
+from price_ladder import PriceLadderOrderBook
+from test_price_ladder import book_state
+
+def full_state(order_book):
+    """Public book state plus the trade history"""
+    return book_state(order_book) + (order_book.trade_history.tolist(), order_book.trade_index,
+                                     order_book.trade_count, order_book.ma_5, order_book.ma_25)
+
+def random_flow(order_book, seed, steps=500):
+    """Drive an order book with random orders and trades"""
+    rng = np.random.RandomState(seed)
+    for step in range(steps):
+        order_book.place_order(int(rng.randint(80, 121)), int(rng.randint(1, 41)), bool(rng.random_sample() < 0.5))
+        if step % 3 == 0:
+            order_book.record_trade(int(rng.randint(90, 111)))
+
+def test_snapshot_restore_in_place():
+    """Restoring a snapshot undoes everything that happened after it was taken"""
+    print("Testing snapshot restore...")
+
+    for book_class in (OrderBook, PriceLadderOrderBook):
+        order_book = book_class()
+        random_flow(order_book, seed=1)
+        snapshot = order_book.get_snapshot()
+        expected = full_state(order_book)
+
+        random_flow(order_book, seed=2)
+        assert full_state(order_book) != expected
+        order_book.load_snapshot(snapshot)
+        assert full_state(order_book) == expected
+
+        # Continuations from the restored state match continuations from the original
+        random_flow(order_book, seed=3)
+        continued = full_state(order_book)
+        order_book.load_snapshot(snapshot)
+        random_flow(order_book, seed=3)
+        assert full_state(order_book) == continued
+
+    print("Snapshot restore test passed!")
+
+def test_snapshot_fork():
+    """Forked books are independent and can use either backend"""
+    print("Testing snapshot fork...")
+
+    parent = OrderBook()
+    random_flow(parent, seed=4)
+    snapshot = parent.get_snapshot()
+    expected = full_state(parent)
+
+    children = snapshot.fork(3) + snapshot.fork(2, PriceLadderOrderBook)
+    assert all(full_state(child) == expected for child in children)
+
+    random_flow(children[0], seed=5)
+    assert full_state(children[1]) == expected
+    assert full_state(children[3]) == expected
+    assert full_state(parent) == expected
+
+    print("Snapshot fork test passed!")
+
+if __name__ == "__main__":
+    test_snapshot_restore_in_place()
+    test_snapshot_fork()
@@ -0,0 +1,138 @@
+"""
+Test the streaming online mode on a replay of the AAPL minute bars
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import numpy as np
+from market_model import MarketSimulator
+from streaming import OnlineSimulator, _recalibrate, replay_bars, run_replay
+
+def test_online_replay():
+    """Every replayed bar gets a forecast, and background recalibrations are adopted"""
+    print("Testing online replay...")
+
+    simulator = MarketSimulator.create(num_traders=20, vectorized=True, seed=5)
+    with simulator.online(horizon=4, window_size=20, recalibrate_every=20, num_simulations=4,
+                          executor='thread', seed=5) as online:
+        results = asyncio.run(run_replay(online, 'AAPL_2024.csv', stop=120))
+        online.wait_for_recalibration()
+
+    assert [result['index'] for result in results] == list(range(120))
+    assert all(result['predictions'].shape == (4,) for result in results)
+    assert all(np.all(np.isfinite(result['predictions'])) for result in results)
+    assert online.simulator is simulator and len(simulator.order_book.trade_history) > 0
+
+    # Forecasts are scored once their horizon has passed
+    assert len(online.forecast_rmses) == 120 - 4
+    assert online.recalibrations_started >= 1
+    assert len(online.recalibrations) == online.recalibrations_started
+    assert online.params == online.recalibrations[-1]['params']
+
+    percentiles = online.latency_percentiles((50, 99))
+    assert set(percentiles) == {'p50', 'p99'}
+    assert 0 < percentiles['p50'] <= percentiles['p99']
+    assert len(online.latencies) == 120
+
+    print("Online replay test passed!")
+
+def test_update_does_not_wait_for_recalibration():
+    """A running recalibration never blocks update; its parameters arrive later"""
+    print("Testing non-blocking recalibration...")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Occupy the only worker so the recalibration stays queued
+        blocker = executor.submit(time.sleep, 0.5)
+        online = OnlineSimulator(num_traders=10, horizon=2, window_size=5, recalibrate_every=5,
+                                 num_simulations=3, executor=executor, seed=2)
+        start_params = online.params
+        bars = [{'open': 190.0 + i, 'close': 190.5 + i} for i in range(8)]
+        started = time.perf_counter()
+        for bar in bars:
+            online.update(bar)
+        assert time.perf_counter() - started < 0.5
+        assert online.recalibrations_started == 1 and online.params is start_params
+
+        blocker.result()
+        assert online.wait_for_recalibration()
+        assert online.params in online.candidates
+        online.close()
+
+    print("Non-blocking recalibration test passed!")
+
+def test_recalibrate_is_seeded():
+    """The same window and seed pick the same parameters"""
+    print("Testing seeded recalibration...")
+
+    online = OnlineSimulator(num_traders=10, num_simulations=5, seed=0)
+    open_prices = np.linspace(190.0, 192.0, 20)
+    close_prices = open_prices + 0.1
+    first = _recalibrate(open_prices, close_prices, online.candidates, 10, 'dict', np.random.SeedSequence(7))
+    second = _recalibrate(open_prices, close_prices, online.candidates, 10, 'dict', np.random.SeedSequence(7))
+    assert first['params'] == second['params'] and first['rmse'] == second['rmse']
+    assert first['rmse'] == np.min(first['scores']['rmse'])
+
+    # A depth-limited live book recalibrates on depth-limited markets
+    limited = _recalibrate(open_prices, close_prices, online.candidates, 10, 'dict', np.random.SeedSequence(7),
+                           {'max_levels': 2, 'max_distance': 0.005})
+    assert not np.array_equal(limited['scores']['rmse'], first['scores']['rmse'])
+    online.close()
+
+    print("Seeded recalibration test passed!")
+
+def test_accelerated_replay():
+    """An accelerated replay paces bars by their timestamps and caps long gaps"""
+    print("Testing accelerated replay...")
+
+    async def collect():
+        return [bar async for bar in replay_bars('AAPL_2024.csv', speed=6000, stop=20, max_delay=0.005)]
+
+    started = time.perf_counter()
+    bars = asyncio.run(collect())
+    elapsed = time.perf_counter() - started
+
+    assert len(bars) == 20
+    assert all(bars[i]['timestamp'] < bars[i + 1]['timestamp'] for i in range(19))
+    assert set(bars[0]) == {'timestamp', 'open', 'high', 'low', 'close', 'volume'}
+    # 19 gaps of at least one minute at 6000x take 0.01s each, capped at 0.005s
+    assert 19 * 0.005 * 0.9 <= elapsed < 2.0
+
+    print("Accelerated replay test passed!")
+
+def test_failed_recalibration_keeps_params():
+    """A recalibration that raises is recorded and the bars go on with the current parameters"""
+    print("Testing failed recalibration...")
+
+    class FailingExecutor(Executor):
+        def submit(self, fn, *args, **kwargs):
+            future = Future()
+            future.set_exception(ValueError("fit failed"))
+            return future
+
+    online = OnlineSimulator(num_traders=10, horizon=2, window_size=5, recalibrate_every=5,
+                             num_simulations=3, executor=FailingExecutor(), seed=3)
+    start_params = online.params
+    results = [online.update({'open': 190.0 + i, 'close': 190.5 + i}) for i in range(12)]
+    assert len(results) == 12 and online.params is start_params
+    assert online.recalibrations_started == 2 and not online.recalibrations
+    assert [str(error) for error in online.recalibration_errors] == ["fit failed", "fit failed"]
+    assert not online.wait_for_recalibration()
+
+    # A window of NaN bars fails in the fit itself rather than picking arbitrary parameters
+    window = np.full(10, 190.0)
+    window[4] = np.nan
+    try:
+        _recalibrate(window, window, online.candidates, 10, 'dict', np.random.SeedSequence(0))
+        assert False, "a window with NaN prices cannot be fit"
+    except ValueError:
+        pass
+
+    print("Failed recalibration test passed!")
+
+if __name__ == "__main__":
+    test_online_replay()
+    test_update_does_not_wait_for_recalibration()
+    test_recalibrate_is_seeded()
+    test_accelerated_replay()
+    test_failed_recalibration_keeps_params()
@@ -0,0 +1,91 @@
+"""
+Test the trade tape: growth, disk spill and OHLCV aggregation
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from market_model import MarketSimulator, column_arrays
+from trade_tape import TRADE_DTYPE, TradeTape
+from test_parallel_sweep import make_test_data
+
+def test_tape_spills_and_aggregates():
+    """Records survive growth and spilling, and bars match a pandas groupby"""
+    print("Testing trade tape...")
+
+    rng = np.random.default_rng(0)
+    steps = np.sort(rng.integers(0, 40, 500))
+    steps[steps == 7] = 8  # a bar without fills
+    prices = rng.integers(90, 110, 500).astype(float)
+    quantities = rng.integers(1, 50, 500)
+    is_buy = rng.random(500) < 0.5
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        tape = TradeTape(capacity=4, memory_budget=64 * TRADE_DTYPE.itemsize, spill_dir=spill_dir)
+        for step, price, quantity, side in zip(steps[:300].tolist(), prices[:300], quantities[:300], is_buy[:300]):
+            tape.step = step
+            tape.append(price, quantity, side)
+        tape.extend(prices[300:], quantities[300:], is_buy[300:], steps=steps[300:])
+        tape.step = 40
+
+        assert len(tape) == 500 and tape.spilled > 0
+        assert len(os.listdir(spill_dir)) == 1
+        records = tape.to_array()
+        assert np.array_equal(records['step'], steps) and np.array_equal(records['price'], prices)
+        assert np.array_equal(records['quantity'], quantities) and np.array_equal(records['is_buy'], is_buy)
+        assert tape.volume() == quantities.sum()
+        assert abs(tape.vwap() - np.dot(prices, quantities) / quantities.sum()) < 1e-9
+
+        bars = tape.ohlcv()
+        frame = pd.DataFrame({'step': steps, 'price': prices, 'quantity': quantities})
+        expected = frame.groupby('step').agg(open=('price', 'first'), high=('price', 'max'),
+                                             low=('price', 'min'), close=('price', 'last'),
+                                             volume=('quantity', 'sum'))
+        traded = expected.index.to_numpy()
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            assert np.array_equal(bars[column][traded], expected[column].to_numpy())
+        assert bars['trades'][7] == 0 and bars['volume'][7] == 0
+        assert bars['open'][7] == bars['close'][7] == bars['close'][6]
+        assert np.isnan(tape.ohlcv(fill_empty=False)['close'][7])
+
+        # Two steps per bar halves the bars and keeps the volume
+        assert tape.ohlcv(steps_per_bar=2)['volume'].sum() == quantities.sum()
+
+        tape.clear()
+        assert len(tape) == 0 and os.listdir(spill_dir) == []
+
+    print("Trade tape test passed!")
+
+def test_simulated_candles():
+    """Every backend tapes the same fills, and the candles line up with the real bars"""
+    print("Testing simulated candles...")
+
+    df = make_test_data(60)
+    params = {'trader_activity_rate': 1.2, 'proportion_maker': 0.6, 'price_range_percent': 0.02}
+    plain = MarketSimulator.create(num_traders=30, seed=4).run_simulation(df, params)
+
+    tapes = []
+    for backend in ('dict', 'ladder', 'orders'):
+        simulator = MarketSimulator.create(num_traders=30, backend=backend, seed=4)
+        tape = simulator.enable_trade_tape()
+        assert np.array_equal(simulator.run_simulation(df, params), plain)
+        assert simulator.disable_trade_tape() is tape and simulator.order_book.tape is None
+        tapes.append(tape)
+
+    for tape in tapes[1:]:
+        assert np.array_equal(tape.to_array(), tapes[0].to_array())
+
+    candles = tapes[0].ohlcv()
+    assert len(candles['close']) == len(df) and candles['volume'].sum() == tapes[0].volume() > 0
+    (simulated_close,), (actual_close,) = column_arrays(candles, 'close'), column_arrays(df, 'close')
+    assert simulated_close.shape == actual_close.shape
+    traded = candles['trades'] > 0
+    assert np.all(candles['low'][traded] <= candles['vwap'][traded])
+    assert np.all(candles['vwap'][traded] <= candles['high'][traded])
+
+    print("Simulated candles test passed!")
+
+if __name__ == "__main__":
+    test_tape_spills_and_aggregates()
+    test_simulated_candles()
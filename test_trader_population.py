@@ -0,0 +1,56 @@
+"""
+Test the vectorized TraderPopulation
+"""
+
+import numpy as np
+import pandas as pd
+from market_model import OrderBook, Trader, TraderPopulation, MarketSimulator
+
+def test_population_pricing_rules():
+    """Batched orders follow the maker/taker rules of Trader.determine_price"""
+    print("Testing TraderPopulation pricing rules...")
+
+    order_book = OrderBook()
+    order_book.last_traded_price = 190
+    order_book.price_range_percent = 0.02
+    population = TraderPopulation(order_book, 5000, rng=np.random.default_rng(11))
+
+    orders = population.generate_orders()
+    prices, quantities = orders['price'], orders['quantity']
+    is_buy, is_maker = orders['is_buy'], orders['is_maker']
+
+    assert len(prices) == len(population)  # activity rate 1.0: every trader is active
+    assert np.all(prices > 0)
+    assert np.all(np.abs(prices - 190) <= 190 * 0.01 + 2)
+    # Makers sell above the last price and buy at or below it, takers do the opposite
+    assert np.all(is_buy[is_maker] == (prices[is_maker] <= 190))
+    assert np.all(is_buy[~is_maker] == (prices[~is_maker] > 190))
+    assert quantities[is_maker].min() >= 1 and quantities[is_maker].max() <= 40
+    assert quantities[~is_maker].min() >= 1 and quantities[~is_maker].max() <= 20
+
+    order_book.trader_activity_rate = 0.0
+    assert len(population.generate_orders()['price']) == 0
+
+    print("TraderPopulation pricing rules test passed!")
+
+def test_population_simulation():
+    """MarketSimulator runs with a population and keeps per-trader objects available"""
+    print("Testing simulation with a TraderPopulation...")
+
+    df = pd.DataFrame({'open': [100, 101, 102, 103, 104], 'close': [100, 101, 102, 103, 104]})
+    simulator = MarketSimulator.create(num_traders=2000, vectorized=True)
+    assert isinstance(simulator.traders, TraderPopulation)
+
+    predictions = simulator.run_simulation(df, {'trader_activity_rate': 1.0, 'proportion_maker': 0.5})
+    assert len(predictions) == len(df)
+    assert simulator.order_book.total_buy_volume + simulator.order_book.total_sell_volume > 0
+
+    traders = simulator.traders.to_traders()
+    assert len(traders) == 2000
+    assert all(isinstance(trader, Trader) for trader in traders)
+
+    print("TraderPopulation simulation test passed!")
+
+if __name__ == "__main__":
+    test_population_pricing_rules()
+    test_population_simulation()
@@ -0,0 +1,220 @@
+"""
+Trade Tape
+
+Append-only record of every fill (step, price, quantity, aggressor side) in a compact
+structured NumPy array. The in-memory buffer grows geometrically up to a memory budget;
+past it, full buffers are spilled to a memory-mapped file, so very long runs keep a
+bounded resident size. Fills aggregate per bar into OHLCV candles (the Python
+counterpart of the C# GenerateCandlestick) that line up with the real minute bars.
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+TRADE_DTYPE = np.dtype([('step', np.int64), ('price', np.float64), ('quantity', np.int64), ('is_buy', np.bool_)])
+
+class TradeTape:
+    """
+    Growable structured array of fills, spilling to disk past a memory budget
+
+    Fills are stamped with the tape's current step, which MarketSimulator.step
+    advances once per simulated bar.
+    """
+
+    def __init__(self, capacity=1024, memory_budget=64 << 20, spill_dir=None):
+        """
+        Args:
+            capacity: Initial number of records in memory
+            memory_budget: Bytes the in-memory buffer may grow to before it is spilled
+            spill_dir: Directory of the spill file (default: the system temp directory)
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.step = 0
+        self._buffer = np.empty(max(1, capacity), dtype=TRADE_DTYPE)
+        self._size = 0
+        self._spill_path = None
+        self._spilled = 0
+        self._spill_map = None
+
+    def __len__(self):
+        return self._spilled + self._size
+
+    @property
+    def spilled(self):
+        """Number of records on disk"""
+        return self._spilled
+
+    def advance(self, steps=1):
+        """Move on to the next step (bar)"""
+        self.step += steps
+
+    def append(self, price, quantity, is_buy):
+        """Record one fill at the current step"""
+        if self._size == len(self._buffer):
+            self._make_room(1)
+        self._buffer[self._size] = (self.step, price, quantity, is_buy)
+        self._size += 1
+
+    def extend(self, prices, quantities, is_buy, steps=None):
+        """
+        Record many fills at once
+
+        Args:
+            prices, quantities, is_buy: Arrays of the fills in order
+            steps: Step of each fill (default: all at the current step); must not go
+                back before the steps already recorded
+        """
+        prices = np.asarray(prices)
+        count = len(prices)
+        if count == 0:
+            return
+        offset = 0
+        while offset < count:
+            if self._size == len(self._buffer):
+                self._make_room(count - offset)
+            chunk = min(count - offset, len(self._buffer) - self._size)
+            records = self._buffer[self._size:self._size + chunk]
+            records['step'] = self.step if steps is None else steps[offset:offset + chunk]
+            records['price'] = prices[offset:offset + chunk]
+            records['quantity'] = quantities[offset:offset + chunk]
+            records['is_buy'] = is_buy[offset:offset + chunk]
+            self._size += chunk
+            offset += chunk
+
+    def _make_room(self, needed):
+        """Grow the full buffer geometrically, or spill it once it has reached the budget"""
+        capacity = len(self._buffer)
+        limit = max(1, self.memory_budget // TRADE_DTYPE.itemsize)
+        if capacity < limit:
+            new_capacity = min(max(capacity * 2, self._size + needed), limit)
+            buffer = np.empty(new_capacity, dtype=TRADE_DTYPE)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        else:
+            self._spill()
+
+    def _spill(self):
+        """Append the in-memory records to the spill file"""
+        if self._spill_path is None:
+            handle, self._spill_path = tempfile.mkstemp(prefix='trade_tape-', suffix='.bin', dir=self.spill_dir)
+            os.close(handle)
+        with open(self._spill_path, 'ab') as f:
+            f.write(self._buffer[:self._size].tobytes())
+        self._spilled += self._size
+        self._size = 0
+        self._spill_map = None
+
+    def chunks(self):
+        """Yield the records as arrays in order: the memory-mapped spill file, then memory"""
+        if self._spilled:
+            if self._spill_map is None:
+                self._spill_map = np.memmap(self._spill_path, dtype=TRADE_DTYPE, mode='r',
+                                            shape=(self._spilled,))
+            yield self._spill_map
+        if self._size:
+            yield self._buffer[:self._size]
+
+    def to_array(self):
+        """Every record as one in-memory structured array"""
+        chunks = list(self.chunks())
+        if not chunks:
+            return np.empty(0, dtype=TRADE_DTYPE)
+        return np.concatenate(chunks) if len(chunks) > 1 else chunks[0].copy()
+
+    def volume(self):
+        """Total traded quantity"""
+        return int(sum(chunk['quantity'].sum() for chunk in self.chunks()))
+
+    def vwap(self):
+        """Volume-weighted average fill price (nan without fills)"""
+        notional = sum(float(np.dot(chunk['price'], chunk['quantity'])) for chunk in self.chunks())
+        volume = self.volume()
+        return notional / volume if volume > 0 else np.nan
+
+    def ohlcv(self, num_bars=None, steps_per_bar=1, fill_empty=True):
+        """
+        Aggregate the fills into bars
+
+        Args:
+            num_bars: Number of bars (default: up to the current step)
+            steps_per_bar: Simulation steps per bar
+            fill_empty: Give bars without fills the previous close as open, high, low
+                and close (as the C# live candle starts at the last price); otherwise nan
+
+        Returns:
+            Dict of 'open', 'high', 'low', 'close', 'vwap' (float arrays), 'volume' and
+            'trades' (int arrays), one entry per bar
+        """
+        if num_bars is None:
+            num_bars = -(-max(self.step, 1) // steps_per_bar)
+        bars = {name: np.full(num_bars, np.nan) for name in ('open', 'high', 'low', 'close')}
+        volume = np.zeros(num_bars, dtype=np.int64)
+        trades = np.zeros(num_bars, dtype=np.int64)
+        notional = np.zeros(num_bars)
+
+        for chunk in self.chunks():
+            bar = chunk['step'] // steps_per_bar
+            keep = (bar >= 0) & (bar < num_bars)
+            if not keep.all():
+                chunk, bar = chunk[keep], bar[keep]
+            if len(chunk) == 0:
+                continue
+            # Steps only increase, so each bar's fills are one contiguous run
+            starts = np.flatnonzero(np.r_[True, bar[1:] != bar[:-1]])
+            index = bar[starts]
+            ends = np.r_[starts[1:], len(chunk)] - 1
+            prices = chunk['price']
+            quantities = chunk['quantity']
+
+            # A bar split across two chunks keeps its first open and takes the later close
+            first = np.isnan(bars['open'][index])
+            bars['open'][index[first]] = prices[starts[first]]
+            bars['high'][index] = np.fmax(bars['high'][index], np.maximum.reduceat(prices, starts))
+            bars['low'][index] = np.fmin(bars['low'][index], np.minimum.reduceat(prices, starts))
+            bars['close'][index] = prices[ends]
+            volume[index] += np.add.reduceat(quantities, starts)
+            trades[index] += np.diff(np.r_[starts, len(chunk)])
+            notional[index] += np.add.reduceat(prices * quantities, starts)
+
+        if fill_empty:
+            empty = trades == 0
+            if empty.any():
+                # Carry the last close forward into bars without fills
+                last = np.where(~empty, np.arange(num_bars), -1)
+                np.maximum.accumulate(last, out=last)
+                carried = np.where(last >= 0, bars['close'][np.maximum(last, 0)], np.nan)
+                for name in ('open', 'high', 'low', 'close'):
+                    bars[name][empty] = carried[empty]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bars['vwap'] = np.where(volume > 0, notional / np.maximum(volume, 1), np.nan)
+        bars['volume'] = volume
+        bars['trades'] = trades
+        return bars
+
+    def to_dataframe(self, num_bars=None, steps_per_bar=1, fill_empty=True):
+        """ohlcv as a DataFrame"""
+        return pd.DataFrame(self.ohlcv(num_bars, steps_per_bar, fill_empty))
+
+    def clear(self):
+        """Drop every record and delete the spill file"""
+        self._size = 0
+        self._spilled = 0
+        self._spill_map = None
+        self.step = 0
+        if self._spill_path is not None:
+            try:
+                os.remove(self._spill_path)
+            except FileNotFoundError:
+                pass
+            self._spill_path = None
+
+    def __del__(self):
+        # Interpreter shutdown may already have torn down os
+        try:
+            self.clear()
+        except Exception:
+            pass